@@ -0,0 +1,24 @@
+"""add engine snapshot to fullhand sessions
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 引擎二进制快照，恢复牌局时不再按 seed 重放
+    op.add_column('fullhand_sessions', sa.Column('engine_snapshot', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('fullhand_sessions', 'engine_snapshot')
@@ -0,0 +1,24 @@
+"""add state version to fullhand sessions
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 行版本号 (乐观锁)，进程内引擎缓存用它判断条目是否过期
+    op.add_column('fullhand_sessions', sa.Column('state_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('fullhand_sessions', 'state_version')
@@ -0,0 +1,26 @@
+"""add materialized review to fullhand sessions
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 牌局结束时生成的复盘 (压缩 JSON) 及其逻辑版本；已有牌局由启动后的后台任务补算
+    op.add_column('fullhand_sessions', sa.Column('review', sa.LargeBinary(), nullable=True))
+    op.add_column('fullhand_sessions', sa.Column('review_version', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('fullhand_sessions', 'review_version')
+    op.drop_column('fullhand_sessions', 'review')
@@ -0,0 +1,109 @@
+"""unique daily fullhand stats rollup with backfill
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from collections import defaultdict
+from datetime import timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# 与 FullHandService.CORRECT_GRADES 一致
+CORRECT_GRADES = ("PERFECT", "ACCEPTABLE")
+
+sessions = sa.table(
+    'fullhand_sessions',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('status', sa.String),
+    sa.column('preflop_key_spot', sa.JSON),
+    sa.column('flop_key_spot', sa.JSON),
+    sa.column('result_bb', sa.Float),
+    sa.column('created_at', sa.DateTime),
+    sa.column('completed_at', sa.DateTime),
+)
+
+stats = sa.table(
+    'fullhand_stats',
+    sa.column('user_id', sa.Integer),
+    sa.column('date', sa.DateTime),
+    sa.column('total_hands', sa.Integer),
+    sa.column('preflop_key_spots', sa.Integer),
+    sa.column('flop_key_spots', sa.Integer),
+    sa.column('preflop_correct', sa.Integer),
+    sa.column('preflop_total', sa.Integer),
+    sa.column('flop_correct', sa.Integer),
+    sa.column('flop_total', sa.Integer),
+    sa.column('total_result_bb', sa.Float),
+    sa.column('total_duration_ms', sa.Integer),
+)
+
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def upgrade():
+    # 每日开局额度按 (用户, 开局时间) 计数，不再扫描用户的全部牌局
+    op.create_index('ix_fullhand_sessions_user_created', 'fullhand_sessions', ['user_id', 'created_at'], unique=False)
+
+    # 每用户每天一条汇总
+    with op.batch_alter_table('fullhand_stats') as batch_op:
+        batch_op.create_unique_constraint('uq_fullhand_stats_user_date', ['user_id', 'date'])
+
+    # 汇总表此前从未写入，按已结束的牌局一次性回填 (之后由牌局结束时增量维护)
+    rollups = defaultdict(lambda: defaultdict(float))
+    rows = op.get_bind().execute(sa.select(sessions).where(sessions.c.status == 'ENDED'))
+    for row in rows:
+        completed = _naive_utc(row.completed_at) or _naive_utc(row.created_at)
+        if completed is None:
+            continue
+        day = completed.replace(hour=0, minute=0, second=0, microsecond=0)
+        started = _naive_utc(row.created_at)
+        rollup = rollups[(row.user_id, day)]
+        rollup['total_hands'] += 1
+        rollup['total_result_bb'] += row.result_bb or 0.0
+        if started is not None:
+            rollup['total_duration_ms'] += max(0, int((completed - started).total_seconds() * 1000))
+        for street, spot in (('preflop', row.preflop_key_spot), ('flop', row.flop_key_spot)):
+            if spot:
+                rollup[f'{street}_key_spots'] += 1
+                if spot.get('grade'):
+                    rollup[f'{street}_total'] += 1
+                    rollup[f'{street}_correct'] += spot['grade'] in CORRECT_GRADES
+
+    if rollups:
+        op.bulk_insert(stats, [
+            {
+                'user_id': user_id,
+                'date': day,
+                'total_hands': int(r['total_hands']),
+                'preflop_key_spots': int(r['preflop_key_spots']),
+                'flop_key_spots': int(r['flop_key_spots']),
+                'preflop_correct': int(r['preflop_correct']),
+                'preflop_total': int(r['preflop_total']),
+                'flop_correct': int(r['flop_correct']),
+                'flop_total': int(r['flop_total']),
+                'total_result_bb': r['total_result_bb'],
+                'total_duration_ms': int(r['total_duration_ms']),
+            }
+            for (user_id, day), r in rollups.items()
+        ])
+
+
+def downgrade():
+    op.execute(stats.delete())
+    with op.batch_alter_table('fullhand_stats') as batch_op:
+        batch_op.drop_constraint('uq_fullhand_stats_user_date', type_='unique')
+    op.drop_index('ix_fullhand_sessions_user_created', table_name='fullhand_sessions')
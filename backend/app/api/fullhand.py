@@ -12,7 +12,7 @@ from app.api.deps import get_current_user
 from app.schemas.fullhand import (
     FullHandStartRequest, FullHandStartResponse, FullHandActRequest, 
     FullHandActResponse, FullHandReviewResponse, GameState, PlayerState,
-    ActionRecord, KeySpotInfo, FullHandStatsResponse
+    ActionRecord, KeySpotInfo, FullHandStatsResponse, FullHandBranchRequest, FullHandBranchResponse
 )
 from app.services.fullhand_service import FullHandService
 
@@ -40,7 +40,8 @@ def start_fullhand(
         session = service.create_session(
             current_user, 
             stack_bb=request.stack_bb,
-            replay_seed=request.replay_seed
+            replay_seed=request.replay_seed,
+            ai_level=request.ai_level
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -61,20 +62,7 @@ def start_fullhand(
         hero_cards=session.hero_cards,
     )
     
-    # 获取合法动作
-    from app.services.fullhand_engine import FullHandEngine
-    engine = FullHandEngine(stack_bb=session.stack_bb, seed=session.hand_seed)
-    engine.initialize_game()
-    # 重放行动恢复状态
-    for action_dict in session.action_log:
-        if action_dict["action"] not in ["sb", "bb"]:
-            engine._to_act_seat = action_dict["seat"]
-            try:
-                engine.process_action(action_dict["action"], action_dict.get("amount"))
-            except:
-                pass
-    
-    legal_actions = engine.get_legal_actions()
+    legal_actions = service.get_legal_actions(session)
     action_log = [ActionRecord(**a) for a in session.action_log]
     
     return FullHandStartResponse(
@@ -175,6 +163,38 @@ def get_review(
     )
 
 
+@router.post("/review/{hand_id}/branch", response_model=FullHandBranchResponse)
+def branch_hand(
+    hand_id: int,
+    request: FullHandBranchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """复盘分支推演: 从某个决策点换一种打法，由 AI 打完"""
+    service = FullHandService(db)
+    
+    try:
+        branch = service.branch_hand(
+            hand_id,
+            current_user,
+            request.action_index,
+            request.action,
+            request.amount
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return FullHandBranchResponse(
+        hand_id=branch["hand_id"],
+        action_index=branch["action_index"],
+        state=GameState(**branch["state"]),
+        action_log=[ActionRecord(**a) for a in branch["action_log"]],
+        result_bb=branch["result_bb"],
+        ended_by=branch["ended_by"],
+        original_result_bb=branch["original_result_bb"],
+    )
+
+
 @router.post("/replay/{hand_id}", response_model=FullHandStartResponse)
 def replay_hand(
     hand_id: int,
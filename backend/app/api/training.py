@@ -1,22 +1,25 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.models.user import User
 from app.api.deps import get_current_user
 from app.schemas.training import (
     TrainingSessionCreate, TrainingSessionResponse, TrainingAnswer,
-    TrainingResult, TrainingCompleteResponse, OverallStats, HandAdvice
+    TrainingResult, TrainingCompleteResponse, OverallStats, HandAdvice, RangeGrid
 )
 from app.services.training_service import (
     create_training_session, get_training_session, submit_answer,
     complete_training_session, get_user_training_history, get_overall_stats,
-    get_hand_advice
+    get_hand_advice, get_range_grid
 )
 from app.services.user_service import can_train, consume_train_credit, record_training_result
 
 router = APIRouter(prefix="/training", tags=["训练"])
 
+# 范围表只随部署的策略库变化，客户端缓存后用 ETag 重新验证
+RANGE_CACHE_CONTROL = "private, max-age=3600, must-revalidate"
+
 
 @router.post("/sessions", response_model=TrainingSessionResponse)
 def start_training(
@@ -192,3 +195,27 @@ def get_advice(
         gto_frequency=advice['strategy'],
         explanation=advice['explanation']
     )
+
+
+@router.get("/range", response_model=RangeGrid)
+def get_range(
+    position: str,
+    context: str,
+    stack: int = Query(100, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    """获取整张 13x13 范围表 (每个行动一个按手牌顺序排列的频率数组)"""
+    grid = get_range_grid(stack, position, context)
+    if grid is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown position or context"
+        )
+    
+    etag, body = grid
+    headers = {"ETag": etag, "Cache-Control": RANGE_CACHE_CONTROL}
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
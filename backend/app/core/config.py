@@ -41,6 +41,15 @@ class Settings(BaseSettings):
     DEFAULT_DAILY_FREE_TRAINS: int = 20
     SUBSCRIBER_DAILY_TRAINS: int = 999999
     
+    # Full hand
+    FULLHAND_VERIFY_SNAPSHOTS: bool = False  # 恢复牌局时额外按 seed 重放，校验引擎快照
+    FULLHAND_ENGINE_CACHE_SIZE: int = 1024  # 进程内缓存的进行中牌局数
+    FULLHAND_ENGINE_CACHE_TTL: int = 900  # seconds
+    FULLHAND_STATE_STORE: str = "memory"  # memory / redis (多 worker 部署用 redis)
+    FULLHAND_STATE_TTL: int = 3600  # seconds
+    FULLHAND_REVIEW_RECOMPUTE: bool = True  # 启动时在后台重算版本落后的物化复盘
+    FULLHAND_REVIEW_BATCH: int = 200
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
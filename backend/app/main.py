@@ -10,6 +10,7 @@ from app.core.config import settings
 from app.core.middleware import LoggingMiddleware, SecurityHeadersMiddleware
 from app.db.base import engine, Base
 from app.api import auth, training, payment, admin, advanced_training, fullhand
+from app.services.review_jobs import start_review_recompute
 
 
 @asynccontextmanager
@@ -17,6 +18,9 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时创建数据库表
     Base.metadata.create_all(bind=engine)
+    # 后台重算版本落后的物化复盘
+    if settings.FULLHAND_REVIEW_RECOMPUTE:
+        start_review_recompute()
     print(f"🚀 {settings.PROJECT_NAME} V{settings.VERSION} started")
     yield
     # 关闭时清理
@@ -2,9 +2,9 @@
 完整牌局模拟会话模型
 V1.1 新增
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, JSON, Text, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.db.base import Base
 
 
@@ -45,6 +45,17 @@ class FullHandSession(Base):
     preflop_key_spot = Column(JSON, nullable=True)
     flop_key_spot = Column(JSON, nullable=True)
     
+    # 物化复盘 (hand_review.pack_review)，牌局结束时生成；review_version 落后于 REVIEW_VERSION 时重新计算
+    review = deferred(Column(LargeBinary, nullable=True))
+    review_version = Column(Integer, nullable=True)
+    
+    # 引擎二进制快照 (FullHandEngine.to_snapshot)，缺失或版本不符时按 seed 重放
+    # 延迟加载: 进行中的牌局优先从共享状态存储读取快照，只有存储缺失时才查询这一列
+    engine_snapshot = deferred(Column(LargeBinary, nullable=True))
+    
+    # 行版本号: 每次更新自增 (乐观锁)，进程内引擎缓存据此判断是否过期
+    state_version = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # 结果
     result_bb = Column(Float, nullable=True)  # +/- bb
     ended_by = Column(String, nullable=True)  # fold, showdown, allin, hero_fold_preflop
@@ -56,15 +67,22 @@ class FullHandSession(Base):
     
     # 关联
     user = relationship("User", back_populates="fullhand_sessions")
+    
+    __mapper_args__ = {"version_id_col": state_version}
+    
+    __table_args__ = (
+        # 每日开局额度按 (用户, 开局时间) 计数
+        Index('ix_fullhand_sessions_user_created', 'user_id', 'created_at'),
+    )
 
 
 class FullHandStats(Base):
-    """完整牌局统计（每日汇总）"""
+    """完整牌局统计（每日汇总）：牌局结束时与会话在同一事务中累加，统计接口只读这张表"""
     __tablename__ = "fullhand_stats"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    date = Column(DateTime, nullable=False, index=True)  # 日期，无时区
+    date = Column(DateTime, nullable=False, index=True)  # 日期 (UTC 零点)，无时区，按牌局结束时间归属
     
     # 统计
     total_hands = Column(Integer, default=0)
@@ -89,5 +107,5 @@ class FullHandStats(Base):
     # 联合唯一约束
     __table_args__ = (
         # 每天每用户一条记录
-        {'sqlite_autoincrement': True},
+        UniqueConstraint('user_id', 'date', name='uq_fullhand_stats_user_date'),
     )
@@ -70,6 +70,13 @@ class FullHandReplayRequest(BaseModel):
     hand_id: int
 
 
+class FullHandBranchRequest(BaseModel):
+    """复盘分支推演请求"""
+    action_index: int  # 行动记录下标 (含盲注记录)
+    action: str  # 替换成的动作: fold, check, call, bet, raise, allin
+    amount: Optional[float] = None  # bet/raise 时需要
+
+
 # ========== 响应 Schemas ==========
 
 class GameState(BaseModel):
@@ -171,6 +178,17 @@ class FullHandReviewResponse(BaseModel):
     showdown_analysis: Optional[ShowdownAnalysis] = None  # 摊牌详细分析
 
 
+class FullHandBranchResponse(BaseModel):
+    """复盘分支推演响应"""
+    hand_id: int
+    action_index: int
+    state: GameState
+    action_log: List[ActionRecord]  # 分支的完整行动记录
+    result_bb: float
+    ended_by: Optional[str] = None
+    original_result_bb: float  # 实际牌局的结果，便于对比
+
+
 class FullHandHistoryItem(BaseModel):
     """历史记录项"""
     hand_id: int
@@ -189,6 +207,6 @@ class FullHandStatsResponse(BaseModel):
     avg_result_bb: float
     preflop_accuracy: Optional[float] = None
     flop_accuracy: Optional[float] = None
-    today_hands: int
+    today_hands: int  # 今日开局数 (与每日额度同一计数)
     today_remaining: int  # Free 用户今日剩余局数
     is_pro: bool
@@ -96,6 +96,14 @@ class HandAdvice(BaseModel):
     explanation: str
 
 
+class RangeGrid(BaseModel):
+    stack_size: int
+    position: str
+    action_to_you: str  # 归入加注尺度网格后的场景
+    hands: List[str]  # 169 手牌，13x13 矩阵按行展开
+    frequencies: Dict[str, List[float]]  # 行动 -> 与 hands 对齐的频率数组
+
+
 class DailyStats(BaseModel):
     date: str
     train_count: int
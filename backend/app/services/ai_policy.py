@@ -0,0 +1,345 @@
+"""
+AI 对手策略
+按 ai_level 把翻前 GTO 策略表和翻牌策略表编译一次 (按风格调整频率后逐格建别名表，展平为 Python 列表)，
+每次 AI 决策只做几次下标计算和一次 O(1) 别名采样，再把策略表的行动映射为引擎的合法行动编码
+
+    - 翻前: (位置, 场景, 手牌类) -> GTO 混合策略
+    - 翻牌: (角色, IP/OOP, SPR, 牌面纹理, 手牌桶) -> 翻牌策略表的混合策略；
+      翻前进攻方持续下注，非进攻方无人下注时按 lead 系数减少领先下注，面对下注时按防守方策略
+    - 转牌、河牌: 被动 (过牌 / 跟注)；正式牌局与复盘分支在翻牌结束后快进，不会走到这里
+
+随机数由 decision_uniform 按 (牌局 seed, 街, 本街行动序号) 确定性生成，
+同一手重放、快照恢复和 fork 后 AI 的选择不变
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import random
+
+import numpy as np
+
+from app.services.cards import hand_class
+from app.services.flop_strategy import FlopStrategyEngine, get_flop_table
+from app.services.fullhand_engine import (
+    ACT_ALLIN, ACT_BET, ACT_CALL, ACT_CHECK, ACT_FOLD, ACT_RAISE, FullHandEngine, Street,
+)
+from app.services.gto_engine import GTOStrategy, get_gto_strategy
+from app.services.hand_buckets import flop_bucket_index
+from app.services.sampling import build_alias_tables
+
+
+class AIProfile(NamedTuple):
+    """AI 风格: 按行动类别缩放策略频率 (之后每格重新归一化)"""
+    label: str
+    fold: float  # 弃牌
+    passive: float  # 过牌 / 跟注 / 溜入
+    aggressive: float  # 下注 / 加注 / 全下
+    lead: float  # 翻牌非进攻方无人下注时下注频率的额外系数
+
+
+AI_PROFILES: Dict[str, AIProfile] = {
+    "standard": AIProfile("标准 (GTO 混合策略)", 1.0, 1.0, 1.0, 0.35),
+    "passive": AIProfile("跟注站", 0.5, 1.6, 0.5, 0.2),
+    "aggressive": AIProfile("激进", 0.7, 0.8, 1.8, 0.6),
+}
+DEFAULT_AI_LEVEL = "standard"
+
+# 编译后的翻前策略按 (ai_level, 筹码深度) 缓存的条目上限
+POLICY_CACHE_SIZE = 32
+
+# 翻牌下注 / 加注尺度 (底池比例)，与 FlopStrategyEngine 的行动轴对应
+FLOP_SIZES = {"bet33": 0.33, "bet75": 0.75, "bet125": 1.25, "raise75": 0.75, "raise125": 1.25}
+
+# 翻牌编译表的角色轴: 持续下注 / 领先下注 (非进攻方，无人下注) / 面对下注
+FLOP_ROLES = ["cbet", "lead", "vs_bet"]
+
+# 翻前行动映射种类
+_KIND_FOLD, _KIND_CHECK, _KIND_CALL, _KIND_RAISE_TO, _KIND_RAISE_X, _KIND_ALLIN = range(6)
+
+_POSITION_INDEX = {p: i for i, p in enumerate(GTOStrategy.POSITIONS)}
+_TEXTURE_RULES = FlopStrategyEngine(use_table=False)
+_MASK64 = (1 << 64) - 1
+
+# 翻牌后行动顺序从庄位下家开始: _ACTS_AFTER[button][seat] = 在 seat 之后行动的座位位图
+_ACTS_AFTER = [
+    [sum(1 << s for s in range(6) if (s - button - 1) % 6 > (seat - button - 1) % 6) for seat in range(6)]
+    for button in range(6)
+]
+
+
+def _preflop_kind(label: str) -> Tuple[int, float]:
+    """翻前策略表行动标签 -> (映射种类, 参数)"""
+    if label == "fold":
+        return _KIND_FOLD, 0.0
+    if label == "check":
+        return _KIND_CHECK, 0.0
+    if label in ("call", "limp"):
+        return _KIND_CALL, 0.0
+    if label == "raise_all_in":
+        return _KIND_ALLIN, 0.0
+    if label == "raise_3x":
+        return _KIND_RAISE_X, 3.0
+    return _KIND_RAISE_TO, float(label[len("raise_"):-len("bb")])
+
+
+def _label_weights(labels: List[str], profile: AIProfile) -> np.ndarray:
+    """按风格给行动轴每一列的缩放系数"""
+    weights = []
+    for label in labels:
+        if label == "fold":
+            weights.append(profile.fold)
+        elif label in ("check", "call", "limp"):
+            weights.append(profile.passive)
+        else:
+            weights.append(profile.aggressive)
+    return np.array(weights, dtype=np.float64)
+
+
+def _flatten(accept: np.ndarray, alias: np.ndarray) -> Tuple[List[List[float]], List[List[int]]]:
+    """别名表展平为每格一行的 Python 列表，单次采样不经过 NumPy 标量"""
+    n = accept.shape[-1]
+    return accept.reshape(-1, n).tolist(), alias.reshape(-1, n).tolist()
+
+
+def _draw(accept: List[float], alias: List[int], u: float) -> int:
+    """与 sampling.alias_draw 相同，作用于列表行"""
+    n = len(accept)
+    scaled = u * n
+    k = min(int(scaled), n - 1)
+    return k if scaled - k < accept[k] else alias[k]
+
+
+def _round_down(amount: float) -> float:
+    """下注额按 0.5BB 向下取整，至少 0.5BB"""
+    return max(0.5, int(amount * 2) / 2)
+
+
+@lru_cache(maxsize=4096)
+def _seed_key(seed: str) -> int:
+    return int.from_bytes(hashlib.blake2b(seed.encode(), digest_size=8).digest(), "little")
+
+
+def decision_uniform(engine: FullHandEngine) -> float:
+    """
+    当前决策点的 [0, 1) 均匀随机数: 由牌局 seed、街和本街行动序号确定 (splitmix64 混合)
+    街由公共牌张数区分，避免对枚举求哈希
+    """
+    x = (_seed_key(str(engine.seed)) + ((len(engine.board) << 8) + engine._street_actions + 1)
+         * 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    x ^= x >> 31
+    return (x >> 11) * (1.0 / (1 << 53))
+
+
+class _FlopPolicy:
+    """按风格编译的翻牌策略 (与筹码深度无关)"""
+
+    def __init__(self, profile: AIProfile):
+        # 规则表在部分格子 (湿润牌面 / OOP 等多项下调叠加) 有负频率，按 0 处理
+        base = np.clip(get_flop_table().astype(np.float64), 0.0, None)
+        engine = FlopStrategyEngine
+        pfr_weights = _label_weights(engine.PFR_ACTIONS, profile)
+        def_weights = _label_weights(engine.DEFENDER_ACTIONS, profile)
+        lead_weights = pfr_weights * np.array([1.0] + [profile.lead] * (len(engine.PFR_ACTIONS) - 1))
+        # (角色, IP/OOP, SPR, 纹理, 手牌桶, 行动)；角色轴为 FLOP_ROLES
+        self.probs = np.stack([base[0] * pfr_weights, base[0] * lead_weights, base[1] * def_weights])
+        # 全零的格子: 进攻方过牌、防守方弃牌 (都是行动轴第一列)
+        accept, alias = build_alias_tables(self.probs, default_action=0)
+        self.accept, self.alias = _flatten(accept, alias)
+        self.labels = [engine.PFR_ACTIONS, engine.PFR_ACTIONS, engine.DEFENDER_ACTIONS]
+        self.shape = self.probs.shape[:-1]
+        self._texture_cache: Dict[Tuple[int, int, int], int] = {}
+
+    def texture_index(self, board: List[int]) -> int:
+        key = (board[0], board[1], board[2])
+        texture = self._texture_cache.get(key)
+        if texture is None:
+            texture = FlopStrategyEngine._texture_index(_TEXTURE_RULES.analyze_board_texture_ids(board[:3]))
+            self._texture_cache[key] = texture
+        return texture
+
+    def cell(self, role: int, ip: bool, spr: float, texture: int, bucket: int) -> int:
+        _, n_ip, n_spr, n_tex, n_bucket = self.shape
+        spr_idx = 0 if spr < 3 else (1 if spr < 6 else 2)
+        return (((role * n_ip + (0 if ip else 1)) * n_spr + spr_idx) * n_tex + texture) * n_bucket + bucket
+
+
+class AIPolicy:
+    """
+    一个 ai_level 在一个筹码深度下编译好的策略
+    decide(engine, legal, u) -> (动作编码, 金额)，金额语义与 FullHandEngine._act 相同
+    """
+
+    def __init__(self, level: str, stack_bb: int):
+        if level not in AI_PROFILES:
+            raise ValueError(f"Unknown AI level: {level}")
+        self.level = level
+        self.profile = AI_PROFILES[level]
+        self.stack_bb = stack_bb
+
+        gto = get_gto_strategy(stack_bb)
+        self.preflop_labels = list(gto.actions)
+        self._preflop_kinds = [_preflop_kind(label) for label in self.preflop_labels]
+        self._contexts = list(gto.contexts)
+        self._context_index = {c: i for i, c in enumerate(self._contexts)}
+        self._n_hands = gto.table.shape[2]
+        # (位置, 场景, 手牌类, 行动)，未归一化；全零的格子按弃牌处理 (fold 是行动轴最后一列)
+        self.preflop_probs = (np.clip(gto.table.astype(np.float64), 0.0, None)
+                              * _label_weights(self.preflop_labels, self.profile))
+        accept, alias = build_alias_tables(self.preflop_probs)
+        self._preflop_accept, self._preflop_alias = _flatten(accept, alias)
+        self.flop = _get_flop_policy(level)
+
+    # 翻前
+
+    def preflop_context(self, engine: FullHandEngine, seat: int) -> str:
+        """翻前场景 (策略表中的场景名)"""
+        player = engine.players[seat]
+        if engine.current_bet <= 1.0:
+            return "open" if engine.pot <= 1.5 else "vs_limp"
+        if engine.current_bet >= player.stack + player.committed_this_street:
+            return "vs_all_in"
+        if engine._street_raises >= 2:
+            return "vs_3bet"
+        return GTOStrategy.raise_context(engine.current_bet)
+
+    def preflop_cell(self, engine: FullHandEngine, seat: int) -> int:
+        """展平后的翻前策略格下标"""
+        player = engine.players[seat]
+        ctx = self._context_index[self.preflop_context(engine, seat)]
+        hand = hand_class(player.hole_ids[0], player.hole_ids[1])
+        return (_POSITION_INDEX[player.position] * len(self._contexts) + ctx) * self._n_hands + hand
+
+    def _preflop(self, engine: FullHandEngine, seat: int, legal: List[int], u: float) -> Tuple[int, Optional[float]]:
+        cell = self.preflop_cell(engine, seat)
+        kind, value = self._preflop_kinds[_draw(self._preflop_accept[cell], self._preflop_alias[cell], u)]
+        player = engine.players[seat]
+
+        if kind == _KIND_FOLD:
+            return (ACT_CHECK, None) if ACT_CHECK in legal else (ACT_FOLD, None)
+        if kind == _KIND_CHECK:
+            return (ACT_CHECK, None) if ACT_CHECK in legal else (ACT_FOLD, None)
+        if kind == _KIND_CALL:
+            return self._passive(legal)
+        if kind == _KIND_ALLIN:
+            return self._allin(legal)
+
+        if ACT_RAISE not in legal:
+            # 无人加注时翻前不能下注 (大盲面对溜入只能过牌)；筹码不够最小加注时全下
+            return (ACT_CHECK, None) if ACT_CHECK in legal else self._allin(legal)
+        target = value if kind == _KIND_RAISE_TO else value * engine.current_bet
+        return self._raise_to(engine, player, legal, target)
+
+    # 翻牌
+
+    def _flop_decision(self, engine: FullHandEngine, seat: int, legal: List[int],
+                       u: float) -> Tuple[int, Optional[float]]:
+        player = engine.players[seat]
+        to_call = engine.current_bet - player.committed_this_street
+        if to_call > 0:
+            role = 2
+        else:
+            role = 0 if engine._preflop_aggressor == seat else 1
+        ip = not engine._in_hand_mask & _ACTS_AFTER[engine.button_seat][seat]
+        spr = player.stack / engine.pot if engine.pot > 0 else float("inf")
+        bucket = flop_bucket_index(player.hole_ids, engine.board)
+        cell = self.flop.cell(role, ip, spr, self.flop.texture_index(engine.board), bucket)
+        label = self.flop.labels[role][_draw(self.flop.accept[cell], self.flop.alias[cell], u)]
+
+        if label == "check":
+            return (ACT_CHECK, None) if ACT_CHECK in legal else self._passive(legal)
+        if label == "fold":
+            return (ACT_FOLD, None) if ACT_FOLD in legal else self._passive(legal)
+        if label == "call":
+            return self._passive(legal)
+        if label.startswith("bet"):
+            if ACT_BET not in legal:
+                return self._passive(legal)
+            size = _round_down(engine.pot * FLOP_SIZES[label])
+            if size >= player.stack:
+                return self._allin(legal)
+            return ACT_BET, size
+        # raise75 / raise125: 加注额为跟注后底池的比例
+        if ACT_RAISE not in legal:
+            return self._allin(legal) if ACT_ALLIN in legal else self._passive(legal)
+        target = engine.current_bet + _round_down(FLOP_SIZES[label] * (engine.pot + to_call))
+        return self._raise_to(engine, player, legal, target)
+
+    # 行动映射
+
+    @staticmethod
+    def _passive(legal: List[int]) -> Tuple[int, Optional[float]]:
+        """过牌 > 跟注 > (筹码不够跟注时) 全下 > 弃牌"""
+        for code in (ACT_CHECK, ACT_CALL, ACT_ALLIN, ACT_FOLD):
+            if code in legal:
+                return code, None
+        return legal[0], None
+
+    def _allin(self, legal: List[int]) -> Tuple[int, Optional[float]]:
+        return (ACT_ALLIN, None) if ACT_ALLIN in legal else self._passive(legal)
+
+    def _raise_to(self, engine: FullHandEngine, player, legal: List[int],
+                  target: float) -> Tuple[int, Optional[float]]:
+        """加注到 target (不低于最小加注)，达到全部筹码时全下"""
+        target = max(target, engine.current_bet + engine._last_raise_size)
+        if target >= player.stack + player.committed_this_street:
+            return self._allin(legal)
+        return ACT_RAISE, target
+
+    # 入口
+
+    def decide(self, engine: FullHandEngine, legal: List[int], u: float) -> Tuple[int, Optional[float]]:
+        """当前行动座位的决策，u 为 [0, 1) 均匀随机数"""
+        seat = engine._to_act_seat
+        if engine.street == Street.PREFLOP:
+            return self._preflop(engine, seat, legal, u)
+        if engine.street == Street.FLOP:
+            return self._flop_decision(engine, seat, legal, u)
+        return self._passive(legal)
+
+    def act(self, engine: FullHandEngine) -> bool:
+        """当前行动座位按策略行动 (随机数取 decision_uniform)，没有合法行动时返回 False"""
+        if engine._to_act_seat is None:
+            return False
+        legal = engine.legal_action_codes()
+        if not legal:
+            return False
+        code, amount = self.decide(engine, legal, decision_uniform(engine))
+        engine._act(code, amount)
+        return True
+
+    def as_headless(self, rng: random.Random) -> Callable[[FullHandEngine, List[int]], Tuple[int, Optional[float]]]:
+        """headless_engine.simulate 使用的策略函数 (随机数取 rng)"""
+        def policy(engine: FullHandEngine, legal: List[int]) -> Tuple[int, Optional[float]]:
+            return self.decide(engine, legal, rng.random())
+        return policy
+
+
+_flop_policies: Dict[str, _FlopPolicy] = {}
+_policies: "OrderedDict[Tuple[str, int], AIPolicy]" = OrderedDict()
+_lock = threading.RLock()
+
+
+def _get_flop_policy(level: str) -> _FlopPolicy:
+    with _lock:
+        policy = _flop_policies.get(level)
+        if policy is None:
+            policy = _flop_policies[level] = _FlopPolicy(AI_PROFILES[level])
+        return policy
+
+
+def get_ai_policy(level: str, stack_bb: int) -> AIPolicy:
+    """获取编译好的 AI 策略 (有界 LRU 缓存)，未知的 ai_level 抛出 ValueError"""
+    key = (level, stack_bb)
+    with _lock:
+        policy = _policies.get(key)
+        if policy is not None:
+            _policies.move_to_end(key)
+            return policy
+        policy = _policies[key] = AIPolicy(level, stack_bb)
+        while len(_policies) > POLICY_CACHE_SIZE:
+            _policies.popitem(last=False)
+        return policy
@@ -0,0 +1,182 @@
+"""
+牌与手牌的统一编号
+52 张牌、1326 种具体组合、169 类起手牌的整数 id 以及互相转换的预计算表，
+各引擎的热路径只做整数下标查表，不再解析字符串
+
+编号约定:
+    牌 id      = (点数 - 2) * 4 + 花色下标   ('2s' = 0, 'Ac' = 51)
+    组合 id    = 按 (高位牌, 低位牌) 字典序枚举的 0..1325
+    手牌类 id  = ALL_HANDS 顺序 (13x13 矩阵按行展开，'AA' = 0, '22' = 168)
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SUITS = ['s', 'h', 'd', 'c']  # 黑桃、红桃、方块、梅花
+RANKS = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
+RANK_VALUES = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8,
+               '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
+RANK_CHARS = {v: r for r, v in RANK_VALUES.items()}
+
+NUM_CARDS = 52
+NUM_COMBOS = 1326
+NUM_HAND_CLASSES = 169
+
+
+# ==================== 单张牌 ====================
+
+def make_card(rank_value: int, suit_idx: int) -> int:
+    return (rank_value - 2) * 4 + suit_idx
+
+
+CARD_STRS: Tuple[str, ...] = tuple(
+    RANK_CHARS[c // 4 + 2] + SUITS[c % 4] for c in range(NUM_CARDS)
+)
+CARD_IDS: Dict[str, int] = {s: c for c, s in enumerate(CARD_STRS)}
+
+# 点数 (2-14) 与花色下标，元组用于标量查表，数组用于向量化
+CARD_RANK: Tuple[int, ...] = tuple(c // 4 + 2 for c in range(NUM_CARDS))
+CARD_SUIT: Tuple[int, ...] = tuple(c % 4 for c in range(NUM_CARDS))
+CARD_RANK_ARRAY = np.array(CARD_RANK, dtype=np.uint8)
+CARD_SUIT_ARRAY = np.array(CARD_SUIT, dtype=np.uint8)
+
+
+def card_id(card: str) -> int:
+    return CARD_IDS[card]
+
+
+def card_str(card: int) -> str:
+    return CARD_STRS[card]
+
+
+def parse_cards(cards: Sequence[str]) -> List[int]:
+    return [CARD_IDS[c] for c in cards]
+
+
+def format_cards(cards: Sequence[int]) -> List[str]:
+    return [CARD_STRS[c] for c in cards]
+
+
+# ==================== 169 类起手牌 ====================
+
+def _build_hand_classes() -> List[str]:
+    hands = []
+    for i, r1 in enumerate(RANKS):
+        for j, r2 in enumerate(RANKS):
+            if i == j:
+                hands.append(f"{r1}{r2}")  # 对子
+            elif i < j:
+                hands.append(f"{r1}{r2}s")  # 同花
+            else:
+                hands.append(f"{r2}{r1}o")  # 不同花
+    return hands
+
+
+HAND_CLASSES: Tuple[str, ...] = tuple(_build_hand_classes())
+HAND_CLASS_INDEX: Dict[str, int] = {h: i for i, h in enumerate(HAND_CLASSES)}
+
+
+def hand_type_of(hand: str) -> str:
+    """分类手牌类型"""
+    if len(hand) == 2:
+        return "pair"
+    elif hand.endswith('s'):
+        return "suited"
+    else:
+        return "offsuit"
+
+
+def hand_rank_of(hand: str) -> int:
+    """手牌强度等级 (1-169, 1是AA最强)"""
+    hand_type = hand_type_of(hand)
+    idx1 = RANKS.index(hand[0])
+    idx2 = RANKS.index(hand[1])
+
+    if hand_type == "pair":
+        # 对子: AA=1, KK=2, ... 22=13
+        return idx1 + 1
+
+    pair_idx = min(idx1, idx2) * 13 + max(idx1, idx2)
+    if hand_type == "suited":
+        # 同花比不同花强
+        return 13 + (12 * 13) + pair_idx
+    # 不同花
+    return 13 + (12 * 13) + (12 * 13) + pair_idx
+
+
+HAND_CLASS_TYPE: Tuple[str, ...] = tuple(hand_type_of(h) for h in HAND_CLASSES)
+HAND_CLASS_RANK: Tuple[int, ...] = tuple(hand_rank_of(h) for h in HAND_CLASSES)
+HAND_CLASS_RANK_ARRAY = np.array(HAND_CLASS_RANK, dtype=np.int16)
+
+
+# ==================== 1326 种组合 ====================
+
+def _build_combos() -> Tuple[np.ndarray, np.ndarray]:
+    combo_cards = np.zeros((NUM_COMBOS, 2), dtype=np.uint8)
+    combo_index = np.full((NUM_CARDS, NUM_CARDS), -1, dtype=np.int16)
+    idx = 0
+    for hi in range(NUM_CARDS):
+        for lo in range(hi):
+            combo_cards[idx] = (hi, lo)
+            combo_index[hi, lo] = combo_index[lo, hi] = idx
+            idx += 1
+    return combo_cards, combo_index
+
+
+# COMBO_CARDS[combo] = (高位牌, 低位牌)；COMBO_INDEX[c1, c2] = combo (对称，对角线为 -1)
+COMBO_CARDS, COMBO_INDEX = _build_combos()
+
+
+def _class_of_cards(c1: int, c2: int) -> int:
+    r1, r2 = CARD_RANK[c1], CARD_RANK[c2]
+    hi, lo = max(r1, r2), min(r1, r2)
+    row, col = 14 - hi, 14 - lo
+    if r1 == r2:
+        return row * 13 + row
+    if CARD_SUIT[c1] == CARD_SUIT[c2]:
+        return row * 13 + col  # 同花在矩阵上三角
+    return col * 13 + row  # 不同花在矩阵下三角
+
+
+# CARDS_CLASS[c1][c2] = 手牌类 id (任意顺序，同一张牌为 -1)
+CARDS_CLASS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_class_of_cards(c1, c2) if c1 != c2 else -1 for c2 in range(NUM_CARDS))
+    for c1 in range(NUM_CARDS)
+)
+COMBO_CLASS = np.array(
+    [CARDS_CLASS[hi][lo] for hi, lo in COMBO_CARDS], dtype=np.uint8
+)
+CLASS_COMBOS: Tuple[np.ndarray, ...] = tuple(
+    np.flatnonzero(COMBO_CLASS == k).astype(np.int16) for k in range(NUM_HAND_CLASSES)
+)
+
+
+def hand_class(c1: int, c2: int) -> int:
+    """两张牌 id -> 手牌类 id"""
+    return CARDS_CLASS[c1][c2]
+
+
+def hand_class_name(cards: Sequence[str]) -> str:
+    """两张牌字符串 -> 标准手牌 (e.g., 'AKs', '72o', 'TT')"""
+    return HAND_CLASSES[CARDS_CLASS[CARD_IDS[cards[0]]][CARD_IDS[cards[1]]]]
+
+
+def combo_id(c1: int, c2: int) -> int:
+    return int(COMBO_INDEX[c1, c2])
+
+
+def parse_hand_combos(token: str) -> Optional[np.ndarray]:
+    """手牌类 ('AKs', 'TT') 或具体组合 ('AhKd') -> 组合 id 数组，无法识别时返回 None"""
+    if len(token) == 4:
+        c1 = CARD_IDS.get(token[0].upper() + token[1].lower())
+        c2 = CARD_IDS.get(token[2].upper() + token[3].lower())
+        if c1 is None or c2 is None or c1 == c2:
+            return None
+        return np.array([COMBO_INDEX[c1, c2]])
+
+    hand = token[:2].upper() + token[2:].lower()
+    hand_idx = HAND_CLASS_INDEX.get(hand)
+    if hand_idx is None:
+        return None
+    return CLASS_COMBOS[hand_idx]
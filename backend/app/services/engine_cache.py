@@ -0,0 +1,74 @@
+"""
+进行中牌局的引擎缓存
+按会话 id 保存最近一次写库后的 FullHandEngine，下一次行动直接取用，不再读快照或按 seed 重放
+
+失效条件:
+    - 版本: 条目带写入时的 FullHandSession.state_version，与数据库行不一致 (其他进程已更新) 即作废
+    - TTL: 超过 FULLHAND_ENGINE_CACHE_TTL 秒未写入即作废
+    - 容量: 超过 FULLHAND_ENGINE_CACHE_SIZE 时淘汰最久未使用的条目
+
+缓存中的引擎从不被修改: get 返回 fork 出的副本，调用方修改并写库成功后再 put 新状态
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from app.core.config import settings
+from app.services.fullhand_engine import FullHandEngine
+
+
+class _Entry(NamedTuple):
+    version: int
+    expires_at: float
+    engine: FullHandEngine
+
+
+class LiveEngineCache:
+    """有界、带 TTL 和版本校验的 LRU 引擎缓存 (线程安全)"""
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._clock = clock
+        self._items: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: int, version: int) -> Optional[FullHandEngine]:
+        """版本一致且未过期时返回引擎副本，否则删除条目并返回 None"""
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is None:
+                return None
+            if entry.version != version or entry.expires_at <= self._clock():
+                del self._items[session_id]
+                return None
+            self._items.move_to_end(session_id)
+            return entry.engine.fork()
+
+    def put(self, session_id: int, version: int, engine: FullHandEngine) -> None:
+        """记录写库后的引擎状态，调用方之后不应再修改 engine"""
+        with self._lock:
+            self._items[session_id] = _Entry(version, self._clock() + self.ttl, engine)
+            self._items.move_to_end(session_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, session_id: int) -> None:
+        with self._lock:
+            self._items.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# 进程内单例
+_engine_cache = LiveEngineCache(settings.FULLHAND_ENGINE_CACHE_SIZE, settings.FULLHAND_ENGINE_CACHE_TTL)
+
+
+def get_engine_cache() -> LiveEngineCache:
+    return _engine_cache
@@ -0,0 +1,347 @@
+"""
+胜率计算
+手牌对手牌、手牌对范围、范围对范围在任意公共牌 (0 / 3 / 4 / 5 张) 下的全下胜率
+
+    计算量 (需要评估的 7 张牌手数) 不超过 EXACT_EVAL_LIMIT 时枚举全部剩余发牌，否则向量化蒙特卡洛；
+    大规模模拟按固定大小的块拆分种子并分发到多进程，结果与进程数无关；
+    结果按规范化输入 (花色同构下最小的公共牌 + 范围表示) 做 LRU 缓存，
+    未指定种子时种子由规范化输入导出，同一输入总是得到同一结果
+
+范围: 长度 1326 的组合权重数组，可由 parse_range("AA,AKs:0.5,AhKd") 或 hand_range([c1, c2]) 构造
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations
+from math import comb
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.cards import COMBO_CARDS, COMBO_INDEX, NUM_CARDS, NUM_COMBOS, parse_hand_combos
+from app.services.hand_buckets import SUIT_PERM_CARDS
+from app.services.hand_evaluator import evaluate_batch
+
+DEFAULT_SAMPLES = 2000
+EXACT_EVAL_LIMIT = 50_000
+EXACT_PAIR_CHUNK = 2_000_000  # 精确枚举时每块比较的 (组合对 × 发牌) 数
+MC_CHUNK = 20_000  # 蒙特卡洛每块的模拟次数 (也是并行拆分的单位)
+PARALLEL_MIN_SAMPLES = 200_000
+MAX_REJECTION_ROUNDS = 50
+
+# 两个组合是否共用牌 (1326, 1326)
+COMBO_CONFLICT = (COMBO_CARDS[:, None, :, None] == COMBO_CARDS[None, :, None, :]).any(axis=(2, 3))
+# 花色置换下的组合映射 COMBO_PERM[p, combo] = 置换后的组合
+COMBO_PERM = COMBO_INDEX[SUIT_PERM_CARDS[:, COMBO_CARDS[:, 0]], SUIT_PERM_CARDS[:, COMBO_CARDS[:, 1]]]
+
+
+class EquityError(ValueError):
+    """输入无效 (重复的牌、空范围或两个范围无法同时成立)"""
+
+
+@dataclass
+class EquityResult:
+    equity: float  # 第一方胜率 (平局计一半)
+    win: float
+    tie: float
+    samples: int  # 精确枚举时为 (组合对, 发牌) 数，否则为模拟次数
+    exact: bool
+    std_error: float = 0.0
+
+    def to_dict(self):
+        return {
+            "equity": round(self.equity, 4),
+            "win": round(self.win, 4),
+            "tie": round(self.tie, 4),
+            "samples": self.samples,
+            "exact": self.exact,
+            "std_error": round(self.std_error, 4),
+        }
+
+
+# ==================== 范围 ====================
+
+def parse_range(text: str) -> np.ndarray:
+    """'AA,AKs:0.5,AhKd' -> 组合权重；省略权重时为 1"""
+    weights = np.zeros(NUM_COMBOS)
+    for token in text.replace(",", " ").split():
+        hand, _, weight = token.partition(":")
+        combos = parse_hand_combos(hand)
+        if combos is None:
+            raise EquityError(f"Invalid hand: {hand}")
+        try:
+            weights[combos] = float(weight) if weight else 1.0
+        except ValueError:
+            raise EquityError(f"Invalid weight: {token}")
+    return weights
+
+
+def hand_range(hand: Sequence[int]) -> np.ndarray:
+    """两张牌 id -> 只含该组合的范围"""
+    if len(hand) != 2 or hand[0] == hand[1]:
+        raise EquityError(f"Invalid hand: {hand}")
+    weights = np.zeros(NUM_COMBOS)
+    weights[COMBO_INDEX[hand[0], hand[1]]] = 1.0
+    return weights
+
+
+def _remove_blocked(weights: np.ndarray, board: Tuple[int, ...]) -> np.ndarray:
+    weights = np.asarray(weights, dtype=np.float64).copy()
+    if weights.shape != (NUM_COMBOS,):
+        raise EquityError("Range must have one weight per combo")
+    if board:
+        blocked = np.isin(COMBO_CARDS, board).any(axis=1)
+        weights[blocked] = 0.0
+    return weights
+
+
+# ==================== 缓存 ====================
+
+class EquityCache:
+    """有界 LRU 胜率缓存，键为规范化输入的摘要"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._items: "OrderedDict[bytes, EquityResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[EquityResult]:
+        with self._lock:
+            result = self._items.get(key)
+            if result is not None:
+                self._items.move_to_end(key)
+            return result
+
+    def put(self, key: bytes, result: EquityResult) -> None:
+        with self._lock:
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_equity_cache = EquityCache(int(os.getenv("EQUITY_CACHE_SIZE", "4096")))
+
+
+def _raw_key(w1: np.ndarray, w2: np.ndarray, board: Tuple[int, ...]) -> bytes:
+    return hashlib.sha1(
+        bytes(board) + b"|" + w1.astype(np.float32).tobytes() + w2.astype(np.float32).tobytes()
+    ).digest()
+
+
+def _canonical_key(w1: np.ndarray, w2: np.ndarray, board: Tuple[int, ...]) -> bytes:
+    """
+    规范化输入：在 24 种花色置换中取 (排序后的公共牌, 两个范围) 字节串最小的一种
+    同构的输入 (如 AsKs vs QhQd 与 AhKh vs QsQc) 得到同一个键
+    """
+    best = None
+    w1 = w1.astype(np.float32)
+    w2 = w2.astype(np.float32)
+    for p in range(len(SUIT_PERM_CARDS)):
+        mapped_board = np.sort(SUIT_PERM_CARDS[p, list(board)]).astype(np.uint8).tobytes() if board else b""
+        r1 = np.empty_like(w1)
+        r2 = np.empty_like(w2)
+        r1[COMBO_PERM[p]] = w1
+        r2[COMBO_PERM[p]] = w2
+        key = mapped_board + b"|" + r1.tobytes() + r2.tobytes()
+        if best is None or key < best:
+            best = key
+    return hashlib.sha1(best).digest()
+
+
+# ==================== 精确枚举 ====================
+
+def _exact(w1: np.ndarray, w2: np.ndarray, board: Tuple[int, ...]) -> EquityResult:
+    """枚举全部剩余发牌，逐 (组合对, 发牌) 比较"""
+    k = 5 - len(board)
+    deck = [c for c in range(NUM_CARDS) if c not in board]
+    runouts = list(combinations(deck, k))
+    runouts = np.array(runouts, dtype=np.int64).reshape(len(runouts), k)
+    boards = np.concatenate([np.broadcast_to(np.array(board, dtype=np.int64), (len(runouts), len(board))),
+                             runouts], axis=1)
+
+    s1, s2 = np.flatnonzero(w1), np.flatnonzero(w2)
+    union = np.union1d(s1, s2)
+    cards = COMBO_CARDS[union].astype(np.int64)
+    hands = np.concatenate([
+        np.broadcast_to(cards[:, None], (len(union), len(runouts), 2)),
+        np.broadcast_to(boards[None], (len(union), len(runouts), 5)),
+    ], axis=2)
+    # 只评估手牌与发牌不冲突的组合
+    live = ~(cards[:, None, :, None] == runouts[None, :, None, :]).any(axis=(2, 3))
+    scores = np.full(live.shape, -1, dtype=np.int32)
+    scores[live] = evaluate_batch(hands[live])
+
+    i1, i2 = np.searchsorted(union, s1), np.searchsorted(union, s2)
+    pair_weights = w1[s1][:, None] * w2[s2][None, :] * ~COMBO_CONFLICT[np.ix_(s1, s2)]
+    total = pair_weights.sum()
+    if total <= 0:
+        raise EquityError("Ranges have no compatible combos")
+
+    wins = np.zeros_like(pair_weights)
+    ties = np.zeros_like(pair_weights)
+    chunk = max(1, EXACT_PAIR_CHUNK // (len(s1) * len(s2)))
+    for start in range(0, len(runouts), chunk):
+        r = slice(start, start + chunk)
+        sc1, sc2 = scores[i1, r][:, None], scores[i2, r][None]
+        both = live[i1, r][:, None] & live[i2, r][None]
+        wins += ((sc1 > sc2) & both).sum(axis=2)
+        ties += ((sc1 == sc2) & both).sum(axis=2)
+
+    # 不冲突的组合对可用的发牌数都相同
+    runouts_per_pair = comb(NUM_CARDS - len(board) - 4, k)
+    win = float((pair_weights * wins).sum() / total / runouts_per_pair)
+    tie = float((pair_weights * ties).sum() / total / runouts_per_pair)
+    pairs = int((pair_weights > 0).sum())
+    return EquityResult(win + tie / 2, win, tie, pairs * runouts_per_pair, True)
+
+
+def _exact_cost(w1: np.ndarray, w2: np.ndarray, board: Tuple[int, ...]) -> int:
+    """精确枚举需要评估的手数"""
+    support = np.count_nonzero((w1 > 0) | (w2 > 0))
+    return support * comb(NUM_CARDS - len(board), 5 - len(board))
+
+
+# ==================== 蒙特卡洛 ====================
+
+def _monte_carlo_chunk(seed: np.random.SeedSequence, w1: np.ndarray, w2: np.ndarray,
+                       board: Tuple[int, ...], trials: int) -> Tuple[int, int, float, float]:
+    """
+    模拟 trials 次，返回 (次数, 胜, 平, 得分平方和)
+    两个组合共用牌的抽样直接丢弃 (拒绝采样)，保证组合对服从条件分布
+    """
+    rng = np.random.default_rng(seed)
+    p1, p2 = w1 / w1.sum(), w2 / w2.sum()
+    k = 5 - len(board)
+
+    first, second = [], []
+    kept = 0
+    for _ in range(MAX_REJECTION_ROUNDS):
+        a = rng.choice(NUM_COMBOS, size=trials - kept, p=p1)
+        b = rng.choice(NUM_COMBOS, size=trials - kept, p=p2)
+        ok = ~COMBO_CONFLICT[a, b]
+        first.append(a[ok])
+        second.append(b[ok])
+        kept += int(ok.sum())
+        if kept >= trials:
+            break
+    if kept == 0:
+        raise EquityError("Ranges have no compatible combos")
+    a, b = np.concatenate(first), np.concatenate(second)
+
+    n = len(a)
+    hand_a = COMBO_CARDS[a].astype(np.int64)
+    hand_b = COMBO_CARDS[b].astype(np.int64)
+    keys = rng.random((n, NUM_CARDS))
+    rows = np.arange(n)[:, None]
+    keys[rows, hand_a] = 2.0
+    keys[rows, hand_b] = 2.0
+    if board:
+        keys[:, list(board)] = 2.0
+    runout = np.argpartition(keys, k, axis=1)[:, :k] if k else np.empty((n, 0), dtype=np.int64)
+    full_board = np.concatenate([np.broadcast_to(np.array(board, dtype=np.int64), (n, len(board))), runout], axis=1)
+
+    score_a = evaluate_batch(np.concatenate([hand_a, full_board], axis=1))
+    score_b = evaluate_batch(np.concatenate([hand_b, full_board], axis=1))
+    win = int((score_a > score_b).sum())
+    tie = int((score_a == score_b).sum())
+    return n, win, tie, win + tie * 0.25
+
+
+def _monte_carlo(w1: np.ndarray, w2: np.ndarray, board: Tuple[int, ...], samples: int,
+                 seed: int, workers: int) -> EquityResult:
+    chunks = [MC_CHUNK] * (samples // MC_CHUNK)
+    if samples % MC_CHUNK:
+        chunks.append(samples % MC_CHUNK)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(s, w1, w2, board, t) for s, t in zip(seeds, chunks)]
+
+    if workers > 1 and samples >= PARALLEL_MIN_SAMPLES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_monte_carlo_chunk, *zip(*args)))
+    else:
+        parts = [_monte_carlo_chunk(*a) for a in args]
+
+    n, win, tie, square = (sum(x) for x in zip(*parts))
+    equity = (win + tie / 2) / n
+    variance = max(square / n - equity * equity, 0.0)
+    return EquityResult(equity, win / n, tie / n, n, False, float(np.sqrt(variance / n)))
+
+
+# ==================== 入口 ====================
+
+def range_vs_range(range1: np.ndarray, range2: np.ndarray, board: Sequence[int] = (),
+                   samples: int = DEFAULT_SAMPLES, exact: Optional[bool] = None,
+                   seed: Optional[int] = None, workers: int = 1, use_cache: bool = True) -> EquityResult:
+    """
+    范围对范围胜率 (第一方视角)
+    exact: None 时按计算量自动选择精确枚举或蒙特卡洛
+    """
+    board = tuple(sorted(int(c) for c in board))
+    if len(board) not in (0, 3, 4, 5) or len(set(board)) != len(board):
+        raise EquityError(f"Invalid board: {board}")
+
+    w1 = _remove_blocked(range1, board)
+    w2 = _remove_blocked(range2, board)
+    if w1.sum() <= 0 or w2.sum() <= 0:
+        raise EquityError("Empty range")
+
+    if exact is None:
+        exact = _exact_cost(w1, w2, board) <= EXACT_EVAL_LIMIT
+
+    keys = []
+    if use_cache:
+        # 先按原始输入查找 (省去 24 种置换)，未命中再按规范化输入查找
+        suffix = b"exact" if exact else f"{samples}:{seed}".encode()
+        for make_key in (_raw_key, _canonical_key):
+            digest = make_key(w1, w2, board)
+            keys.append(digest + suffix)
+            cached = _equity_cache.get(keys[-1])
+            if cached is not None:
+                _equity_cache.put(keys[0], cached)
+                return cached
+        if seed is None:
+            seed = int.from_bytes(digest[:8], "little")
+
+    if exact:
+        result = _exact(w1, w2, board)
+    else:
+        result = _monte_carlo(w1, w2, board, samples, seed if seed is not None else 0, workers)
+
+    for key in keys:
+        _equity_cache.put(key, result)
+    return result
+
+
+def hand_vs_range(hand: Sequence[int], villain_range: np.ndarray, board: Sequence[int] = (),
+                  **kwargs) -> EquityResult:
+    """手牌对范围胜率"""
+    _check_dead_cards(hand, board)
+    return range_vs_range(hand_range(hand), villain_range, board, **kwargs)
+
+
+def hand_vs_hand(hand1: Sequence[int], hand2: Sequence[int], board: Sequence[int] = (),
+                 **kwargs) -> EquityResult:
+    """手牌对手牌胜率"""
+    _check_dead_cards(list(hand1) + list(hand2), board)
+    return range_vs_range(hand_range(hand1), hand_range(hand2), board, **kwargs)
+
+
+def _check_dead_cards(hands: Sequence[int], board: Sequence[int]) -> None:
+    cards = list(hands) + list(board)
+    if len(set(cards)) != len(cards):
+        raise EquityError("Duplicate cards")
+
+
+def clear_equity_cache() -> None:
+    _equity_cache.clear()
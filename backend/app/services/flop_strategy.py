@@ -5,6 +5,12 @@ V1.1 新增 - 简化版策略，基于规则的 GTO 近似
 from typing import Dict, List, Optional, Tuple
 import random
 
+import numpy as np
+
+from app.services.cards import CARD_RANK, CARD_SUIT, parse_cards
+from app.services.sampling import alias_draw, alias_sample, build_alias_tables
+from app.services.strategy_store import get_strategy_store, FLOP_TABLE_NAME
+
 
 class FlopStrategyEngine:
     """
@@ -31,8 +37,20 @@ class FlopStrategyEngine:
     # 手牌桶
     HAND_BUCKETS = ["made_strong", "made_medium", "made_weak", "draw_strong", "draw_weak", "air"]
     
-    def __init__(self, rng: Optional[random.Random] = None):
+    # 编译后策略表的行动轴 (按角色)
+    PFR_ACTIONS = ["check", "bet33", "bet75", "bet125"]
+    DEFENDER_ACTIONS = ["fold", "call", "raise75", "raise125"]
+    
+    # 策略表维度: (角色, IP/OOP, SPR, 牌面纹理, 手牌桶, 行动)
+    ROLES = ["PFR", "DEF"]
+    IP_OOP = ["IP", "OOP"]
+    SUITEDNESS = [None, "monotone", "two_tone"]
+    TEXTURE_COUNT = 2 * len(SUITEDNESS) * 2  # paired × 花色 × wet/dry
+    
+    def __init__(self, rng: Optional[random.Random] = None, use_table: bool = True):
         self.rng = rng or random.Random()
+        self.table = get_flop_table() if use_table else None
+        self.alias_accept, self.alias_index = get_flop_alias_tables() if use_table else (None, None)
     
     def get_context_id(self, pot_type: str, hero_position: str, 
                        villain_position: str, is_pfr: bool) -> str:
@@ -65,10 +83,14 @@ class FlopStrategyEngine:
         分析牌面纹理
         返回标签列表
         """
+        return self.analyze_board_texture_ids(parse_cards(board))
+    
+    def analyze_board_texture_ids(self, cards: List[int]) -> List[str]:
+        """analyze_board_texture 的整数牌版本"""
         textures = []
         
-        ranks = [c[0] for c in board]
-        suits = [c[1] for c in board]
+        ranks = [CARD_RANK[c] for c in cards]
+        suits = [CARD_SUIT[c] for c in cards]
         
         # 检查对子
         rank_counts = {}
@@ -84,9 +106,7 @@ class FlopStrategyEngine:
             textures.append("two_tone")
         
         # 检查湿润度 (简化版)
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8,
-                       '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        values = sorted([rank_values[r] for r in ranks], reverse=True)
+        values = sorted(ranks, reverse=True)
         
         # 连张判断
         gaps = [values[i] - values[i+1] for i in range(len(values)-1)]
@@ -104,6 +124,18 @@ class FlopStrategyEngine:
         获取策略分布
         返回: {action: probability}
         """
+        if self.table is not None:
+            index = self._table_index(hand_bucket, spr_bucket, board_texture, is_pfr, ip_oop)
+            if index is not None:
+                actions = self.PFR_ACTIONS if is_pfr else self.DEFENDER_ACTIONS
+                row = self.table[index]
+                return {a: round(float(row[i]), 2) for i, a in enumerate(actions)}
+        
+        return self._rule_strategy(hand_bucket, spr_bucket, board_texture, is_pfr, ip_oop)
+    
+    def _rule_strategy(self, hand_bucket: str, spr_bucket: str, board_texture: List[str],
+                       is_pfr: bool, ip_oop: str) -> Dict[str, float]:
+        """按规则计算策略分布"""
         # 基于规则的策略矩阵
         # 这不是 solver，是基于经验的简化策略
         
@@ -114,6 +146,76 @@ class FlopStrategyEngine:
             # Defender (翻前防守方) - vs C-bet 决策
             return self._defender_strategy(hand_bucket, spr_bucket, board_texture, ip_oop)
     
+    @classmethod
+    def _texture_index(cls, board_texture: List[str]) -> int:
+        """牌面纹理标签 -> 策略表纹理下标"""
+        paired = 1 if "paired" in board_texture else 0
+        if "monotone" in board_texture:
+            suitedness = 1
+        elif "two_tone" in board_texture:
+            suitedness = 2
+        else:
+            suitedness = 0
+        wet = 1 if "wet" in board_texture else 0
+        return (paired * len(cls.SUITEDNESS) + suitedness) * 2 + wet
+    
+    @classmethod
+    def _texture_labels(cls, texture_idx: int) -> List[str]:
+        """策略表纹理下标 -> 牌面纹理标签"""
+        rest, wet = divmod(texture_idx, 2)
+        paired, suitedness = divmod(rest, len(cls.SUITEDNESS))
+        labels = ["paired"] if paired else []
+        if cls.SUITEDNESS[suitedness]:
+            labels.append(cls.SUITEDNESS[suitedness])
+        labels.append("wet" if wet else "dry")
+        return labels
+    
+    def _table_index(self, hand_bucket: str, spr_bucket: str, board_texture: List[str],
+                     is_pfr: bool, ip_oop: str) -> Optional[Tuple[int, int, int, int, int]]:
+        """策略表下标，无法识别的输入返回 None"""
+        if (hand_bucket not in self.HAND_BUCKETS or spr_bucket not in self.SPR_BUCKETS
+                or ip_oop not in self.IP_OOP):
+            return None
+        return (
+            0 if is_pfr else 1,
+            self.IP_OOP.index(ip_oop),
+            list(self.SPR_BUCKETS).index(spr_bucket),
+            self._texture_index(board_texture),
+            self.HAND_BUCKETS.index(hand_bucket),
+        )
+    
+    def compile_table(self) -> np.ndarray:
+        """按规则枚举所有输入，编译为 (角色, IP/OOP, SPR, 纹理, 手牌桶, 行动) 频率表"""
+        table = np.zeros(
+            (len(self.ROLES), len(self.IP_OOP), len(self.SPR_BUCKETS),
+             self.TEXTURE_COUNT, len(self.HAND_BUCKETS), len(self.PFR_ACTIONS)),
+            dtype=np.float32,
+        )
+        for role_idx in range(len(self.ROLES)):
+            is_pfr = role_idx == 0
+            actions = self.PFR_ACTIONS if is_pfr else self.DEFENDER_ACTIONS
+            for ip_idx, ip_oop in enumerate(self.IP_OOP):
+                for spr_idx, spr_bucket in enumerate(self.SPR_BUCKETS):
+                    for tex_idx in range(self.TEXTURE_COUNT):
+                        texture = self._texture_labels(tex_idx)
+                        for bucket_idx, bucket in enumerate(self.HAND_BUCKETS):
+                            strategy = self._rule_strategy(bucket, spr_bucket, texture, is_pfr, ip_oop)
+                            table[role_idx, ip_idx, spr_idx, tex_idx, bucket_idx] = [
+                                strategy[a] for a in actions
+                            ]
+        return table
+    
+    def table_meta(self) -> Dict:
+        """策略表各维度的标签"""
+        return {
+            "roles": self.ROLES,
+            "ip_oop": self.IP_OOP,
+            "spr_buckets": list(self.SPR_BUCKETS),
+            "texture_count": self.TEXTURE_COUNT,
+            "hand_buckets": self.HAND_BUCKETS,
+            "actions": {"PFR": self.PFR_ACTIONS, "DEF": self.DEFENDER_ACTIONS},
+        }
+    
     def _pfr_strategy(self, hand_bucket: str, spr_bucket: str, 
                       board_texture: List[str], ip_oop: str) -> Dict[str, float]:
         """翻前进攻方策略 (C-bet)"""
@@ -262,6 +364,27 @@ class FlopStrategyEngine:
         weights = list(strategy.values())
         return self.rng.choices(actions, weights=weights, k=1)[0]
     
+    def sample_table_action(self, hand_bucket: str, spr_bucket: str, board_texture: List[str],
+                            is_pfr: bool, ip_oop: str) -> Optional[str]:
+        """直接从策略表的别名表采样 (单次 O(1))，输入无法识别时返回 None"""
+        if self.table is None:
+            return None
+        index = self._table_index(hand_bucket, spr_bucket, board_texture, is_pfr, ip_oop)
+        if index is None:
+            return None
+        actions = self.PFR_ACTIONS if is_pfr else self.DEFENDER_ACTIONS
+        return actions[alias_draw(self.alias_accept[index], self.alias_index[index], self.rng.random())]
+    
+    def sample_actions(self, indices: Tuple[np.ndarray, ...], rng: np.random.Generator) -> np.ndarray:
+        """
+        向量化批量采样
+        indices: 策略表前 5 维 (角色, IP/OOP, SPR, 纹理, 手牌桶) 的下标数组 (可相互广播)
+        返回行动下标数组 (角色 0 对应 PFR_ACTIONS，角色 1 对应 DEFENDER_ACTIONS)
+        """
+        cells = tuple(a.ravel() for a in np.broadcast_arrays(*indices))
+        shape = np.broadcast_shapes(*(np.shape(a) for a in indices))
+        return alias_sample(self.alias_accept[cells], self.alias_index[cells], rng).reshape(shape)
+    
     def calculate_grade(self, user_action: str, strategy: Dict[str, float]) -> Tuple[str, float]:
         """
         计算用户动作的评级
@@ -303,3 +426,36 @@ class FlopStrategyEngine:
                 explanations.append("单色牌面需谨慎，听牌未完成时收紧范围。")
         
         return " ".join(explanations) if explanations else "根据 GTO 策略执行。"
+
+
+# 编译后的翻牌策略表 (进程内共享)
+_flop_table: Optional[np.ndarray] = None
+
+
+def get_flop_table() -> np.ndarray:
+    """获取翻牌策略表：优先使用预编译策略库，缺失时在进程内编译"""
+    global _flop_table
+    if _flop_table is None:
+        engine = FlopStrategyEngine(use_table=False)
+        store = get_strategy_store()
+        table = store.get(FLOP_TABLE_NAME) if store else None
+        expected_shape = (
+            len(engine.ROLES), len(engine.IP_OOP), len(engine.SPR_BUCKETS),
+            engine.TEXTURE_COUNT, len(engine.HAND_BUCKETS), len(engine.PFR_ACTIONS),
+        )
+        if table is None or table.shape != expected_shape or store.meta(FLOP_TABLE_NAME) != engine.table_meta():
+            table = engine.compile_table()
+        _flop_table = table
+    return _flop_table
+
+
+# 翻牌策略表对应的别名表
+_flop_alias: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+def get_flop_alias_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """获取翻牌策略表的别名表 (与策略表一起在进程内构建一次)"""
+    global _flop_alias
+    if _flop_alias is None:
+        _flop_alias = build_alias_tables(get_flop_table())
+    return _flop_alias
\ No newline at end of file
@@ -4,20 +4,22 @@ V1.1 核心模块
 """
 import random
 import hashlib
+import json
 import math
-from typing import List, Dict, Optional, Tuple, Any
+import struct
+from typing import List, Dict, Optional, Tuple, Any, Union
 from enum import Enum
 from dataclasses import dataclass, field
 from datetime import datetime
 
-# 导入 treys 进行牌力评估
-try:
-    from treys import Card, Evaluator
-    HAS_TREYS = True
-except ImportError:
-    HAS_TREYS = False
-    Card = None
-    Evaluator = None
+from app.services.cards import (
+    SUITS, RANKS, RANK_VALUES, CARD_IDS, CARD_RANK, CARD_SUIT, CARD_STRS, HAND_CLASSES,
+    parse_cards, format_cards, hand_class, hand_class_name,
+)
+
+from app.services.counter_deck import COUNTER_SEED_PREFIX, CounterDeck, is_counter_seed
+from app.services.hand_buckets import HAND_BUCKETS, flop_bucket_index
+from app.services.hand_evaluator import evaluate_showdown
 
 
 class Street(Enum):
@@ -40,6 +42,13 @@ class ActionType(Enum):
     ANTE = "ante"
 
 
+# 动作的整数编码 (ActionType 的定义顺序)，供无界面模拟和快照使用
+ACTION_NAMES = [a.value for a in ActionType]
+ACTION_CODES = {name: code for code, name in enumerate(ACTION_NAMES)}
+ACT_FOLD, ACT_CHECK, ACT_CALL, ACT_BET, ACT_RAISE, ACT_ALLIN, ACT_SB, ACT_BB = range(8)
+_SIZED_ACTIONS = (ACT_BET, ACT_RAISE, ACT_ALLIN)
+
+
 class GameStatus(Enum):
     INIT = "INIT"
     PREFLOP = "PREFLOP"
@@ -48,7 +57,7 @@ class GameStatus(Enum):
     ENDED = "ENDED"
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     seat: int
     position: str  # UTG, MP, CO, BTN, SB, BB
@@ -59,6 +68,14 @@ class Player:
     hole_cards: Optional[List[str]] = None
     is_hero: bool = False
     is_active: bool = True  # 本轮还能行动（未弃牌且未allin）
+    hole_ids: Optional[List[int]] = None  # 手牌的整数 id (引擎内部使用)，hole_cards 为对外的字符串形式
+    
+    def copy(self) -> "Player":
+        """浅复制 (手牌列表发完牌后不再修改，可以共享)"""
+        return Player(
+            self.seat, self.position, self.stack, self.in_hand, self.committed_this_street,
+            self.total_committed, self.hole_cards, self.is_hero, self.is_active, self.hole_ids,
+        )
     
     def to_dict(self) -> Dict:
         return {
@@ -136,26 +153,64 @@ class KeySpot:
 
 
 class PokerDeck:
-    """扑克牌组"""
-    SUITS = ['s', 'h', 'd', 'c']  # 黑桃、红桃、方块、梅花
-    RANKS = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
+    """
+    扑克牌组
+    内部为整数牌 id，发牌只移动游标；字符串仅在对外接口处生成
+    """
+    SUITS = SUITS  # 黑桃、红桃、方块、梅花
+    RANKS = RANKS
+    
+    # 与原先字符串牌组相同的初始顺序，保证同一种子洗出的牌序不变
+    INITIAL_ORDER = tuple(CARD_IDS[r + s] for s in SUITS for r in RANKS)
     
     def __init__(self, seed: Optional[str] = None):
-        self.cards = [r + s for s in self.SUITS for r in self.RANKS]
+        self.cards = list(self.INITIAL_ORDER)
         self.rng = random.Random(seed)
         self.rng.shuffle(self.cards)
+        self._cursor = 0
+    
+    @classmethod
+    def from_state(cls, cards: List[int], cursor: int) -> "PokerDeck":
+        """由已洗好的牌序和游标直接恢复 (不再洗牌)"""
+        deck = cls.__new__(cls)
+        deck.cards = list(cards)
+        deck.rng = None
+        deck._cursor = cursor
+        return deck
+    
+    def fork(self) -> "PokerDeck":
+        """复制发牌游标，牌序洗好后不再修改，直接共享"""
+        deck = PokerDeck.__new__(PokerDeck)
+        deck.cards = self.cards
+        deck.rng = None
+        deck._cursor = self._cursor
+        return deck
+    
+    @property
+    def remaining(self) -> int:
+        return len(self.cards) - self._cursor
+    
+    def card(self, position: int) -> int:
+        return self.cards[position]
+    
+    def deal_ids(self, n: int = 1) -> List[int]:
+        start = self._cursor
+        self._cursor += n
+        return self.cards[start:self._cursor]
     
     def deal(self, n: int = 1) -> List[str]:
-        dealt = self.cards[:n]
-        self.cards = self.cards[n:]
-        return dealt
+        return format_cards(self.deal_ids(n))
+
+
+def make_deck(seed: str):
+    """按 seed 格式选择牌组: 计数器 seed 用 CounterDeck，旧 seed 用 random.Random 洗牌的 PokerDeck"""
+    return CounterDeck(seed) if is_counter_seed(seed) else PokerDeck(seed)
 
 
 class HandEvaluator:
     """手牌评估器"""
     
-    RANK_VALUES = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                   '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
+    RANK_VALUES = RANK_VALUES
     
     @classmethod
     def evaluate_hand_bucket(cls, hand: List[str], board: List[str]) -> str:
@@ -163,10 +218,24 @@ class HandEvaluator:
         评估手牌 bucket，用于策略决策
         返回: made_strong, made_medium, made_weak, draw_strong, draw_weak, air
         """
+        return cls.evaluate_bucket_ids(parse_cards(hand), parse_cards(board))
+    
+    @classmethod
+    def evaluate_bucket_ids(cls, hand: List[int], board: List[int]) -> str:
+        """evaluate_hand_bucket 的整数牌版本 (翻牌直接查预计算的手牌桶表)"""
+        if len(board) == 3:
+            return HAND_BUCKETS[flop_bucket_index(hand, board)]
+        return cls._evaluate_bucket_rules(hand, board)
+    
+    @classmethod
+    def _evaluate_bucket_rules(cls, hand: List[int], board: List[int]) -> str:
+        """按规则逐项判定手牌 bucket (手牌桶表也由这套规则生成)"""
         all_cards = hand + board
+        ranks = [CARD_RANK[c] for c in all_cards]
+        suits = [CARD_SUIT[c] for c in all_cards]
         
         # 检查成牌
-        made_rank = cls._get_made_hand_rank(hand, board)
+        made_rank = cls._get_made_hand_rank(ranks, suits)
         
         # 强成牌：两对及以上
         if made_rank >= 3:  # 两对、三条、顺子、同花、葫芦、四条、同花顺
@@ -174,13 +243,13 @@ class HandEvaluator:
         
         # 中等成牌：一对顶对或强踢脚
         if made_rank == 2:  # 一对
-            pair_rank = cls._get_pair_rank(hand, board)
+            pair_rank = cls._get_pair_rank(ranks)
             if pair_rank >= 12:  # Q 及以上
                 return "made_medium"
         
         # 检查听牌
-        flush_draw = cls._has_flush_draw(hand, board)
-        straight_draw = cls._has_straight_draw(hand, board)
+        flush_draw = cls._has_flush_draw(suits)
+        straight_draw = cls._has_straight_draw(ranks)
         
         if flush_draw and straight_draw:
             return "draw_strong"
@@ -193,17 +262,16 @@ class HandEvaluator:
         if made_rank == 2:
             return "made_weak"
         if made_rank == 1:  # 高牌
-            high_card = max(cls.RANK_VALUES[h[0]] for h in hand)
+            high_card = max(CARD_RANK[c] for c in hand)
             if high_card >= 13:  # K 或 A 高
                 return "made_weak"
         
         return "air"
     
     @classmethod
-    def _get_made_hand_rank(cls, hand: List[str], board: List[str]) -> int:
+    def _get_made_hand_rank(cls, ranks: List[int], suits: List[int]) -> int:
         """获取成牌等级 (1=高牌, 2=一对, 3=两对... 9=同花顺)"""
         # 简化版：返回近似等级
-        ranks = [cls.RANK_VALUES[c[0]] for c in hand + board]
         rank_counts = {}
         for r in ranks:
             rank_counts[r] = rank_counts.get(r, 0) + 1
@@ -216,9 +284,9 @@ class HandEvaluator:
             return 8
         if trips and pairs:
             return 7  # 葫芦
-        if cls._has_flush(hand, board):
+        if cls._has_flush(suits):
             return 6
-        if cls._has_straight(hand, board):
+        if cls._has_straight(ranks):
             return 5
         if trips:
             return 4
@@ -229,16 +297,15 @@ class HandEvaluator:
         return 1
     
     @classmethod
-    def _has_flush(cls, hand: List[str], board: List[str]) -> bool:
-        suits = [c[1] for c in hand + board]
+    def _has_flush(cls, suits: List[int]) -> bool:
         for suit in set(suits):
             if suits.count(suit) >= 5:
                 return True
         return False
     
     @classmethod
-    def _has_straight(cls, hand: List[str], board: List[str]) -> bool:
-        ranks = sorted(set([cls.RANK_VALUES[c[0]] for c in hand + board]), reverse=True)
+    def _has_straight(cls, ranks: List[int]) -> bool:
+        ranks = sorted(set(ranks), reverse=True)
         if len(ranks) < 5:
             return False
         for i in range(len(ranks) - 4):
@@ -250,17 +317,16 @@ class HandEvaluator:
         return False
     
     @classmethod
-    def _has_flush_draw(cls, hand: List[str], board: List[str]) -> bool:
-        suits = [c[1] for c in hand + board]
+    def _has_flush_draw(cls, suits: List[int]) -> bool:
         for suit in set(suits):
             if suits.count(suit) == 4:
                 return True
         return False
     
     @classmethod
-    def _has_straight_draw(cls, hand: List[str], board: List[str]) -> Optional[str]:
+    def _has_straight_draw(cls, ranks: List[int]) -> Optional[str]:
         """返回: open, gutshot, None"""
-        ranks = sorted(set([cls.RANK_VALUES[c[0]] for c in hand + board]), reverse=True)
+        ranks = sorted(set(ranks), reverse=True)
         if len(ranks) < 4:
             return None
         
@@ -279,11 +345,10 @@ class HandEvaluator:
         return None
     
     @classmethod
-    def _get_pair_rank(cls, hand: List[str], board: List[str]) -> int:
+    def _get_pair_rank(cls, ranks: List[int]) -> int:
         """获取对子的牌力等级"""
-        all_ranks = [cls.RANK_VALUES[c[0]] for c in hand + board]
         rank_counts = {}
-        for r in all_ranks:
+        for r in ranks:
             rank_counts[r] = rank_counts.get(r, 0) + 1
         
         pairs = [r for r, c in rank_counts.items() if c >= 2]
@@ -294,22 +359,106 @@ class HandEvaluator:
         """将两张手牌格式化为标准形式 (e.g., 'AKs', '72o', 'TT')"""
         if len(cards) != 2:
             return ""
-        
-        r1, r2 = cards[0][0], cards[1][0]
-        s1, s2 = cards[0][1], cards[1][1]
-        
-        # 对子
-        if r1 == r2:
-            return r1 + r2
-        
-        # 按大小排序
-        ranks = sorted([r1, r2], key=lambda x: cls.RANK_VALUES[x], reverse=True)
-        
-        # 同花
-        if s1 == s2:
-            return ranks[0] + ranks[1] + 's'
-        else:
-            return ranks[0] + ranks[1] + 'o'
+        return hand_class_name(cards)
+    
+    @staticmethod
+    def format_hand_ids(cards: List[int]) -> str:
+        """format_hand 的整数牌版本"""
+        if len(cards) != 2:
+            return ""
+        return HAND_CLASSES[hand_class(cards[0], cards[1])]
+
+
+# ==================== 引擎快照 ====================
+# 二进制快照: 头部 (魔数 + 版本) 后依次为标量状态、seed、ended_by、牌序 (计数器牌组不写) 与游标、公共牌、玩家、
+# 行动记录 (定长记录 + 换行分隔的时间戳)、关键点 (JSON)
+# 版本不一致的快照一律拒绝，由调用方回退到按 seed 重放
+
+SNAPSHOT_MAGIC = b"FHE"
+SNAPSHOT_VERSION = 2
+
+
+class SnapshotError(ValueError):
+    """快照损坏或版本不匹配"""
+
+
+_SNAP_HEADER = struct.Struct("<3sB")
+# stack_bb, status, street, button/sb/bb, hero_seat, to_act_seat, street_actions,
+# pot, current_bet, last_raise_size, result_bb
+_SNAP_CORE = struct.Struct("<HBBBBBBBHdddd")
+# seat, position, flags, 手牌 x2, stack, committed_this_street, total_committed
+_SNAP_PLAYER = struct.Struct("<BBBBBddd")
+# street, seat, position, action, amount, pot_after
+_SNAP_ACTION = struct.Struct("<BBBBdd")
+_SNAP_LEN = struct.Struct("<H")
+_SNAP_JSON_LEN = struct.Struct("<I")
+
+_NO_SEAT = 255
+_NO_CARD = 255
+_NO_STR = 0xFFFF
+_FLAG_IN_HAND, _FLAG_HERO, _FLAG_ACTIVE = 1, 2, 4
+
+_SNAP_STATUSES = list(GameStatus)
+_SNAP_STREETS = list(Street)
+_SNAP_STREET_VALUES = [s.value for s in _SNAP_STREETS]
+_SNAP_POSITIONS = ["UTG", "MP", "CO", "BTN", "SB", "BB"]
+_STATUS_CODES = {s: i for i, s in enumerate(_SNAP_STATUSES)}
+_STREET_CODES = {s: i for i, s in enumerate(_SNAP_STREETS)}
+_STREET_VALUE_CODES = {s: i for i, s in enumerate(_SNAP_STREET_VALUES)}
+_POSITION_CODES = {p: i for i, p in enumerate(_SNAP_POSITIONS)}
+
+
+def _pack_optional(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def _unpack_optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    if value is None:
+        return _SNAP_LEN.pack(_NO_STR)
+    raw = value.encode()
+    return _SNAP_LEN.pack(len(raw)) + raw
+
+
+def _pack_json(value: Optional[Dict]) -> bytes:
+    if value is None:
+        return _SNAP_JSON_LEN.pack(0)
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+    return _SNAP_JSON_LEN.pack(len(raw)) + raw
+
+
+class _SnapshotReader:
+    """按顺序读取快照字段"""
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt: struct.Struct) -> Tuple:
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def take(self, n: int) -> bytes:
+        if self.offset + n > len(self.data):
+            raise SnapshotError("Truncated snapshot")
+        raw = bytes(self.data[self.offset:self.offset + n])
+        self.offset += n
+        return raw
+
+    def byte(self) -> int:
+        return self.take(1)[0]
+
+    def string(self) -> Optional[str]:
+        n, = self.unpack(_SNAP_LEN)
+        return None if n == _NO_STR else self.take(n).decode()
+
+    def json(self) -> Optional[Dict]:
+        n, = self.unpack(_SNAP_JSON_LEN)
+        return json.loads(self.take(n)) if n else None
 
 
 class FullHandEngine:
@@ -321,7 +470,10 @@ class FullHandEngine:
         self.stack_bb = stack_bb
         self.seed = seed or self._generate_seed()
         self.rng = random.Random(self.seed)
-        
+        self._reset_hand_state()
+    
+    def _reset_hand_state(self) -> None:
+        """重置一手牌的全部状态"""
         # 游戏状态
         self.status = GameStatus.INIT
         self.street = Street.PREFLOP
@@ -331,7 +483,8 @@ class FullHandEngine:
         self.bb_seat = 2
         self.pot = 0.0
         self.current_bet = 0.0
-        self.community_cards: List[str] = []
+        self.board: List[int] = []  # 公共牌整数 id (引擎内部使用)
+        self.community_cards: List[str] = []  # 公共牌字符串 (对外)
         self.action_log: List[Action] = []
         
         # Hero
@@ -346,14 +499,27 @@ class FullHandEngine:
         self.ended_by: Optional[str] = None
         
         # 内部状态
-        self._deck: Optional[PokerDeck] = None
+        self._deck: Optional[Union[PokerDeck, CounterDeck]] = None
         self._to_act_seat: Optional[int] = None
         self._last_raise_size: float = 1.0
         self._street_actions: int = 0  # 当前街行动次数
+        
+        # 增量维护的座位位图 (bit i 对应座位 i)，街结束判断不再扫描玩家列表和行动记录
+        self._in_hand_mask: int = 0  # 未弃牌
+        self._active_mask: int = 0  # 未弃牌且未 all-in
+        self._matched_mask: int = 0  # 本街投入等于 current_bet
+        
+        # 本街进攻方信息
+        self._last_aggressor: Optional[int] = None  # 最后一次下注/加注的座位
+        self._street_raises: int = 0  # 下注/加注次数 (不含盲注)
+        self._preflop_aggressor: Optional[int] = None  # 翻前最后一次加注的座位 (翻后判断进攻方)
+        
+        # 行动记录与 fork 出的分支共享，写入前先复制
+        self._log_shared: bool = False
     
     def _generate_seed(self) -> str:
-        """生成随机种子"""
-        return hashlib.sha256(str(random.getrandbits(256)).encode()).hexdigest()[:16]
+        """生成随机种子 (计数器牌组格式)"""
+        return COUNTER_SEED_PREFIX + hashlib.sha256(str(random.getrandbits(256)).encode()).hexdigest()[:16]
     
     def initialize_game(self) -> None:
         """初始化游戏 - 严格按照德州扑克规则"""
@@ -392,14 +558,16 @@ class FullHandEngine:
             ))
         
         # 发牌（从 SB 的下一位开始发）
-        self._deck = PokerDeck(self.seed)
+        self._deck = self._new_deck()
         deal_start = (self.sb_seat + 1) % 6
         for i in range(6):
             seat = (deal_start + i) % 6
-            self.players[seat].hole_cards = self._deck.deal(1)
+            self.players[seat].hole_ids = self._deck.deal_ids(1)
         for i in range(6):
             seat = (deal_start + i) % 6
-            self.players[seat].hole_cards.extend(self._deck.deal(1))
+            self.players[seat].hole_ids.extend(self._deck.deal_ids(1))
+        for p in self.players:
+            p.hole_cards = format_cards(p.hole_ids)
         
         # 放置盲注
         self._post_blinds()
@@ -410,6 +578,20 @@ class FullHandEngine:
         self._to_act_seat = (self.bb_seat + 1) % 6  # UTG（BB 的下一位）
         self._update_active_players()
     
+    def _new_deck(self) -> Union[PokerDeck, CounterDeck]:
+        """本手使用的牌组 (由 seed 决定)"""
+        return make_deck(self.seed)
+    
+    def verify_dealt_cards(self) -> bool:
+        """按发牌位置直接从牌组取牌，核对各家手牌和公共牌 (计数器牌组无需洗出整副牌)"""
+        deck = make_deck(self.seed)
+        deal_start = (self.sb_seat + 1) % 6
+        for p in self.players:
+            i = (p.seat - deal_start) % 6
+            if p.hole_ids != [deck.card(i), deck.card(6 + i)]:
+                return False
+        return self.board == [deck.card(12 + i) for i in range(len(self.board))]
+    
     def _post_blinds(self) -> None:
         """放置盲注"""
         sb_player = self.players[self.sb_seat]
@@ -433,30 +615,39 @@ class FullHandEngine:
         self._last_raise_size = 0.5
         
         # 记录行动
-        self.action_log.append(Action(
-            street="preflop",
-            seat=self.sb_seat,
-            position=self.players[self.sb_seat].position,
-            action="sb",
-            amount=sb_amount,
-            pot_after=self.pot,
-        ))
-        self.action_log.append(Action(
-            street="preflop",
-            seat=self.bb_seat,
-            position=self.players[self.bb_seat].position,
-            action="bb",
-            amount=bb_amount,
-            pot_after=self.pot,
-        ))
+        self._record_action(sb_player, ACT_SB, sb_amount)
+        self._record_action(bb_player, ACT_BB, bb_amount)
     
     def _update_active_players(self) -> None:
         """更新活跃玩家"""
         for p in self.players:
             p.is_active = p.in_hand and p.stack > 0
+        self._sync_seat_masks()
+    
+    def _sync_seat_masks(self) -> None:
+        """按玩家状态重建座位位图"""
+        self._in_hand_mask = self._active_mask = 0
+        for p in self.players:
+            bit = 1 << p.seat
+            if p.in_hand:
+                self._in_hand_mask |= bit
+            if p.is_active:
+                self._active_mask |= bit
+        self._sync_matched_mask()
+    
+    def _sync_matched_mask(self) -> None:
+        """current_bet 变化后重算 (每座位一次比较，与行动数无关)"""
+        self._matched_mask = 0
+        for p in self.players:
+            if p.committed_this_street == self.current_bet:
+                self._matched_mask |= 1 << p.seat
     
     def get_legal_actions(self, seat: Optional[int] = None) -> List[str]:
         """获取合法行动列表"""
+        return [ACTION_NAMES[code] for code in self.legal_action_codes(seat)]
+    
+    def legal_action_codes(self, seat: Optional[int] = None) -> List[int]:
+        """获取合法行动的整数编码"""
         if seat is None:
             seat = self._to_act_seat
         
@@ -472,30 +663,30 @@ class FullHandEngine:
         
         # Fold: 有下注时可以弃牌
         if to_call > 0:
-            actions.append("fold")
+            actions.append(ACT_FOLD)
         
         # Check: 不需要跟注时可以过牌
         if to_call == 0:
-            actions.append("check")
+            actions.append(ACT_CHECK)
         
         # Call: 需要跟注且筹码足够
         if to_call > 0 and player.stack >= to_call:
-            actions.append("call")
+            actions.append(ACT_CALL)
         
         # Bet: 没有下注时可以下注 (翻牌后)
         if to_call == 0 and self.street != Street.PREFLOP:
-            actions.append("bet")
+            actions.append(ACT_BET)
         
         # Raise: 有下注时可以加注
         if to_call > 0:
             # 最小加注
             min_raise = self.current_bet + self._last_raise_size
             if player.stack + player.committed_this_street >= min_raise:
-                actions.append("raise")
+                actions.append(ACT_RAISE)
         
         # All-in: 任何情况下都可以 all-in
         if player.stack > 0:
-            actions.append("allin")
+            actions.append(ACT_ALLIN)
         
         return actions
     
@@ -548,30 +739,45 @@ class FullHandEngine:
         if self._to_act_seat is None:
             raise ValueError("No player to act")
         
-        player = self.players[self._to_act_seat]
-        legal = self.get_legal_actions()
+        code = ACTION_CODES.get(action)
+        legal = self.legal_action_codes()
+        
+        if code not in legal:
+            raise ValueError(f"Illegal action: {action}. Legal: {[ACTION_NAMES[c] for c in legal]}")
         
-        if action not in legal:
-            raise ValueError(f"Illegal action: {action}. Legal: {legal}")
+        result = self._act(code, amount)
         
+        return {
+            "action_executed": True,
+            "street_advanced": result.get("advanced", False),
+            "game_ended": result.get("ended", False),
+        }
+    
+    def _act(self, code: int, amount: Optional[float] = None) -> Dict[str, Any]:
+        """执行一个已校验合法的行动，返回 _check_street_end 的结果"""
+        player = self.players[self._to_act_seat]
         to_call = self.current_bet - player.committed_this_street
+        current_bet = self.current_bet
+        bit = 1 << player.seat
         
         # 执行行动
-        if action == "fold":
+        if code == ACT_FOLD:
             player.in_hand = False
             player.is_active = False
+            self._in_hand_mask &= ~bit
+            self._active_mask &= ~bit
         
-        elif action == "check":
+        elif code == ACT_CHECK:
             pass  # 什么都不做
         
-        elif action == "call":
+        elif code == ACT_CALL:
             call_amount = min(to_call, player.stack)
             player.stack -= call_amount
             player.committed_this_street += call_amount
             player.total_committed += call_amount
             self.pot += call_amount
         
-        elif action == "bet":
+        elif code == ACT_BET:
             if amount is None:
                 raise ValueError("Bet requires amount")
             bet_amount = min(amount, player.stack)
@@ -581,8 +787,10 @@ class FullHandEngine:
             self.pot += bet_amount
             self.current_bet = player.committed_this_street
             self._last_raise_size = bet_amount
+            self._last_aggressor = player.seat
+            self._street_raises += 1
         
-        elif action == "raise":
+        elif code == ACT_RAISE:
             if amount is None:
                 raise ValueError("Raise requires amount")
             raise_amount = min(amount, player.stack + player.committed_this_street)
@@ -593,8 +801,10 @@ class FullHandEngine:
             self.pot += actual_raise
             self._last_raise_size = raise_amount - self.current_bet
             self.current_bet = raise_amount
+            self._last_aggressor = player.seat
+            self._street_raises += 1
         
-        elif action == "allin":
+        elif code == ACT_ALLIN:
             allin_amount = player.stack
             player.stack = 0
             player.committed_this_street += allin_amount
@@ -603,97 +813,102 @@ class FullHandEngine:
             if player.committed_this_street > self.current_bet:
                 self._last_raise_size = player.committed_this_street - self.current_bet
                 self.current_bet = player.committed_this_street
+                self._last_aggressor = player.seat
             player.is_active = False  # allin 后不能再行动
+            self._active_mask &= ~bit
+        
+        if player.stack == 0 and player.is_active:
+            # 跟注 / 下注 / 加注投入了全部筹码，同样不能再行动
+            player.is_active = False
+            self._active_mask &= ~bit
         
         # 记录行动
+        self._record_action(player, code, amount if code in _SIZED_ACTIONS else None)
+        
+        self._street_actions += 1
+        if self.current_bet != current_bet:
+            self._sync_matched_mask()
+        elif player.committed_this_street == self.current_bet:
+            self._matched_mask |= bit
+        else:
+            self._matched_mask &= ~bit
+        
+        # 检查是否结束当前街
+        return self._check_street_end()
+    
+    def _record_action(self, player: Player, code: int, amount: Optional[float]) -> None:
+        """写入行动记录"""
+        if self._log_shared:
+            self.action_log = list(self.action_log)
+            self._log_shared = False
         self.action_log.append(Action(
             street=self.street.value,
-            seat=self._to_act_seat,
+            seat=player.seat,
             position=player.position,
-            action=action,
-            amount=amount if action in ["bet", "raise", "allin"] else None,
+            action=ACTION_NAMES[code],
+            amount=amount,
             pot_after=self.pot,
         ))
-        
-        self._street_actions += 1
-        
-        # 检查是否结束当前街
-        result = self._check_street_end()
-        
-        return {
-            "action_executed": True,
-            "street_advanced": result.get("advanced", False),
-            "game_ended": result.get("ended", False),
-        }
+    
+    def _acted_this_street(self) -> int:
+        """本街已记录的行动数 (含翻前两条盲注记录)"""
+        return self._street_actions + (2 if self.street == Street.PREFLOP else 0)
     
     def _check_street_end(self) -> Dict[str, Any]:
-        """检查是否结束当前街 - 严格按照德州扑克规则"""
-        in_hand_players = [p for p in self.players if p.in_hand]
-        active_players = [p for p in in_hand_players if p.is_active]
+        """检查是否结束当前街 - 严格按照德州扑克规则 (只读位图和计数器，代价与行动数无关)"""
+        in_hand = self._in_hand_mask
+        active = self._active_mask
         
         # 如果只剩一个玩家，结束游戏
-        if len(in_hand_players) == 1:
+        if in_hand.bit_count() == 1:
             self._end_game("fold")
             return {"ended": True}
         
         # 如果所有在游戏的玩家都已 ALL-IN，直接发完所有牌并摊牌
-        if len(in_hand_players) > 0 and len(active_players) == 0:
+        if in_hand and not active:
             # 所有剩余玩家都 ALL-IN，快速进入摊牌
             self._fast_forward_to_showdown()
             return {"ended": True}
         
-        # 检查是否所有活跃玩家都已匹配当前最高投注
-        if active_players:
-            all_matched = all(
-                p.committed_this_street == self.current_bet 
-                for p in active_players
-            )
-            
-            # 所有人都跟注或 check 后，进入下一街
-            if all_matched:
-                # 确保每个人都至少有一次行动机会（除了已经 ALL-IN 的）
-                acted_players = len([a for a in self.action_log if a.street == self.street.value])
-                if acted_players >= len([p for p in in_hand_players if p.is_active or p.committed_this_street == self.current_bet]):
-                    self._advance_street()
-                    return {"advanced": True}
-            
-            # 找到下一个要行动的玩家
-            next_seat = (self._to_act_seat + 1) % 6
-            loop_count = 0
-            while loop_count < 6:
-                next_player = self.players[next_seat]
-                if next_player.in_hand and next_player.is_active:
-                    self._to_act_seat = next_seat
-                    break
-                next_seat = (next_seat + 1) % 6
-                loop_count += 1
-            else:
-                # 没有下一个活跃玩家，结束当前街
-                self._advance_street()
-                return {"advanced": True}
-        else:
+        if not active:
             # 没有活跃玩家（都 allin 了），进入下一街
             self._advance_street()
             return {"advanced": True}
         
+        # 所有活跃玩家都已匹配当前最高投注 (跟注或 check) 后，进入下一街
+        if not active & ~self._matched_mask:
+            # 确保每个人都至少有一次行动机会（除了已经 ALL-IN 的）
+            need = (in_hand & (active | self._matched_mask)).bit_count()
+            if self._acted_this_street() >= need:
+                if active.bit_count() == 1:
+                    # 只剩一名玩家还有筹码且已匹配下注: 无人能再下注，发完公共牌摊牌
+                    self._fast_forward_to_showdown()
+                    return {"ended": True}
+                self._advance_street()
+                return {"advanced": True}
+        
+        # 找到下一个要行动的玩家: 把活跃位图旋转到当前座位之后，取最低位
+        start = (self._to_act_seat + 1) % 6
+        rotated = (active >> start | active << (6 - start)) & 0b111111
+        self._to_act_seat = (start + (rotated & -rotated).bit_length() - 1) % 6
         return {"advanced": False}
     
     def _fast_forward_to_showdown(self) -> None:
-        """所有玩家 ALL-IN，快速发完剩余公共牌并进入摊牌"""
+        """无人能再下注 (全员 ALL-IN，或只剩一人有筹码且已跟注)，快速发完剩余公共牌并进入摊牌"""
         # 发完 flop（如果还没发）
         if self.street == Street.PREFLOP:
             self.street = Street.FLOP
-            self.community_cards = self._deck.deal(3)
+            self._deal_flop()
         
         # 发完 turn（如果还没发）
         if self.street == Street.FLOP:
             self.street = Street.TURN
-            self.community_cards.extend(self._deck.deal(1))
+            self._deal_board(1)
         
         # 发完 river（如果还没发）
         if self.street == Street.TURN:
             self.street = Street.RIVER
-            self.community_cards.extend(self._deck.deal(1))
+            self._deal_board(1)
         
         # 进入摊牌
         self.street = Street.SHOWDOWN
@@ -706,21 +921,25 @@ class FullHandEngine:
             p.committed_this_street = 0.0
         self.current_bet = 0.0
         self._street_actions = 0
+        if self.street == Street.PREFLOP:
+            self._preflop_aggressor = self._last_aggressor
+        self._last_aggressor = None
+        self._street_raises = 0
         
         if self.street == Street.PREFLOP:
             self.street = Street.FLOP
-            self.community_cards = self._deck.deal(3)
+            self._deal_flop()
             self.status = GameStatus.FLOP_DECISION
             self._to_act_seat = self._get_first_to_act_flop()
         
         elif self.street == Street.FLOP:
             self.street = Street.TURN
-            self.community_cards.extend(self._deck.deal(1))
+            self._deal_board(1)
             self._to_act_seat = self._get_first_to_act_postflop()
         
         elif self.street == Street.TURN:
             self.street = Street.RIVER
-            self.community_cards.extend(self._deck.deal(1))
+            self._deal_board(1)
             self._to_act_seat = self._get_first_to_act_postflop()
         
         elif self.street == Street.RIVER:
@@ -729,12 +948,23 @@ class FullHandEngine:
         
         self._update_active_players()
     
+    def _deal_flop(self) -> None:
+        """发翻牌 (公共牌列表重新创建，之后的转牌/河牌在其上追加)"""
+        self.board = self._deck.deal_ids(3)
+        self.community_cards = format_cards(self.board)
+    
+    def _deal_board(self, n: int) -> None:
+        # 重新绑定而不原地追加，fork 出的分支可以共享公共牌列表
+        cards = self._deck.deal_ids(n)
+        self.board = self.board + cards
+        self.community_cards = self.community_cards + [CARD_STRS[c] for c in cards]
+    
     def _get_first_to_act_flop(self) -> int:
-        """翻牌后首先行动的玩家 (SB 或第一个未弃牌的玩家)"""
-        # 简化：从 SB 开始
+        """翻牌后首先行动的玩家 (从 SB 起第一个未弃牌且未 all-in 的玩家)"""
         for offset in range(6):
             seat = (self.sb_seat + offset) % 6
-            if self.players[seat].in_hand:
+            player = self.players[seat]
+            if player.in_hand and player.stack > 0:
                 return seat
         return self.sb_seat
     
@@ -746,47 +976,43 @@ class FullHandEngine:
         """结束游戏"""
         self.ended_by = ended_by
         self.status = GameStatus.ENDED
+        hero = self.players[self.hero_seat]
         
         if ended_by == "fold":
-            # 找到唯一的赢家
+            # 唯一的赢家拿走底池
             winner = [p for p in self.players if p.in_hand][0]
-            self.result_bb = winner.total_committed - self.players[self.hero_seat].total_committed
+            self.result_bb = (self.pot if winner is hero else 0.0) - hero.total_committed
         else:
-            # 摊牌 - 使用 treys 进行牌力比较
-            hero = self.players[self.hero_seat]
-            
+            # 摊牌 - 查表评估牌力
             if not hero.in_hand:
                 self.result_bb = -hero.total_committed
-            elif not HAS_TREYS:
-                # 没有 treys 库时使用简化逻辑
-                self.result_bb = -hero.total_committed
             else:
-                # 使用 treys 进行牌力评估
-                evaluator = Evaluator()
-                community_cards = [Card.new(c) for c in self.community_cards]
-                
-                # 评估每个玩家的牌力
-                player_scores = {}
-                for p in self.players:
-                    if p.in_hand and p.hole_cards:
-                        hole_cards = [Card.new(c) for c in p.hole_cards]
-                        score = evaluator.evaluate(community_cards, hole_cards)
-                        player_scores[p.seat] = score
-                
-                # 找到最佳牌力（分数越低越好）
-                if player_scores:
-                    best_score = min(player_scores.values())
-                    winners = [seat for seat, score in player_scores.items() if score == best_score]
-                    
-                    hero_score = player_scores.get(self.hero_seat)
-                    if hero_score is not None and hero_score == best_score:
-                        # Hero 获胜
-                        self.result_bb = self.pot - hero.total_committed
-                    else:
-                        # Hero 输了
-                        self.result_bb = -hero.total_committed
+                # 评估每个玩家的牌力（分数越高越好），牌力相同的赢家平分底池
+                contenders = [p for p in self.players if p.in_hand and p.hole_ids]
+                if len(contenders) == 1:
+                    # 只剩一名玩家时无需比牌 (公共牌可能还没发完)
+                    share = 1.0 if contenders[0] is hero else 0.0
+                elif contenders:
+                    scores = evaluate_showdown(self.board, [p.hole_ids for p in contenders])
+                    best_score = scores.max()
+                    winners = [p for p, score in zip(contenders, scores) if score == best_score]
+                    share = 1.0 / len(winners) if any(p is hero for p in winners) else 0.0
                 else:
-                    self.result_bb = -hero.total_committed
+                    share = 0.0
+                
+                self.result_bb = self.pot * share - hero.total_committed
+    
+    def fork(self) -> "FullHandEngine":
+        """
+        O(1) 复制当前牌局，用于 "如果当时..." 的分支推演，不需要按 seed 重放
+        六名玩家逐个浅复制；公共牌、牌序和关键点共享；行动记录写时复制
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.players = [p.copy() for p in self.players]
+        clone._deck = self._deck.fork() if self._deck else None
+        self._log_shared = clone._log_shared = True
+        return clone
     
     def get_state(self) -> Dict[str, Any]:
         """获取当前状态"""
@@ -809,7 +1035,7 @@ class FullHandEngine:
         }
     
     def to_dict(self) -> Dict[str, Any]:
-        """序列化为字典"""
+        """序列化为字典 (只用于展示；恢复引擎用 to_snapshot / from_snapshot)"""
         return {
             "seed": self.seed,
             "status": self.status.value,
@@ -830,11 +1056,161 @@ class FullHandEngine:
             "ended_by": self.ended_by,
         }
     
+    def to_snapshot(self) -> bytes:
+        """
+        序列化为版本化的二进制快照
+        覆盖完整引擎状态 (含剩余牌序、发牌游标和内部计数器)；rng 只在 initialize_game 中使用，不写入快照
+        """
+        deck = self._deck
+        parts = [
+            _SNAP_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+            _SNAP_CORE.pack(
+                self.stack_bb, _STATUS_CODES[self.status], _STREET_CODES[self.street],
+                self.button_seat, self.sb_seat, self.bb_seat,
+                _NO_SEAT if self.hero_seat is None else self.hero_seat,
+                _NO_SEAT if self._to_act_seat is None else self._to_act_seat,
+                self._street_actions, self.pot, self.current_bet, self._last_raise_size,
+                _pack_optional(self.result_bb),
+            ),
+            _pack_str(self.seed),
+            _pack_str(self.ended_by),
+            self._pack_deck(deck),
+            bytes([len(self.board)]) + bytes(self.board),
+            bytes([len(self.players)]),
+        ]
+        for p in self.players:
+            hole = p.hole_ids or (_NO_CARD, _NO_CARD)
+            flags = (_FLAG_IN_HAND if p.in_hand else 0) | (_FLAG_HERO if p.is_hero else 0) \
+                | (_FLAG_ACTIVE if p.is_active else 0)
+            parts.append(_SNAP_PLAYER.pack(
+                p.seat, _POSITION_CODES[p.position], flags, hole[0], hole[1],
+                p.stack, p.committed_this_street, p.total_committed,
+            ))
+        parts.append(_SNAP_LEN.pack(len(self.action_log)))
+        for a in self.action_log:
+            parts.append(_SNAP_ACTION.pack(
+                _STREET_VALUE_CODES[a.street], a.seat, _POSITION_CODES[a.position], ACTION_CODES[a.action],
+                _pack_optional(a.amount), a.pot_after,
+            ))
+        parts.append(_pack_str("\n".join(a.timestamp for a in self.action_log)))
+        parts.append(_pack_json(self.preflop_key_spot.to_dict() if self.preflop_key_spot else None))
+        parts.append(_pack_json(self.flop_key_spot.to_dict() if self.flop_key_spot else None))
+        return b"".join(parts)
+    
+    @staticmethod
+    def _pack_deck(deck) -> bytes:
+        """游标 + 牌序；计数器牌组可由 seed 直接算出，只写游标"""
+        if deck is None:
+            return bytes([0, 0])
+        if isinstance(deck, CounterDeck):
+            return bytes([deck._cursor, 0])
+        return bytes([deck._cursor, len(deck.cards)]) + bytes(deck.cards)
+    
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "FullHandEngine":
-        """从字典反序列化"""
-        engine = cls(stack_bb=data.get("stack_bb", 100), seed=data.get("seed"))
-        engine.status = GameStatus(data.get("status", "INIT"))
-        engine.street = Street(data.get("street", "preflop"))
-        # ... 更多反序列化逻辑
+    def from_snapshot(cls, data: bytes) -> "FullHandEngine":
+        """从 to_snapshot 的结果恢复引擎，不重新洗牌也不重放行动"""
+        reader = _SnapshotReader(data)
+        try:
+            magic, version = reader.unpack(_SNAP_HEADER)
+            if magic != SNAPSHOT_MAGIC:
+                raise SnapshotError("Not an engine snapshot")
+            if version != SNAPSHOT_VERSION:
+                raise SnapshotError(f"Unsupported snapshot version: {version}")
+            engine = cls._read_snapshot(reader)
+        except SnapshotError:
+            raise
+        except (struct.error, IndexError, KeyError, ValueError) as e:
+            raise SnapshotError(f"Corrupted snapshot: {e}") from e
+        if reader.offset != len(reader.data):
+            raise SnapshotError("Trailing bytes in snapshot")
         return engine
+    
+    @classmethod
+    def _read_snapshot(cls, reader: _SnapshotReader) -> "FullHandEngine":
+        (stack_bb, status, street, button_seat, sb_seat, bb_seat, hero_seat, to_act_seat,
+         street_actions, pot, current_bet, last_raise_size, result_bb) = reader.unpack(_SNAP_CORE)
+        engine = cls(stack_bb=stack_bb, seed=reader.string())
+        engine.ended_by = reader.string()
+        engine.status = _SNAP_STATUSES[status]
+        engine.street = _SNAP_STREETS[street]
+        engine.button_seat, engine.sb_seat, engine.bb_seat = button_seat, sb_seat, bb_seat
+        engine.hero_seat = None if hero_seat == _NO_SEAT else hero_seat
+        engine._to_act_seat = None if to_act_seat == _NO_SEAT else to_act_seat
+        engine._street_actions = street_actions
+        engine.pot, engine.current_bet, engine._last_raise_size = pot, current_bet, last_raise_size
+        engine.result_bb = _unpack_optional(result_bb)
+        
+        cursor = reader.byte()
+        cards = list(reader.take(reader.byte()))
+        if cards:
+            engine._deck = PokerDeck.from_state(cards, cursor)
+        elif is_counter_seed(engine.seed):
+            engine._deck = CounterDeck(engine.seed, cursor)
+        engine.board = list(reader.take(reader.byte()))
+        engine.community_cards = format_cards(engine.board)
+        
+        n_players = reader.byte()
+        for seat, position, flags, c1, c2, stack, committed, total in _SNAP_PLAYER.iter_unpack(
+                reader.take(n_players * _SNAP_PLAYER.size)):
+            hole_ids = None if c1 == _NO_CARD else [c1, c2]
+            engine.players.append(Player(
+                seat=seat,
+                position=_SNAP_POSITIONS[position],
+                stack=stack,
+                in_hand=bool(flags & _FLAG_IN_HAND),
+                committed_this_street=committed,
+                total_committed=total,
+                hole_cards=format_cards(hole_ids) if hole_ids else None,
+                is_hero=bool(flags & _FLAG_HERO),
+                is_active=bool(flags & _FLAG_ACTIVE),
+                hole_ids=hole_ids,
+            ))
+        
+        n_actions, = reader.unpack(_SNAP_LEN)
+        actions = _SNAP_ACTION.iter_unpack(reader.take(n_actions * _SNAP_ACTION.size))
+        timestamps = reader.string().split("\n")
+        for (street_code, seat, position, action, amount, pot_after), timestamp in zip(actions, timestamps):
+            engine.action_log.append(Action(
+                street=_SNAP_STREET_VALUES[street_code],
+                seat=seat,
+                position=_SNAP_POSITIONS[position],
+                action=ACTION_NAMES[action],
+                amount=_unpack_optional(amount),
+                pot_after=pot_after,
+                timestamp=timestamp,
+            ))
+        
+        preflop_key_spot, flop_key_spot = reader.json(), reader.json()
+        engine.preflop_key_spot = KeySpot(**preflop_key_spot) if preflop_key_spot else None
+        engine.flop_key_spot = KeySpot(**flop_key_spot) if flop_key_spot else None
+        engine._restore_bookkeeping()
+        return engine
+    
+    def _restore_bookkeeping(self) -> None:
+        """恢复后重建位图和进攻方信息 (不写入快照，由玩家状态和行动记录推出)"""
+        self._sync_seat_masks()
+        record_street = None
+        aggressor, raises = None, 0
+        pot = street_bet = 0.0
+        blinds = (ACTION_NAMES[ACT_SB], ACTION_NAMES[ACT_BB])
+        for a in self.action_log:
+            # 每条记录投入的筹码 = 前后底池之差；两条盲注记录在两盲都放入后才写，按金额计
+            put_in = a.amount if a.action in blinds else a.pot_after - pot
+            pot = a.pot_after
+            if a.street != record_street:
+                if record_street == Street.PREFLOP.value:
+                    self._preflop_aggressor = aggressor
+                record_street, committed, street_bet = a.street, [0.0] * 6, 0.0
+                aggressor, raises = None, 0
+            committed[a.seat] += put_in
+            if a.action in ("bet", "raise"):
+                raises += 1
+                aggressor = a.seat
+            elif a.action == "allin" and committed[a.seat] > street_bet:
+                aggressor = a.seat
+            street_bet = max(street_bet, committed[a.seat])
+        if record_street == self.street.value:
+            self._last_aggressor, self._street_raises = aggressor, raises
+        elif record_street == Street.PREFLOP.value:
+            # 刚进入翻牌，本街还没有行动
+            self._preflop_aggressor = aggressor
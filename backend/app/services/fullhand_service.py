@@ -2,25 +2,46 @@
 完整牌局模拟服务层
 V1.1 新增
 """
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, timedelta, timezone
 import random
 import hashlib
+import logging
+import threading
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.core.config import settings
 from app.models.user import User
 from app.models.fullhand_session import FullHandSession, FullHandStats
-from app.services.fullhand_engine import FullHandEngine, GameStatus, Street, HandEvaluator
+from app.services.fullhand_engine import FullHandEngine, GameStatus, Street, HandEvaluator, SnapshotError
 from app.services.flop_strategy import FlopStrategyEngine
-from app.services.gto_engine import get_gto_strategy
+from app.services.gto_engine import GTOStrategy, get_gto_strategy
+from app.services.ai_policy import AIPolicy, DEFAULT_AI_LEVEL, get_ai_policy
+from app.services.counter_deck import COUNTER_SEED_PREFIX
+from app.services.engine_cache import get_engine_cache
+from app.services.hand_state_store import HandState, VersionConflict, get_hand_state_store
+from app.services.hand_review import REVIEW_VERSION, pack_review, present_review, unpack_review
+from app.services.equity import hand_vs_hand
+from app.services.hand_evaluator import CATEGORY_LABELS, evaluate_showdown, hand_category, to_rank
 
-# 导入 treys 进行牌力评估
-try:
-    from treys import Card, Evaluator
-    HAS_TREYS = True
-except ImportError:
-    HAS_TREYS = False
+logger = logging.getLogger(__name__)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """带时区的时间 (PostgreSQL) 转为无时区 UTC，与 datetime.utcnow() 可比较"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# 分支推演的检查点缓存: 会话 id -> {行动记录下标: 该行动之前的引擎}；只缓存已结束 (不再变化) 的牌局
+CHECKPOINT_CACHE_SIZE = 64
+_checkpoint_cache: "OrderedDict[int, Dict[int, FullHandEngine]]" = OrderedDict()
+_checkpoint_lock = threading.Lock()  # 同步路由在线程池中并发执行，读写缓存与重放都在锁内
 
 
 class FullHandService:
@@ -35,6 +56,9 @@ class FullHandService:
         "ACCEPTABLE": 0.20,
     }
     
+    # 计入正确率的关键点评级
+    CORRECT_GRADES = ("PERFECT", "ACCEPTABLE")
+    
     def __init__(self, db: Session):
         self.db = db
         self.flop_engine = FlopStrategyEngine()
@@ -44,29 +68,34 @@ class FullHandService:
         if user.is_subscribed:
             return True, -1  # -1 表示无限
         
-        # 检查今日已玩局数
+        remaining = max(0, self.FREE_DAILY_LIMIT - self._today_session_count(user))
+        return remaining > 0, remaining
+    
+    def _today_session_count(self, user: User) -> int:
+        """今日已开局数 (每日额度按开局计算，含未打完的牌局)"""
         today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = self.db.query(FullHandSession).filter(
+        return self.db.query(FullHandSession).filter(
             FullHandSession.user_id == user.id,
             FullHandSession.created_at >= today
         ).count()
-        
-        remaining = max(0, self.FREE_DAILY_LIMIT - today_count)
-        return remaining > 0, remaining
     
     def create_session(self, user: User, stack_bb: int = 100, 
-                       replay_seed: Optional[str] = None) -> FullHandSession:
+                       replay_seed: Optional[str] = None,
+                       ai_level: str = DEFAULT_AI_LEVEL) -> FullHandSession:
         """创建新牌局"""
         # 检查额度
         can_start, remaining = self.can_start_session(user)
         if not can_start:
             raise ValueError(f"Daily limit reached. Remaining: {remaining}")
         
+        # 未知的 ai_level 在这里抛出 ValueError
+        policy = get_ai_policy(ai_level, stack_bb)
+        
         # 如果是重打，使用原 seed
         if replay_seed:
             seed = replay_seed
         else:
-            seed = hashlib.sha256(
+            seed = COUNTER_SEED_PREFIX + hashlib.sha256(
                 f"{user.id}_{datetime.utcnow().timestamp()}_{random.getrandbits(32)}".encode()
             ).hexdigest()[:16]
         
@@ -75,14 +104,15 @@ class FullHandService:
         engine.initialize_game()
         
         # 运行 AI 直到 Hero 的回合或翻牌
-        self._run_ai_until_hero_turn(engine)
+        self._run_ai_until_hero_turn(engine, policy)
+        snapshot = engine.to_snapshot()
         
         # 创建会话
         session = FullHandSession(
             user_id=user.id,
             table_type="6max",
             stack_bb=stack_bb,
-            ai_level="standard",
+            ai_level=ai_level,
             hand_seed=seed,
             status=engine.status.value,
             current_street=engine.street.value,
@@ -96,15 +126,30 @@ class FullHandService:
             action_log=[a.to_dict() for a in engine.action_log],
             hero_seat=engine.hero_seat,
             hero_cards=engine.players[engine.hero_seat].hole_cards,
+            engine_snapshot=snapshot,
         )
+        if engine.status == GameStatus.ENDED:
+            session.result_bb = engine.result_bb
+            session.ended_by = engine.ended_by
+            session.completed_at = datetime.utcnow()
+            self._store_review(session, self._build_review(engine))
         
         self.db.add(session)
+        if engine.status == GameStatus.ENDED:
+            self._record_daily_stats(session)
         self.db.commit()
         self.db.refresh(session)
         
+        if engine.status != GameStatus.ENDED:
+            get_hand_state_store().compare_and_set(session.id, 0, HandState(session.state_version, snapshot))
+        self._publish_engine(session.id, session.state_version, engine)
         return session
     
-    def _run_ai_until_hero_turn(self, engine: FullHandEngine) -> None:
+    def get_legal_actions(self, session: FullHandSession) -> List[str]:
+        """会话当前的合法动作 (刚创建的会话直接取进程内缓存的引擎，无需恢复)"""
+        return self._restore_engine(session).get_legal_actions()
+    
+    def _run_ai_until_hero_turn(self, engine: FullHandEngine, policy: AIPolicy) -> None:
         """运行 AI 直到 Hero 的回合"""
         max_iterations = 50  # 防止无限循环
         
@@ -115,8 +160,9 @@ class FullHandService:
             if engine.is_hero_turn():
                 break
             
-            # AI 决策
-            self._ai_act(engine)
+            # AI 决策 (编译好的策略表采样)
+            if not policy.act(engine):
+                break
             
             # 检查是否进入翻牌
             if engine.street == Street.FLOP and engine.status == GameStatus.FLOP_DECISION:
@@ -124,91 +170,16 @@ class FullHandService:
         
         return
     
-    def _ai_act(self, engine: FullHandEngine) -> None:
-        """AI 执行动作"""
-        seat = engine._to_act_seat
-        if seat is None:
-            return
-        
-        player = engine.players[seat]
-        legal_actions = engine.get_legal_actions()
-        
-        if not legal_actions:
-            return
-        
-        # 使用 GTO 策略决策 (简化版)
-        action = self._ai_decision(engine, player, legal_actions)
-        
-        # 执行动作
-        if action in ["bet", "raise"]:
-            # AI 使用固定尺度
-            if engine.street == Street.PREFLOP:
-                if action == "raise":
-                    engine.process_action(action, amount=2.5)
-                else:
-                    engine.process_action(action, amount=1.0)
-            else:
-                # 翻牌后使用 75% pot
-                bet_sizes = engine.calculate_bet_sizes()
-                engine.process_action(action, amount=bet_sizes.get("bet75", 1.0))
-        else:
-            engine.process_action(action)
-    
-    def _ai_decision(self, engine: FullHandEngine, player, legal_actions: List[str]) -> str:
-        """AI 决策逻辑"""
-        # 简化版：随机选择，但优先某些动作
-        
-        if engine.street == Street.PREFLOP:
-            # 使用现有 GTO 策略
-            gto = get_gto_strategy(engine.stack_bb)
-            hand = HandEvaluator.format_hand(player.hole_cards)
-            
-            # 获取当前场景
-            action_to_you = self._get_preflop_action_context(engine, player)
-            
-            # 获取策略
-            try:
-                strategy = gto.get_strategy(hand, player.position, action_to_you)
-                # 选择最高频的动作
-                best = max(strategy.items(), key=lambda x: x[1])[0]
-                
-                # 映射到合法动作
-                action_map = {
-                    "fold": "fold",
-                    "call": "call",
-                    "raise_2bb": "raise",
-                    "raise_2.5bb": "raise",
-                    "raise_3bb": "raise",
-                    "limp": "call",
-                    "check": "check",
-                    "all_in": "allin",
-                }
-                
-                mapped = action_map.get(best, "call")
-                if mapped in legal_actions:
-                    return mapped
-            except Exception:
-                pass
-        
-        # 默认策略
-        if "check" in legal_actions:
-            return "check"
-        if "call" in legal_actions:
-            return "call"
-        if "fold" in legal_actions:
-            return "fold"
-        
-        return legal_actions[0]
+    def _session_policy(self, session: FullHandSession) -> AIPolicy:
+        """牌局的 AI 策略 (旧会话没有记录 ai_level 时按默认)"""
+        return get_ai_policy(session.ai_level or DEFAULT_AI_LEVEL, session.stack_bb)
     
     def _get_preflop_action_context(self, engine: FullHandEngine, player) -> str:
         """获取翻前场景描述"""
-        # 简化判断
         if engine.current_bet == 1.0:
             return "open"
-        elif engine.current_bet <= 2.5:
-            return "vs_raise_2.5bb"
-        else:
-            return "vs_raise_4bb"
+        # 加注尺度归入策略表的固定网格，查询直接命中预计算策略
+        return GTOStrategy.raise_context(engine.current_bet)
     
     def process_hero_action(self, session_id: int, user: User, 
                            action: str, amount: Optional[float] = None) -> Dict[str, Any]:
@@ -224,7 +195,8 @@ class FullHandService:
         if session.status == "ENDED":
             raise ValueError("Game already ended")
         
-        # 恢复引擎状态
+        # 恢复引擎状态 (记下所基于的版本，写入时据此检测并发更新)
+        base_version = session.state_version
         engine = self._restore_engine(session)
         
         # 检查是否是关键点
@@ -252,20 +224,24 @@ class FullHandService:
         
         # 继续运行 AI
         if not result.get("game_ended") and not result.get("street_advanced"):
-            self._run_ai_until_hero_turn(engine)
+            self._run_ai_until_hero_turn(engine, self._session_policy(session))
         
         # 检查是否完成翻牌决策
         final_result = None
         review_payload = None
         
-        if engine.status == GameStatus.FAST_FORWARD or engine.status == GameStatus.ENDED:
-            # 执行快进
+        if engine.status == GameStatus.FAST_FORWARD:
+            # 翻牌决策完成，快进转牌、河牌 (已结束的牌局不再快进，否则弃牌结束的会被改判为摊牌)
             self._fast_forward(engine)
+        
+        if engine.status == GameStatus.ENDED:
             final_result = {
                 "result_bb": round(engine.result_bb, 2),
                 "ended_by": engine.ended_by,
             }
-            review_payload = self._generate_review(engine, user)
+            review = self._build_review(engine)
+            self._store_review(session, review)
+            review_payload = self._generate_review(engine, review, user)
             session.completed_at = datetime.utcnow()
         
         # 更新会话
@@ -283,8 +259,36 @@ class FullHandService:
             session.preflop_key_spot = engine.preflop_key_spot.to_dict()
         if engine.flop_key_spot:
             session.flop_key_spot = engine.flop_key_spot.to_dict()
+        snapshot = engine.to_snapshot()
+        session.engine_snapshot = snapshot
         
-        self.db.commit()
+        # 先在共享状态存储上按版本号写入 (CAS)：同一手的并发请求在这里被拒绝，不再争用数据库行
+        # 新版本号与 state_version 的自增规则 (每次更新 +1) 一致
+        version = base_version + 1
+        store = get_hand_state_store()
+        try:
+            store.compare_and_set(session_id, base_version, HandState(version, snapshot))
+        except VersionConflict:
+            self.db.rollback()
+            get_engine_cache().discard(session_id)
+            raise ValueError("Hand was updated by another request, please retry")
+        
+        try:
+            if engine.status == GameStatus.ENDED:
+                self._record_daily_stats(session)
+            self.db.commit()
+        except StaleDataError:
+            # 数据库行已被其他请求更新 (绕过了共享存储)，本次行动作废
+            self.db.rollback()
+            store.delete(session_id)
+            get_engine_cache().discard(session_id)
+            raise ValueError("Hand was updated by another request, please retry")
+        except Exception:
+            # 存储已前进而数据库未提交，删掉条目，之后的请求回退到数据库中的快照
+            store.delete(session_id)
+            raise
+        
+        self._publish_engine(session_id, version, engine)
         
         return {
             "state": engine.get_state(),
@@ -295,20 +299,69 @@ class FullHandService:
             "review_payload": review_payload,
         }
     
+    def _publish_engine(self, session_id: int, version: int, engine: FullHandEngine) -> None:
+        """写库成功后缓存引擎，版本号与数据库行一致；已结束的牌局从缓存和共享存储中移除"""
+        if engine.status == GameStatus.ENDED:
+            get_engine_cache().discard(session_id)
+            get_hand_state_store().delete(session_id)
+        else:
+            get_engine_cache().put(session_id, version, engine)
+    
     def _restore_engine(self, session: FullHandSession) -> FullHandEngine:
-        """从会话恢复引擎状态"""
+        """
+        从会话恢复引擎状态：优先取进程内缓存，其次读取二进制快照 (共享存储中与行版本一致的快照，
+        否则数据库中的快照)，缺失或无效时按 seed 重放
+        """
+        engine = get_engine_cache().get(session.id, session.state_version)
+        if engine is not None:
+            return engine
+        
+        state = get_hand_state_store().get(session.id)
+        snapshot = state.snapshot if state and state.version == session.state_version else session.engine_snapshot
+        if snapshot:
+            try:
+                engine = FullHandEngine.from_snapshot(snapshot)
+            except SnapshotError as e:
+                logger.warning(f"Invalid engine snapshot for session {session.id}, replaying: {e}")
+            else:
+                if settings.FULLHAND_VERIFY_SNAPSHOTS:
+                    self._verify_snapshot(session, engine)
+                return engine
+        
+        return self._replay_engine(session)
+    
+    def _verify_snapshot(self, session: FullHandSession, engine: FullHandEngine) -> bool:
+        """核对快照中的牌与 seed 一致，再按 seed 重放一遍比对对外状态"""
+        replayed = self._replay_engine(session)
+        same = (
+            engine.verify_dealt_cards()
+            and engine.get_state() == replayed.get_state()
+            and engine.get_legal_actions() == replayed.get_legal_actions()
+        )
+        if not same:
+            logger.warning(f"Engine snapshot of session {session.id} differs from replay")
+        return same
+    
+    def _replay_engine(self, session: FullHandSession,
+                       checkpoints: Optional[Dict[int, FullHandEngine]] = None) -> FullHandEngine:
+        """
+        按 seed 重新发牌并重放行动记录恢复引擎 (快照缺失时的回退路径)
+        传入 checkpoints 时，在重放每条行动前 fork 一份状态，以行动记录下标为键写入
+        """
         engine = FullHandEngine(stack_bb=session.stack_bb, seed=session.hand_seed)
         
         # 重新初始化
         engine.initialize_game()
         
         # 重放所有行动
-        for action_dict in session.action_log:
+        for index, action_dict in enumerate(session.action_log):
             if action_dict["action"] in ["sb", "bb", "deal"]:
                 continue
             
             seat = action_dict["seat"]
             engine._to_act_seat = seat
+            if checkpoints is not None:
+                checkpoints[index] = engine.fork()
             
             action = action_dict["action"]
             amount = action_dict.get("amount")
@@ -326,6 +379,68 @@ class FullHandService:
         
         return engine
     
+    def branch_hand(self, session_id: int, user: User, action_index: int,
+                    action: str, amount: Optional[float] = None) -> Dict[str, Any]:
+        """
+        复盘分支推演: 把第 action_index 条行动换成 action，之后由 AI 替所有座位行动直到结束
+        同一手的各个分支都从缓存的检查点 fork，不再按 seed 重放
+        """
+        session = self.db.query(FullHandSession).filter(
+            FullHandSession.id == session_id,
+            FullHandSession.user_id == user.id
+        ).first()
+        
+        if not session:
+            raise ValueError("Session not found")
+        
+        if session.status != "ENDED":
+            raise ValueError("Hand is still in progress")
+        
+        checkpoint = self._hand_checkpoints(session).get(action_index)
+        if checkpoint is None:
+            raise ValueError(f"No decision at action index {action_index}")
+        
+        engine = checkpoint.fork()
+        engine.process_action(action, amount)
+        self._play_out(engine, self._session_policy(session))
+        
+        return {
+            "hand_id": session.id,
+            "action_index": action_index,
+            "state": engine.get_state(),
+            "action_log": [a.to_dict() for a in engine.action_log],
+            "result_bb": round(engine.result_bb, 2) if engine.result_bb is not None else 0.0,
+            "ended_by": engine.ended_by,
+            "original_result_bb": round(session.result_bb, 2) if session.result_bb is not None else 0.0,
+        }
+    
+    def _hand_checkpoints(self, session: FullHandSession) -> Dict[int, FullHandEngine]:
+        """已结束牌局每个决策点之前的状态 (重放一次后按会话缓存；返回的检查点只读，调用方 fork 后使用)"""
+        with _checkpoint_lock:
+            checkpoints = _checkpoint_cache.get(session.id)
+            if checkpoints is None:
+                checkpoints = {}
+                self._replay_engine(session, checkpoints)
+                _checkpoint_cache[session.id] = checkpoints
+                if len(_checkpoint_cache) > CHECKPOINT_CACHE_SIZE:
+                    _checkpoint_cache.popitem(last=False)
+            else:
+                _checkpoint_cache.move_to_end(session.id)
+            return checkpoints
+    
+    def _play_out(self, engine: FullHandEngine, policy: AIPolicy) -> None:
+        """AI 替所有座位 (含 Hero) 打完翻前和翻牌，转牌、河牌与正式牌局一样快进"""
+        max_iterations = 50  # 防止无限循环
+        
+        for _ in range(max_iterations):
+            if engine.status == GameStatus.ENDED or engine.street not in (Street.PREFLOP, Street.FLOP):
+                break
+            if not policy.act(engine):
+                break
+        
+        if engine.status != GameStatus.ENDED:
+            self._fast_forward(engine)
+    
     def _restore_keyspot(self, data: Dict) -> Any:
         """恢复关键点"""
         from app.services.fullhand_engine import KeySpot
@@ -334,7 +449,7 @@ class FullHandService:
     def _prepare_flop_keyspot(self, engine: FullHandEngine) -> Dict[str, Any]:
         """准备翻牌关键点信息"""
         hero = engine.players[engine.hero_seat]
-        hero_hand = HandEvaluator.format_hand(hero.hole_cards)
+        hero_hand = HandEvaluator.format_hand_ids(hero.hole_ids)
         
         # 确定底池类型
         pot_type = self._determine_pot_type(engine)
@@ -354,10 +469,10 @@ class FullHandService:
         spr_bucket = self.flop_engine.calculate_spr_bucket(spr)
         
         # 分析牌面
-        board_texture = self.flop_engine.analyze_board_texture(engine.community_cards)
+        board_texture = self.flop_engine.analyze_board_texture_ids(engine.board)
         
         # 评估手牌桶
-        hand_bucket = HandEvaluator.evaluate_hand_bucket(hero.hole_cards, engine.community_cards)
+        hand_bucket = HandEvaluator.evaluate_bucket_ids(hero.hole_ids, engine.board)
         
         # 生成 context_id
         context_id = self.flop_engine.get_context_id(
@@ -466,7 +581,7 @@ class FullHandService:
             from app.services.fullhand_engine import KeySpot
             
             gto = get_gto_strategy(engine.stack_bb)
-            hand = HandEvaluator.format_hand(hero.hole_cards)
+            hand = HandEvaluator.format_hand_ids(hero.hole_ids)
             action_to_you = self._get_preflop_action_context(engine, hero)
             
             strategy = gto.get_strategy(hand, hero.position, action_to_you)
@@ -582,11 +697,9 @@ class FullHandService:
         # 摊牌
         engine._end_game("showdown")
     
-    def _generate_review(self, engine: FullHandEngine, user: User) -> Dict[str, Any]:
-        """生成复盘数据 - 包含摊牌分析"""
+    def _build_review(self, engine: FullHandEngine) -> Dict[str, Any]:
+        """从终局引擎生成完整复盘 (关键点 + 摊牌分析)，不按订阅状态裁剪"""
         review = {
-            "result_bb": round(engine.result_bb, 2) if engine.result_bb is not None else 0.0,
-            "ended_by": engine.ended_by or "in_progress",
             "preflop_spot": None,
             "flop_spot": None,
             "showdown_analysis": None,
@@ -597,9 +710,9 @@ class FullHandService:
             spot = engine.preflop_key_spot
             review["preflop_spot"] = {
                 "context_id": spot.context_id,
-                "strategy": spot.strategy if user.is_subscribed else None,
+                "strategy": spot.strategy,
                 "user_action": spot.user_action,
-                "user_action_prob": spot.user_action_prob if user.is_subscribed else None,
+                "user_action_prob": spot.user_action_prob,
                 "best_action": spot.best_action,
                 "grade": spot.grade,
             }
@@ -615,10 +728,10 @@ class FullHandService:
                 "board": spot.board,
                 "hero_hand": spot.hero_hand,
                 "hero_hand_bucket": spot.hero_hand_bucket,
-                "strategy": spot.strategy if user.is_subscribed else None,
+                "strategy": spot.strategy,
                 "legal_actions": spot.legal_actions,
                 "user_action": spot.user_action,
-                "user_action_prob": spot.user_action_prob if user.is_subscribed else None,
+                "user_action_prob": spot.user_action_prob,
                 "best_action": spot.best_action,
                 "grade": spot.grade,
                 "explanation": getattr(spot, 'explanation', ''),
@@ -629,6 +742,50 @@ class FullHandService:
         
         return review
     
+    def _store_review(self, session: FullHandSession, review: Dict[str, Any]) -> None:
+        """把复盘物化到会话 (随会话一起提交)"""
+        session.review = pack_review(review)
+        session.review_version = REVIEW_VERSION
+    
+    def _generate_review(self, engine: FullHandEngine, review: Dict[str, Any], user: User) -> Dict[str, Any]:
+        """牌局结束时随行动响应返回的复盘数据"""
+        return {
+            "result_bb": round(engine.result_bb, 2) if engine.result_bb is not None else 0.0,
+            "ended_by": engine.ended_by or "in_progress",
+            **present_review(review, user.is_subscribed),
+        }
+    
+    @staticmethod
+    def _evaluate_showdown_hands(board: List[int], holes: List[List[int]]) -> List[Tuple[int, str]]:
+        """
+        批量评估摊牌牌力
+        返回每名玩家的 (排名, 牌型名称)，排名与 treys 一致 (越小越强)；手牌不足两张时为 (9999, "未知")
+        """
+        results = [(9999, "未知")] * len(holes)
+        valid = [i for i, hole in enumerate(holes) if len(hole) == 2]
+        if valid:
+            scores = evaluate_showdown(board, [holes[i] for i in valid])
+            for i, score in zip(valid, scores):
+                results[i] = (int(to_rank(score)), CATEGORY_LABELS[hand_category(score)])
+        return results
+    
+    @staticmethod
+    def _flop_equities(board: List[int], holes: List[List[int]], in_hand: List[bool]) -> List[Optional[float]]:
+        """
+        摊牌双方在翻牌圈的全下胜率 (精确枚举 990 种转牌/河牌)
+        只在恰好两名玩家摊牌时计算，其余玩家为 None
+        """
+        equities: List[Optional[float]] = [None] * len(holes)
+        contenders = [i for i, hole in enumerate(holes) if in_hand[i] and len(hole) == 2]
+        if len(contenders) != 2 or len(board) < 3:
+            return equities
+        
+        first, second = contenders
+        result = hand_vs_hand(holes[first], holes[second], board[:3])
+        equities[first] = round(result.equity, 4)
+        equities[second] = round(1.0 - result.equity, 4)
+        return equities
+    
     def _analyze_showdown_from_engine(self, engine: FullHandEngine) -> Dict[str, Any]:
         """从引擎状态分析摊牌结果"""
         analysis = {
@@ -642,58 +799,46 @@ class FullHandService:
         if not engine.players:
             return analysis
         
-        # 使用 treys 评估牌力
-        can_evaluate = (HAS_TREYS and 
-                       engine.community_cards and 
-                       len(engine.community_cards) == 5)
+        # 查表评估牌力
+        can_evaluate = len(engine.board) == 5
         
         if can_evaluate:
             try:
-                evaluator = Evaluator()
-                board_cards = [Card.new(c) for c in engine.community_cards if len(c) == 2]
+                shown = [p for p in engine.players if p.hole_ids]
+                holes = [p.hole_ids for p in shown]
+                results = self._evaluate_showdown_hands(engine.board, holes)
+                equities = self._flop_equities(engine.board, holes, [p.in_hand for p in shown])
                 
-                if len(board_cards) == 5:
-                    player_results = []
-                    for p in engine.players:
-                        if not p.hole_cards:
-                            continue
-                        
-                        hole_cards = [Card.new(c) for c in p.hole_cards if len(c) == 2]
-                        if len(hole_cards) == 2:
-                            score = evaluator.evaluate(board_cards, hole_cards)
-                            hand_rank = evaluator.get_rank_class(score)
-                            hand_name = evaluator.class_to_string(hand_rank)
-                        else:
-                            score = 9999
-                            hand_name = "未知"
+                player_results = []
+                for p, (score, hand_name), equity in zip(shown, results, equities):
+                    player_result = {
+                        "seat": p.seat,
+                        "position": p.position,
+                        "hole_cards": p.hole_cards,
+                        "is_hero": p.is_hero,
+                        "in_hand": p.in_hand,
+                        "total_committed": p.total_committed,
+                        "score": score,
+                        "hand_name": hand_name,
+                        "flop_equity": equity,
+                        "is_winner": False,
+                    }
+                    player_results.append(player_result)
+                
+                # 确定赢家
+                if player_results:
+                    in_hand_results = [pr for pr in player_results if pr["in_hand"]]
+                    if in_hand_results:
+                        winner = min(in_hand_results, key=lambda x: x["score"])
+                        winner["is_winner"] = True
                         
-                        player_result = {
-                            "seat": p.seat,
-                            "position": p.position,
-                            "hole_cards": p.hole_cards,
-                            "is_hero": p.is_hero,
-                            "in_hand": p.in_hand,
-                            "total_committed": p.total_committed,
-                            "score": score,
-                            "hand_name": hand_name,
-                            "is_winner": False,
+                        analysis["winner_analysis"] = {
+                            "position": winner["position"],
+                            "hand_name": winner["hand_name"],
+                            "hole_cards": winner["hole_cards"],
                         }
-                        player_results.append(player_result)
-                    
-                    # 确定赢家
-                    if player_results:
-                        in_hand_results = [pr for pr in player_results if pr["in_hand"]]
-                        if in_hand_results:
-                            winner = min(in_hand_results, key=lambda x: x["score"])
-                            winner["is_winner"] = True
-                            
-                            analysis["winner_analysis"] = {
-                                "position": winner["position"],
-                                "hand_name": winner["hand_name"],
-                                "hole_cards": winner["hole_cards"],
-                            }
-                    
-                    analysis["players"] = sorted(player_results, key=lambda x: (not x["in_hand"], x["score"]))
+                
+                analysis["players"] = sorted(player_results, key=lambda x: (not x["in_hand"], x["score"]))
             except Exception as e:
                 print(f"Error in showdown analysis: {e}")
         
@@ -709,6 +854,7 @@ class FullHandService:
                     "total_committed": p.total_committed,
                     "score": 9999,
                     "hand_name": "未知" if p.in_hand else "弃牌",
+                    "flop_equity": None,
                     "is_winner": False,
                 })
         
@@ -755,8 +901,8 @@ class FullHandService:
         return "摊牌结果分析中..."
     
     def get_review(self, session_id: int, user: User) -> Dict[str, Any]:
-        """获取复盘 - 增强版，包含详细牌局分析"""
-        session = self.db.query(FullHandSession).filter(
+        """获取复盘 - 读取牌局结束时物化的复盘，缺失或版本落后时重新计算"""
+        session = self.db.query(FullHandSession).options(undefer(FullHandSession.review)).filter(
             FullHandSession.id == session_id,
             FullHandSession.user_id == user.id
         ).first()
@@ -764,237 +910,74 @@ class FullHandService:
         if not session:
             raise ValueError("Session not found")
         
-        # 生成复盘（直接使用数据库中的数据）
         review = {
             "hand_id": session_id,
             "result_bb": round(session.result_bb, 2) if session.result_bb is not None else 0.0,
             "ended_by": session.ended_by or "in_progress",
             "action_log": session.action_log,
             "can_replay": user.is_subscribed,
-            "preflop_spot": None,
-            "flop_spot": None,
         }
-        
-        # 添加详细牌局分析
-        showdown_analysis = self._analyze_showdown(session)
-        review["showdown_analysis"] = showdown_analysis
-        
-        # 翻前关键点
-        if session.preflop_key_spot:
-            spot = session.preflop_key_spot
-            review["preflop_spot"] = {
-                "context_id": spot.get("context_id"),
-                "strategy": spot.get("strategy") if user.is_subscribed else None,
-                "user_action": spot.get("user_action"),
-                "user_action_prob": spot.get("user_action_prob") if user.is_subscribed else None,
-                "best_action": spot.get("best_action"),
-                "grade": spot.get("grade"),
-            }
-        
-        # 翻牌关键点
-        if session.flop_key_spot:
-            spot = session.flop_key_spot
-            review["flop_spot"] = {
-                "context_id": spot.get("context_id"),
-                "pot_type": spot.get("pot_type"),
-                "ip_oop": spot.get("ip_oop"),
-                "spr_bucket": spot.get("spr_bucket"),
-                "board": spot.get("board"),
-                "hero_hand": spot.get("hero_hand"),
-                "hero_hand_bucket": spot.get("hero_hand_bucket"),
-                "strategy": spot.get("strategy") if user.is_subscribed else None,
-                "legal_actions": spot.get("legal_actions"),
-                "user_action": spot.get("user_action"),
-                "user_action_prob": spot.get("user_action_prob") if user.is_subscribed else None,
-                "best_action": spot.get("best_action"),
-                "grade": spot.get("grade"),
-                "explanation": spot.get("explanation", ""),
-            }
-        
+        review.update(present_review(self._load_review(session), user.is_subscribed))
         return review
     
-    def _analyze_showdown(self, session: FullHandSession) -> Dict[str, Any]:
-        """分析摊牌结果，返回详细的牌局分析 - 使用 seed 重新生成完整游戏状态"""
-        analysis = {
-            "community_cards": session.community_cards or [],
-            "pot": session.pot or 0,
-            "players": [],
-            "hero_analysis": None,
-            "winner_analysis": None,
-            "explanation": "",
-        }
-        
-        if not session.players or not session.hand_seed:
-            return analysis
-        
-        # 使用相同的 seed 重新初始化引擎来获取完整游戏状态
-        try:
-            engine = FullHandEngine(stack_bb=session.stack_bb, seed=session.hand_seed)
-            engine.initialize_game()
-            
-            # 重放所有行动到结束
-            for action_dict in session.action_log or []:
-                if action_dict["action"] not in ["sb", "bb"]:
-                    engine._to_act_seat = action_dict["seat"]
-                    try:
-                        engine.process_action(action_dict["action"], action_dict.get("amount"))
-                    except:
-                        pass
-            
-            # 如果 action log 不完整（游戏已结束但引擎还没结束），自动完成游戏
-            if session.ended_by and not engine.ended_by:
-                # 自动 check 到摊牌
-                max_steps = 20
-                step = 0
-                while engine.street.value not in ["showdown", "ENDED"] and step < max_steps:
-                    legal = engine.get_legal_actions(engine._to_act_seat)
-                    if not legal:
-                        break
-                    if "check" in legal:
-                        engine.process_action("check")
-                    elif "call" in legal:
-                        engine.process_action("call")
-                    else:
-                        engine.process_action("fold")
-                    step += 1
-            
-            # 获取完整玩家信息（包括所有手牌）
-            players_data = []
-            for p in engine.players:
-                players_data.append({
-                    "seat": p.seat,
-                    "position": p.position,
-                    "hole_cards": p.hole_cards,
-                    "is_hero": p.is_hero,
-                    "in_hand": p.in_hand,
-                    "total_committed": p.total_committed,
-                })
-            
-            analysis["community_cards"] = engine.community_cards
-            analysis["pot"] = engine.pot
-        except Exception as e:
-            print(f"Error replaying game: {e}")
-            # 回退到数据库中的数据
-            players_data = session.players if isinstance(session.players, list) else []
-        
-        # 使用 treys 评估牌力（需要完整 5 张公共牌）
-        can_evaluate = (HAS_TREYS and 
-                       analysis["community_cards"] and 
-                       len(analysis["community_cards"]) == 5)
-        
-        if can_evaluate:
+    def _load_review(self, session: FullHandSession) -> Dict[str, Any]:
+        """
+        读取物化复盘；进行中的牌局按当前状态临时生成 (不保存)
+        已结束但缺失或版本落后的复盘重新计算后写回，之后的查看直接读取
+        """
+        if session.review is not None and session.review_version == REVIEW_VERSION:
+            return unpack_review(session.review)
+        
+        review = self._build_review(self._review_engine(session))
+        if session.status == "ENDED":
+            self._store_review(session, review)
             try:
-                evaluator = Evaluator()
-                board_cards = [Card.new(c) for c in analysis["community_cards"] if len(c) == 2]
-                
-                if len(board_cards) == 5:
-                    player_results = []
-                    for p in players_data:
-                        if not p.get("hole_cards"):
-                            continue
-                        
-                        hole_cards = [Card.new(c) for c in p["hole_cards"] if len(c) == 2]
-                        if len(hole_cards) == 2:
-                            score = evaluator.evaluate(board_cards, hole_cards)
-                            hand_rank = evaluator.get_rank_class(score)
-                            hand_name = evaluator.class_to_string(hand_rank)
-                        else:
-                            score = 9999
-                            hand_name = "未知"
-                        
-                        player_result = {
-                            "seat": p.get("seat"),
-                            "position": p.get("position"),
-                            "hole_cards": p.get("hole_cards"),
-                            "is_hero": p.get("is_hero", False),
-                            "in_hand": p.get("in_hand", False),
-                            "total_committed": p.get("total_committed", 0),
-                            "score": score,
-                            "hand_name": hand_name,
-                            "is_winner": False,
-                        }
-                        player_results.append(player_result)
-                    
-                    # 确定赢家
-                    if player_results:
-                        in_hand_results = [pr for pr in player_results if pr["in_hand"]]
-                        if in_hand_results:
-                            winner = min(in_hand_results, key=lambda x: x["score"])
-                            winner["is_winner"] = True
-                            
-                            analysis["winner_analysis"] = {
-                                "position": winner["position"],
-                                "hand_name": winner["hand_name"],
-                                "hole_cards": winner["hole_cards"],
-                            }
-                    
-                    analysis["players"] = sorted(player_results, key=lambda x: (not x["in_hand"], x["score"]))
-                else:
-                    can_evaluate = False
-            except Exception as e:
-                print(f"Error in showdown analysis: {e}")
-                can_evaluate = False
-        
-        # 无法评估时的简化显示
-        if not analysis["players"]:
-            analysis["players"] = []
-            for p in players_data:
-                analysis["players"].append({
-                    "seat": p.get("seat"),
-                    "position": p.get("position"),
-                    "hole_cards": p.get("hole_cards") or [],
-                    "is_hero": p.get("is_hero", False),
-                    "in_hand": p.get("in_hand", False),
-                    "total_committed": p.get("total_committed", 0),
-                    "score": 9999,
-                    "hand_name": "未知" if p.get("in_hand") else "弃牌",
-                    "is_winner": False,
-                })
-        
-        # 生成解释文字
-        analysis["explanation"] = self._generate_explanation(analysis, session)
-        
-        return analysis
+                self.db.commit()
+            except StaleDataError:
+                # 后台重算任务已写入同一手
+                self.db.rollback()
+        return review
     
-    def _generate_explanation(self, analysis: Dict, session: FullHandSession) -> str:
-        """生成输赢解释文字"""
-        players = analysis.get("players", [])
-        hero = next((p for p in players if p.get("is_hero")), None)
-        winner = next((p for p in players if p.get("is_winner")), None)
-        
-        if not hero:
-            return "无法获取 Hero 信息"
-        
-        if session.ended_by == "fold":
-            return f"本局通过弃牌结束。你在本局投入了 {hero.get('total_committed', 0):.1f} BB。"
-        
-        if not hero.get("in_hand"):
-            return f"你在摊牌前弃牌，失去了底池。本局投入了 {hero.get('total_committed', 0):.1f} BB。"
-        
-        hero_hand = hero.get("hand_name", "未知")
-        
-        if winner and winner.get("is_hero"):
-            # Hero 获胜
-            other_players = [p for p in players if p.get("in_hand") and not p.get("is_hero")]
-            if other_players:
-                best_opponent = min(other_players, key=lambda x: x.get("score", 9999))
-                return f"🎉 恭喜你获胜！你的 {hero_hand} 击败了对手的 {best_opponent.get('hand_name', '未知')}。赢得 {session.pot:.1f} BB！"
-            return f"🎉 恭喜你获胜！你的 {hero_hand} 是最大牌。赢得 {session.pot:.1f} BB！"
-        elif winner:
-            # Hero 输了
-            winner_hand = winner.get("hand_name", "未知")
-            winner_cards = winner.get("hole_cards", [])
-            winner_pos = winner.get("position", "对手")
-            
-            explanation = f"😔 你输了。你的 {hero_hand} 不敌 {winner_pos} 的 {winner_hand}。\n\n"
-            explanation += f"📊 详细对比:\n"
-            explanation += f"  你: {hero.get('hole_cards', [])} → {hero_hand}\n"
-            explanation += f"  {winner_pos}: {winner_cards} → {winner_hand}\n"
-            explanation += f"  公共牌: {analysis.get('community_cards', [])}\n\n"
-            explanation += f"💰 你投入了 {hero.get('total_committed', 0):.1f} BB，本局损失 {abs(session.result_bb or 0):.1f} BB。"
-            return explanation
+    def _review_engine(self, session: FullHandSession) -> FullHandEngine:
+        """恢复生成复盘所用的引擎；已结束的牌局是终局状态"""
+        engine = self._restore_engine(session)
+        if session.status == "ENDED" and engine.status != GameStatus.ENDED:
+            # 没有快照的旧会话按 seed 重放，快进的转牌、河牌不在行动记录中，这里补上
+            self._fast_forward(engine)
+        return engine
+    
+    def recompute_reviews(self, after_id: int = 0, limit: int = 200) -> Tuple[int, Optional[int]]:
+        """
+        重新计算 id > after_id 的已结束牌局中缺失或版本落后的复盘 (后台任务，每次一批)
+        返回 (写入条数, 本批最后一个 id)；没有待处理的牌局时 id 为 None
+        与其他 worker 同时写入同一批时整批回滚，返回 (0, after_id) 由调用方重试
+        """
+        sessions = self.db.query(FullHandSession).options(undefer(FullHandSession.engine_snapshot)).filter(
+            FullHandSession.id > after_id,
+            FullHandSession.status == "ENDED",
+            or_(FullHandSession.review_version.is_(None), FullHandSession.review_version != REVIEW_VERSION),
+        ).order_by(FullHandSession.id).limit(limit).all()
+        
+        if not sessions:
+            return 0, None
+        
+        last_id = sessions[-1].id
+        updated = 0
+        for session in sessions:
+            try:
+                review = self._build_review(self._review_engine(session))
+            except Exception:
+                logger.exception(f"Failed to rebuild review of session {session.id}")
+                continue
+            self._store_review(session, review)
+            updated += 1
         
-        return "摊牌结果分析中..."
+        try:
+            self.db.commit()
+        except StaleDataError:
+            self.db.rollback()
+            return 0, after_id
+        return updated, last_id
     
     def replay_hand(self, session_id: int, user: User) -> FullHandSession:
         """重打同一手"""
@@ -1010,39 +993,80 @@ class FullHandService:
             raise ValueError("Session not found")
         
         # 使用相同 seed 创建新会话
-        return self.create_session(user, session.stack_bb, replay_seed=session.hand_seed)
+        return self.create_session(user, session.stack_bb, replay_seed=session.hand_seed,
+                                   ai_level=session.ai_level or DEFAULT_AI_LEVEL)
+    
+    def _record_daily_stats(self, session: FullHandSession) -> None:
+        """
+        把刚结束的一手累加到当日汇总，由调用方与会话更新一起提交
+        已有当日行时原子累加 (UPDATE ... SET x = x + ?)；当天第一手插入新行，
+        与并发插入在唯一约束上冲突时回滚到保存点后改为累加
+        """
+        day = session.completed_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        increments = self._daily_increments(session)
+        if self._increment_daily_stats(session.user_id, day, increments):
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.add(FullHandStats(user_id=session.user_id, date=day, **increments))
+        except IntegrityError:
+            self._increment_daily_stats(session.user_id, day, increments)
+    
+    def _increment_daily_stats(self, user_id: int, day: datetime, increments: Dict[str, Any]) -> bool:
+        """累加已有的当日汇总行，返回是否存在该行"""
+        updated = self.db.query(FullHandStats).filter(
+            FullHandStats.user_id == user_id,
+            FullHandStats.date == day,
+        ).update(
+            {getattr(FullHandStats, key): getattr(FullHandStats, key) + value for key, value in increments.items()},
+            synchronize_session=False,
+        )
+        return updated > 0
+    
+    def _daily_increments(self, session: FullHandSession) -> Dict[str, Any]:
+        """一手已结束牌局对当日汇总各列的增量"""
+        started = _naive_utc(session.created_at)
+        duration = session.completed_at - started if started else timedelta(0)
+        increments = {
+            "total_hands": 1,
+            "total_result_bb": session.result_bb or 0.0,
+            "total_duration_ms": max(0, int(duration.total_seconds() * 1000)),
+            "preflop_key_spots": 0, "preflop_total": 0, "preflop_correct": 0,
+            "flop_key_spots": 0, "flop_total": 0, "flop_correct": 0,
+        }
+        for street, spot in (("preflop", session.preflop_key_spot), ("flop", session.flop_key_spot)):
+            if spot:
+                increments[f"{street}_key_spots"] = 1
+                if spot.get("grade"):
+                    increments[f"{street}_total"] = 1
+                    increments[f"{street}_correct"] = int(spot["grade"] in self.CORRECT_GRADES)
+        return increments
     
     def get_stats(self, user: User) -> Dict[str, Any]:
-        """获取统计"""
+        """获取统计 - 总体统计只读每日汇总，开销与已玩手数无关"""
         # 总体统计
-        total_hands = self.db.query(FullHandSession).filter(
-            FullHandSession.user_id == user.id,
-            FullHandSession.status == "ENDED"
-        ).count()
-        
-        total_result = self.db.query(FullHandSession).filter(
-            FullHandSession.user_id == user.id,
-            FullHandSession.status == "ENDED"
-        ).all()
+        (total_hands, total_bb, preflop_correct, preflop_total,
+         flop_correct, flop_total) = self.db.query(
+            func.coalesce(func.sum(FullHandStats.total_hands), 0),
+            func.coalesce(func.sum(FullHandStats.total_result_bb), 0.0),
+            func.coalesce(func.sum(FullHandStats.preflop_correct), 0),
+            func.coalesce(func.sum(FullHandStats.preflop_total), 0),
+            func.coalesce(func.sum(FullHandStats.flop_correct), 0),
+            func.coalesce(func.sum(FullHandStats.flop_total), 0),
+        ).filter(FullHandStats.user_id == user.id).one()
         
-        total_bb = sum(s.result_bb or 0 for s in total_result)
         avg_bb = total_bb / total_hands if total_hands > 0 else 0
         
-        # 今日统计
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_hands = self.db.query(FullHandSession).filter(
-            FullHandSession.user_id == user.id,
-            FullHandSession.created_at >= today
-        ).count()
-        
+        # 今日统计: 与开局检查使用同一个计数 (今日开局数)，剩余额度由它推出
+        today_hands = self._today_session_count(user)
         remaining = -1 if user.is_subscribed else max(0, self.FREE_DAILY_LIMIT - today_hands)
         
         return {
             "total_hands": total_hands,
             "total_result_bb": round(total_bb, 2),
             "avg_result_bb": round(avg_bb, 2),
-            "preflop_accuracy": None,  # 可从数据库计算
-            "flop_accuracy": None,
+            "preflop_accuracy": round(preflop_correct / preflop_total * 100, 1) if preflop_total else None,
+            "flop_accuracy": round(flop_correct / flop_total * 100, 1) if flop_total else None,
             "today_hands": today_hands,
             "today_remaining": remaining,
             "is_pro": user.is_subscribed,
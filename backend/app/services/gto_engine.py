@@ -4,63 +4,40 @@ GTO (Game Theory Optimal) 翻前策略引擎
 支持 6max 50bb 和 100bb
 """
 
+from collections import Counter, OrderedDict
 from typing import Dict, List, Optional, Tuple
+import os
 import random
+import threading
 
+import numpy as np
+
+from app.services.cards import (
+    SUITS, RANKS, HAND_CLASSES, HAND_CLASS_INDEX, HAND_CLASS_TYPE, HAND_CLASS_RANK,
+    hand_type_of, hand_rank_of,
+)
+from app.services.sampling import alias_draw, alias_sample, build_alias_tables
+from app.services.strategy_store import get_strategy_store, preflop_table_name
 
-# 扑克牌定义
-SUITS = ['s', 'h', 'd', 'c']  # 黑桃、红桃、方块、梅花
-RANKS = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
 
 # 生成所有起手牌组合
 def generate_all_hands() -> List[str]:
-    hands = []
-    for i, r1 in enumerate(RANKS):
-        for j, r2 in enumerate(RANKS):
-            if i == j:
-                hands.append(f"{r1}{r2}")  # 对子
-            elif i < j:
-                hands.append(f"{r1}{r2}s")  # 同花
-            else:
-                hands.append(f"{r2}{r1}o")  # 不同花
-    return hands
+    return list(HAND_CLASSES)
 
 ALL_HANDS = generate_all_hands()
+HAND_INDEX = HAND_CLASS_INDEX
 
 # 手牌强度分类
 def get_hand_type(hand: str) -> str:
     """分类手牌类型"""
-    if len(hand) == 2:
-        return "pair"
-    elif hand.endswith('s'):
-        return "suited"
-    else:
-        return "offsuit"
+    idx = HAND_CLASS_INDEX.get(hand)
+    return HAND_CLASS_TYPE[idx] if idx is not None else hand_type_of(hand)
 
 
 def get_hand_rank(hand: str) -> int:
     """获取手牌强度等级 (1-169, 1是AA最强)"""
-    hand_type = get_hand_type(hand)
-    r1, r2 = hand[0], hand[1]
-    idx1 = RANKS.index(r1)
-    idx2 = RANKS.index(r2)
-    
-    if hand_type == "pair":
-        # 对子: AA=1, KK=2, ... 22=13
-        return idx1 + 1
-    else:
-        # 非对子
-        base = 13
-        if hand_type == "suited":
-            # 同花比不同花强
-            base = 13 + (12 * 13)  # 对子 + 同花部分
-            pair_idx = min(idx1, idx2) * 13 + max(idx1, idx2)
-            return base + pair_idx
-        else:
-            # 不同花
-            base = 13 + (12 * 13) + (12 * 13)  # 对子 + 同花 + 不同花
-            pair_idx = min(idx1, idx2) * 13 + max(idx1, idx2)
-            return base + pair_idx
+    idx = HAND_CLASS_INDEX.get(hand)
+    return HAND_CLASS_RANK[idx] if idx is not None else hand_rank_of(hand)
 
 
 # ==================== GTO 策略数据 ====================
@@ -88,36 +65,158 @@ class GTOStrategy:
         'vs_all_in': '前面有人 All-in',
     }
     
-    def __init__(self, stack_size: int = 100):
+    # 加注尺度网格 (BB)，任意 vs_raise_XXbb 场景都归入最近的一档
+    RAISE_SIZE_BUCKETS = (2.0, 2.5, 3.0, 4.0)
+    DEFAULT_RAISE_SIZE = 2.5
+    
+    # 不在表中的场景按规则计算后的记忆化条目上限
+    FALLBACK_CACHE_SIZE = 1024
+    
+    # 策略张量的行动轴，频率相同时按此顺序取最佳行动
+    ACTIONS = ['raise_2.5bb', 'raise_3bb', 'raise_4bb', 'raise_3x', 'raise_all_in',
+               'check', 'call', 'limp', 'fold']
+    
+    # 频率输出保留的小数位 (张量以 float32 存储)
+    FREQ_DECIMALS = 4
+    
+    # 训练场景按决策清晰度筛选手牌池的阈值
+    EASY_POOL_CLARITY = 0.7
+    HARD_POOL_CLARITY = 0.5
+    
+    # 单手牌难度分级阈值 (与 _calculate_difficulty 一致)
+    DIFFICULTY_LEVELS = ['easy', 'normal', 'hard']
+    EASY_CLARITY = 0.6
+    HARD_CLARITY = 0.3
+    
+    def __init__(self, stack_size: int = 100, table: Optional[np.ndarray] = None):
         self.stack_size = stack_size
-        self._load_strategy()
+        self.contexts = list(self.ACTIONS_TO_YOU.keys())
+        self.actions = self.action_labels(stack_size)
+        self._position_index = {p: i for i, p in enumerate(self.POSITIONS)}
+        self._context_index = {c: i for i, c in enumerate(self.contexts)}
+        self._action_index = {a: i for i, a in enumerate(self.actions)}
+        self._fallback_cache: "OrderedDict[Tuple[str, str, str], Dict[str, float]]" = OrderedDict()
+        self._lookup_hits: Counter = Counter()
+        self._lookup_misses: Counter = Counter()
+        self._load_strategy(table)
+    
+    @classmethod
+    def raise_context(cls, raise_size: float) -> str:
+        """加注尺度 (BB) -> 网格中最近一档的场景名，超出网格时取两端"""
+        bucket = min(cls.RAISE_SIZE_BUCKETS, key=lambda b: (abs(b - raise_size), b))
+        return f"vs_raise_{bucket:g}bb"
+    
+    def resolve_context(self, action_to_you: str) -> Optional[str]:
+        """
+        将场景映射到策略表中的场景
+        vs_raise_XXbb 按加注尺度归入网格，无法识别时返回 None
+        """
+        if action_to_you in self._context_index:
+            return action_to_you
+        if action_to_you.startswith('vs_raise'):
+            try:
+                raise_size = float(action_to_you.split('_')[-1].replace('bb', ''))
+            except ValueError:
+                raise_size = self.DEFAULT_RAISE_SIZE  # 与 _calculate_hand_strategy 的默认值一致
+            return self.raise_context(raise_size)
+        return None
+    
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """按场景统计策略查询的命中 (查表) / 未命中 (按规则计算) 次数"""
+        contexts = set(self._lookup_hits) | set(self._lookup_misses)
+        return {
+            ctx: {'hits': self._lookup_hits[ctx], 'misses': self._lookup_misses[ctx]}
+            for ctx in sorted(contexts)
+        }
     
-    def _load_strategy(self):
-        """加载 GTO 策略数据"""
-        # 简化版 GTO 策略矩阵
-        # 在实际应用中，这些数据应该从数据库或外部文件加载
-        self.strategy = self._build_simplified_strategy()
+    @classmethod
+    def action_labels(cls, stack_size: int) -> List[str]:
+        """行动轴标签 (短筹码时 SB 有直接推满的尺度)"""
+        labels = list(cls.ACTIONS)
+        shove = f'raise_{stack_size}bb'
+        if stack_size <= 20 and shove not in labels:
+            labels.insert(0, shove)
+        return labels
+    
+    @property
+    def table_shape(self) -> Tuple[int, int, int, int]:
+        return (len(self.POSITIONS), len(self.contexts), len(ALL_HANDS), len(self.actions))
+    
+    def _load_strategy(self, table: Optional[np.ndarray] = None):
+        """加载 GTO 策略数据 (预编译表或按规则构建)"""
+        if table is not None and table.shape == self.table_shape:
+            self.table = table
+        else:
+            # 简化版 GTO 策略矩阵
+            self.table = self._build_simplified_strategy()
+        self._build_clarity_index()
+        # 每格一张别名表，混合策略采样 O(1)；全零的格子按弃牌处理 (fold 是行动轴最后一列)
+        self.alias_accept, self.alias_index = build_alias_tables(self.table)
     
-    def _build_simplified_strategy(self) -> Dict:
+    def _build_clarity_index(self) -> None:
+        """
+        预计算决策清晰度索引
+        clarity[位置, 场景, 手牌] = 最高频率 - 次高频率，并按难度划分候选手牌池
+        """
+        # 与 get_strategy 相同的舍入，保证和逐手计算的结果一致
+        freqs = np.round(self.table.astype(np.float64), self.FREQ_DECIMALS)
+        top_two = -np.sort(-freqs, axis=-1)[..., :2]
+        single_action = np.count_nonzero(freqs, axis=-1) < 2
+        self.clarity = np.where(single_action, 1.0, top_two[..., 0] - top_two[..., 1])
+        
+        self.difficulty_codes = np.where(
+            self.clarity > self.EASY_CLARITY, 0,
+            np.where(self.clarity < self.HARD_CLARITY, 2, 1),
+        ).astype(np.uint8)
+        
+        self._hand_pools: Dict[Tuple[str, str, str], List[str]] = {}
+        for pos_idx, pos in enumerate(self.POSITIONS):
+            for ctx_idx, ctx in enumerate(self.contexts):
+                clarity = self.clarity[pos_idx, ctx_idx]
+                self._hand_pools[(pos, ctx, 'easy')] = [
+                    ALL_HANDS[i] for i in np.flatnonzero(clarity > self.EASY_POOL_CLARITY)
+                ]
+                self._hand_pools[(pos, ctx, 'hard')] = [
+                    ALL_HANDS[i] for i in np.flatnonzero(clarity < self.HARD_POOL_CLARITY)
+                ]
+                self._hand_pools[(pos, ctx, 'normal')] = ALL_HANDS
+    
+    def get_hand_pool(self, position: str, action_to_you: str, difficulty: str) -> Optional[List[str]]:
+        """获取按难度预筛选的候选手牌池，不在表中时返回 None"""
+        context = self.resolve_context(action_to_you)
+        if context is None:
+            return None
+        return self._hand_pools.get((position, context, difficulty))
+    
+    def get_difficulty(self, hand: str, position: str, action_to_you: str) -> Optional[str]:
+        """获取单手牌的难度等级，不在表中时返回 None"""
+        pos_idx = self._position_index.get(position)
+        ctx_idx = self._context_index.get(self.resolve_context(action_to_you))
+        hand_idx = HAND_INDEX.get(hand)
+        if pos_idx is None or ctx_idx is None or hand_idx is None:
+            return None
+        return self.DIFFICULTY_LEVELS[self.difficulty_codes[pos_idx, ctx_idx, hand_idx]]
+    
+    def _build_simplified_strategy(self) -> np.ndarray:
         """
         构建简化的 GTO 策略
         基于常见的 GTO 开牌范围和跟注/3bet 范围
+        返回形状为 (位置, 场景, 手牌, 行动) 的频率张量
         """
-        strategy = {}
+        table = np.zeros(self.table_shape, dtype=np.float32)
         
-        for pos in self.POSITIONS:
-            strategy[pos] = {}
-            for action in self.ACTIONS_TO_YOU.keys():
-                strategy[pos][action] = self._get_position_strategy(pos, action)
+        for pos_idx, pos in enumerate(self.POSITIONS):
+            for ctx_idx, action in enumerate(self.contexts):
+                table[pos_idx, ctx_idx] = self._get_position_strategy(pos, action)
         
-        return strategy
+        return table
     
-    def _get_position_strategy(self, position: str, action_to_you: str) -> Dict[str, Dict]:
+    def _get_position_strategy(self, position: str, action_to_you: str) -> np.ndarray:
         """
         获取特定位置和行动的 GTO 策略
-        返回格式: {hand: {action: frequency}}
+        返回形状为 (手牌, 行动) 的频率矩阵
         """
-        strategy = {}
+        block = np.zeros((len(ALL_HANDS), len(self.actions)), dtype=np.float32)
         
         # 根据筹码深度调整
         if self.stack_size <= 50:
@@ -125,12 +224,14 @@ class GTOStrategy:
         else:
             open_raise_size = "raise_2.5bb"
         
-        for hand in ALL_HANDS:
-            strategy[hand] = self._calculate_hand_strategy(
+        for hand_idx, hand in enumerate(ALL_HANDS):
+            hand_strategy = self._calculate_hand_strategy(
                 hand, position, action_to_you, open_raise_size
             )
+            for action, freq in hand_strategy.items():
+                block[hand_idx, self._action_index[action]] = freq
         
-        return strategy
+        return block
     
     def _calculate_hand_strategy(self, hand: str, position: str, 
                                   action_to_you: str, open_raise_size: str) -> Dict[str, float]:
@@ -265,28 +366,113 @@ class GTOStrategy:
         else:
             return {'fold': 1.0}
     
+    def _cell_index(self, hand: str, position: str, action_to_you: str) -> Optional[Tuple[int, int, int]]:
+        """策略张量中的格子下标 (加注尺度按网格归档)，不在表中时返回 None"""
+        pos_idx = self._position_index.get(position)
+        ctx_idx = self._context_index.get(self.resolve_context(action_to_you))
+        hand_idx = HAND_INDEX.get(hand)
+        if pos_idx is None or ctx_idx is None or hand_idx is None:
+            return None
+        return pos_idx, ctx_idx, hand_idx
+    
+    def _lookup(self, hand: str, position: str, action_to_you: str) -> Optional[np.ndarray]:
+        """定位策略张量中的一行，不在表中时返回 None"""
+        cell = self._cell_index(hand, position, action_to_you)
+        if cell is None:
+            return None
+        self._lookup_hits[self.contexts[cell[1]]] += 1
+        return self.table[cell]
+    
+    def _fallback_strategy(self, hand: str, position: str, action_to_you: str) -> Dict[str, float]:
+        """不在表中的输入按规则计算，结果记忆化 (有界)"""
+        key = (hand, position, action_to_you)
+        stats_key = self.resolve_context(action_to_you) or 'other'
+        strategy = self._fallback_cache.get(key)
+        if strategy is not None:
+            self._fallback_cache.move_to_end(key)
+            self._lookup_hits[stats_key] += 1
+            return dict(strategy)
+        
+        self._lookup_misses[stats_key] += 1
+        strategy = self._calculate_hand_strategy(hand, position, action_to_you, "raise_2.5bb")
+        self._fallback_cache[key] = strategy
+        while len(self._fallback_cache) > self.FALLBACK_CACHE_SIZE:
+            self._fallback_cache.popitem(last=False)
+        return dict(strategy)
+    
+    def _row_to_dict(self, row: np.ndarray) -> Dict[str, float]:
+        """将行动频率行转换为 {action: frequency}"""
+        return {
+            self.actions[i]: round(float(row[i]), self.FREQ_DECIMALS)
+            for i in np.flatnonzero(row)
+        }
+    
     def get_strategy(self, hand: str, position: str, action_to_you: str) -> Dict[str, float]:
         """获取特定手牌的 GTO 策略"""
-        hand_key = hand if hand in self.strategy.get(position, {}).get(action_to_you, {}) else None
+        row = self._lookup(hand, position, action_to_you)
         
-        if hand_key is None:
+        if row is None:
             # 返回默认策略
-            return self._calculate_hand_strategy(hand, position, action_to_you, "raise_2.5bb")
+            return self._fallback_strategy(hand, position, action_to_you)
         
-        return self.strategy[position][action_to_you].get(hand, {'fold': 1.0})
+        return self._row_to_dict(row) or {'fold': 1.0}
     
     def get_best_action(self, hand: str, position: str, action_to_you: str) -> str:
         """获取最佳行动 (频率最高的)"""
-        strategy = self.get_strategy(hand, position, action_to_you)
-        return max(strategy.items(), key=lambda x: x[1])[0]
+        row = self._lookup(hand, position, action_to_you)
+        if row is None:
+            strategy = self._fallback_strategy(hand, position, action_to_you)
+            return max(strategy.items(), key=lambda x: x[1])[0]
+        if not row.any():
+            return 'fold'
+        return self.actions[int(row.argmax())]
+    
+    def get_range_grid(self, position: str, action_to_you: str) -> Optional[Dict[str, List[float]]]:
+        """
+        获取整张 13x13 范围表，不在表中时返回 None
+        返回 {action: 按 ALL_HANDS 顺序的 169 个频率}，只包含出现过的行动
+        """
+        pos_idx = self._position_index.get(position)
+        ctx_idx = self._context_index.get(self.resolve_context(action_to_you))
+        if pos_idx is None or ctx_idx is None:
+            return None
+        
+        block = np.round(self.table[pos_idx, ctx_idx].astype(np.float64), self.FREQ_DECIMALS)
+        return {
+            self.actions[i]: block[:, i].tolist()
+            for i in np.flatnonzero(block.any(axis=0))
+        }
     
     def sample_action(self, hand: str, position: str, action_to_you: str) -> str:
-        """根据 GTO 频率采样行动"""
-        strategy = self.get_strategy(hand, position, action_to_you)
-        actions = list(strategy.keys())
-        frequencies = list(strategy.values())
+        """根据 GTO 频率采样行动 (查别名表，单次 O(1))"""
+        cell = self._cell_index(hand, position, action_to_you)
+        if cell is None:
+            strategy = self.get_strategy(hand, position, action_to_you)
+            return random.choices(list(strategy.keys()), weights=list(strategy.values()), k=1)[0]
         
-        return random.choices(actions, weights=frequencies, k=1)[0]
+        self._lookup_hits[self.contexts[cell[1]]] += 1
+        return self.actions[alias_draw(self.alias_accept[cell], self.alias_index[cell], random.random())]
+    
+    def sample_actions(self, hands, positions, contexts, rng: np.random.Generator) -> np.ndarray:
+        """
+        向量化批量采样
+        hands / positions / contexts: ALL_HANDS / POSITIONS / contexts 中的下标数组 (可相互广播)，
+        位置和场景也可以直接传名字
+        返回行动下标数组 (对应 self.actions)，结果由 rng 的种子完全确定
+        """
+        if isinstance(positions, str):
+            positions = self._position_index[positions]
+        if isinstance(contexts, str):
+            context = self.resolve_context(contexts)
+            if context is None:
+                raise ValueError(f"Unknown context: {contexts}")
+            contexts = self._context_index[context]
+        
+        pos_idx, ctx_idx, hand_idx = np.broadcast_arrays(positions, contexts, hands)
+        shape = hand_idx.shape
+        accept = self.alias_accept[pos_idx.ravel(), ctx_idx.ravel(), hand_idx.ravel()]
+        alias = self.alias_index[pos_idx.ravel(), ctx_idx.ravel(), hand_idx.ravel()]
+        return alias_sample(accept, alias, rng).reshape(shape)
     
     def is_action_correct(self, hand: str, position: str, action_to_you: str, 
                           user_action: str, tolerance: float = 0.1) -> bool:
@@ -346,15 +532,129 @@ class GTOStrategy:
         return " ".join(explanations)
 
 
-# 全局策略实例缓存
-_strategy_cache: Dict[int, GTOStrategy] = {}
+# 预编译进策略库的筹码深度
+PRECOMPUTED_STACKS = (20, 25, 30, 40, 50, 60, 75, 100, 150, 200)
+
+# 插值服务的筹码深度范围 (两端都是预编译深度)
+INTERPOLATION_RANGE = (PRECOMPUTED_STACKS[0], PRECOMPUTED_STACKS[-1])
+
+
+class StrategyCache:
+    """
+    有界 LRU 策略缓存
+    客户端可以传入任意筹码深度，缓存条目数固定，内存占用有上限
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._items: "OrderedDict[int, GTOStrategy]" = OrderedDict()
+        # 插值时会递归获取相邻深度，需要可重入锁
+        self._lock = threading.RLock()
+    
+    def get(self, stack_size: int) -> GTOStrategy:
+        with self._lock:
+            strategy = self._items.get(stack_size)
+            if strategy is not None:
+                self._items.move_to_end(stack_size)
+                return strategy
+            
+            strategy = _create_strategy(stack_size)
+            self._items[stack_size] = strategy
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+            return strategy
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __contains__(self, stack_size: int) -> bool:
+        return stack_size in self._items
+
+
+# 全局策略实例缓存 (可通过 GTO_STRATEGY_CACHE_SIZE 环境变量调整容量)
+_strategy_cache = StrategyCache(int(os.getenv("GTO_STRATEGY_CACHE_SIZE", "16")))
+
+
+def _load_precompiled(stack_size: int) -> Optional[np.ndarray]:
+    """从预编译策略库读取策略表，轴标签不一致时视为缺失"""
+    store = get_strategy_store()
+    if store is None:
+        return None
+    
+    name = preflop_table_name(stack_size)
+    if not store.has(name):
+        return None
+    
+    meta = store.meta(name)
+    if (meta.get("positions") != GTOStrategy.POSITIONS
+            or meta.get("contexts") != list(GTOStrategy.ACTIONS_TO_YOU)):
+        return None
+    
+    if meta.get("actions") != GTOStrategy.action_labels(stack_size):
+        return None
+    return store.get(name)
+
+
+def _neighbor_stacks(stack_size: int) -> Optional[Tuple[int, int]]:
+    """插值使用的相邻预编译深度，不在插值范围内时返回 None"""
+    low, high = INTERPOLATION_RANGE
+    if stack_size in PRECOMPUTED_STACKS or not low < stack_size < high:
+        return None
+    for lower, upper in zip(PRECOMPUTED_STACKS, PRECOMPUTED_STACKS[1:]):
+        if lower < stack_size < upper:
+            return lower, upper
+    return None
+
+
+def _align_actions(table: np.ndarray, source_stack: int, target_stack: int) -> np.ndarray:
+    """
+    把某深度的策略表映射到目标深度的行动轴
+    源深度独有的推满尺度 (raise_XXbb) 并入 raise_all_in
+    """
+    source = GTOStrategy.action_labels(source_stack)
+    target = GTOStrategy.action_labels(target_stack)
+    if source == target:
+        return table
+    
+    target_index = {a: i for i, a in enumerate(target)}
+    aligned = np.zeros(table.shape[:-1] + (len(target),), dtype=np.float32)
+    for i, action in enumerate(source):
+        j = target_index.get(action, target_index['raise_all_in'])
+        aligned[..., j] += table[..., i]
+    return aligned
+
+
+def interpolate_strategy_table(stack_size: int) -> Optional[np.ndarray]:
+    """
+    按相邻两个预编译深度线性混合策略表
+    (两端的每一行频率和都为 1，混合结果同样为 1，且结果确定)
+    """
+    neighbors = _neighbor_stacks(stack_size)
+    if neighbors is None:
+        return None
+    
+    lower, upper = neighbors
+    weight = np.float32((stack_size - lower) / (upper - lower))
+    lower_table = _align_actions(get_gto_strategy(lower).table, lower, stack_size)
+    upper_table = _align_actions(get_gto_strategy(upper).table, upper, stack_size)
+    return (1 - weight) * lower_table + weight * upper_table
+
+
+def _create_strategy(stack_size: int) -> GTOStrategy:
+    """预编译深度直接读取策略库，其余深度在范围内插值，范围外按规则构建"""
+    table = _load_precompiled(stack_size)
+    if table is None:
+        table = interpolate_strategy_table(stack_size)
+    return GTOStrategy(stack_size, table=table)
 
 
 def get_gto_strategy(stack_size: int) -> GTOStrategy:
-    """获取 GTO 策略实例 (带缓存)"""
-    if stack_size not in _strategy_cache:
-        _strategy_cache[stack_size] = GTOStrategy(stack_size)
-    return _strategy_cache[stack_size]
+    """获取 GTO 策略实例 (有界 LRU 缓存，优先使用预编译策略库)"""
+    return _strategy_cache.get(stack_size)
 
 
 def generate_training_scenarios(stack_size: int, position: str, action_to_you: str, 
@@ -366,18 +666,11 @@ def generate_training_scenarios(stack_size: int, position: str, action_to_you: s
     strategy = get_gto_strategy(stack_size)
     scenarios = []
     
-    # 根据难度选择手牌策略
-    if difficulty == "easy":
-        # 简单模式：更多边缘手牌（决策更明确）
-        hand_pool = [h for h in ALL_HANDS if _get_decision_clarity(strategy, h, position, action_to_you) > 0.7]
-        if len(hand_pool) < count * 2:
-            hand_pool = ALL_HANDS
-    elif difficulty == "hard":
-        # 困难模式：更多混合策略手牌
-        hand_pool = [h for h in ALL_HANDS if _get_decision_clarity(strategy, h, position, action_to_you) < 0.5]
-        if len(hand_pool) < count * 2:
-            hand_pool = ALL_HANDS
-    else:
+    # 根据难度选择手牌池 (策略加载时已按决策清晰度预筛选)
+    hand_pool = strategy.get_hand_pool(position, action_to_you, difficulty)
+    if hand_pool is None:
+        hand_pool = _filter_hand_pool(strategy, position, action_to_you, difficulty)
+    if len(hand_pool) < count * 2:
         hand_pool = ALL_HANDS
     
     # 随机选择手牌
@@ -413,13 +706,27 @@ def generate_training_scenarios(stack_size: int, position: str, action_to_you: s
             'options': options,
             'correct_action': best_action,
             'gto_frequency': hand_strategy,
-            'difficulty': _calculate_difficulty(hand_strategy),
+            'difficulty': (strategy.get_difficulty(hand, position, action_to_you)
+                           or _calculate_difficulty(hand_strategy)),
             'time_limit': _get_time_limit(difficulty)
         })
     
     return scenarios
 
 
+def _filter_hand_pool(strategy, position: str, action_to_you: str, difficulty: str) -> List[str]:
+    """逐手计算决策清晰度筛选手牌池 (位置/场景不在预计算索引中时使用)"""
+    if difficulty == "easy":
+        # 简单模式：更多边缘手牌（决策更明确）
+        return [h for h in ALL_HANDS
+                if _get_decision_clarity(strategy, h, position, action_to_you) > GTOStrategy.EASY_POOL_CLARITY]
+    elif difficulty == "hard":
+        # 困难模式：更多混合策略手牌
+        return [h for h in ALL_HANDS
+                if _get_decision_clarity(strategy, h, position, action_to_you) < GTOStrategy.HARD_POOL_CLARITY]
+    return ALL_HANDS
+
+
 def _get_decision_clarity(strategy, hand: str, position: str, action_to_you: str) -> float:
     """
     获取决策清晰度（0-1，越高说明决策越明确）
@@ -0,0 +1,186 @@
+"""
+翻牌手牌桶查表
+按花色同构把 22100 种翻牌归并为 1755 种规范翻牌，预先计算每个 (组合, 规范翻牌) 的手牌桶，
+以 uint8 表随策略库一起 mmap 加载；翻牌关键点的手牌桶只需查一次表
+
+表结构:
+    HAND_BUCKET_TABLE[规范翻牌 id, 组合 id] = HAND_BUCKETS 下标 (与翻牌冲突的组合为 NO_BUCKET)
+    具体翻牌先换算成规范翻牌和对应的花色置换，手牌按同一置换映射后再查表
+
+构建 (随策略库一起):
+    python -m app.services.strategy_store build
+"""
+from itertools import combinations, permutations
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from app.services.cards import COMBO_CARDS, COMBO_INDEX, NUM_CARDS, NUM_COMBOS
+from app.services.flop_strategy import FlopStrategyEngine
+from app.services.hand_evaluator import HIGH_RANK
+from app.services.strategy_store import HAND_BUCKET_TABLE_NAME, get_strategy_store
+
+HAND_BUCKETS = FlopStrategyEngine.HAND_BUCKETS
+NO_BUCKET = 255
+
+# 24 种花色置换；SUIT_PERM_CARDS[p, c] = 牌 c 在置换 p 下的牌 id
+SUIT_PERMS = list(permutations(range(4)))
+SUIT_PERM_CARDS = np.array(
+    [[c // 4 * 4 + perm[c % 4] for c in range(NUM_CARDS)] for perm in SUIT_PERMS], dtype=np.int16,
+)
+
+
+def _build_flop_index():
+    """
+    规范翻牌 = 24 种置换下 (降序排列后) 编码最小的翻牌
+    返回 (规范翻牌 (1755, 3), 翻牌 -> 规范翻牌 id (52, 52, 52), 翻牌 -> 置换下标 (52, 52, 52))
+    """
+    flops = np.array(list(combinations(range(NUM_CARDS), 3)), dtype=np.int16)
+    mapped = -np.sort(-SUIT_PERM_CARDS[:, flops], axis=2)  # (24, 22100, 3)
+    keys = (mapped[..., 0].astype(np.int32) * NUM_CARDS + mapped[..., 1]) * NUM_CARDS + mapped[..., 2]
+    perm_idx = keys.argmin(axis=0)
+    canonical_keys = keys.min(axis=0)
+
+    unique_keys = np.unique(canonical_keys)
+    canonical = np.stack([
+        unique_keys // (NUM_CARDS * NUM_CARDS), unique_keys // NUM_CARDS % NUM_CARDS, unique_keys % NUM_CARDS,
+    ], axis=1).astype(np.int16)
+
+    flop_index = np.full((NUM_CARDS,) * 3, -1, dtype=np.int16)
+    flop_perm = np.zeros((NUM_CARDS,) * 3, dtype=np.uint8)
+    ids = np.searchsorted(unique_keys, canonical_keys)
+    for order in permutations(range(3)):
+        a, b, c = (flops[:, i] for i in order)
+        flop_index[a, b, c] = ids
+        flop_perm[a, b, c] = perm_idx
+    return canonical, flop_index, flop_perm
+
+
+CANONICAL_FLOPS, FLOP_INDEX, FLOP_PERM = _build_flop_index()
+NUM_FLOPS = len(CANONICAL_FLOPS)  # 1755
+
+# 标量查表用的扁平 Python 序列 (避免 NumPy 标量下标的开销)
+_FLOP_INDEX_FLAT = FLOP_INDEX.ravel().tolist()
+_FLOP_PERM_FLAT = FLOP_PERM.ravel().tolist()
+_PERM_CARDS = tuple(tuple(row) for row in SUIT_PERM_CARDS.tolist())
+_COMBO_INDEX_FLAT = COMBO_INDEX.ravel().tolist()
+
+
+def canonical_flop(board: Sequence[int]) -> int:
+    """具体翻牌 -> 规范翻牌 id"""
+    return int(FLOP_INDEX[board[0], board[1], board[2]])
+
+
+# ==================== 构建 ====================
+
+def _rank_mask_tables():
+    """13 位点数掩码 -> (是否成顺, 顺子听牌类型 0 无 / 1 卡顺 / 2 两头)，直接复用 HandEvaluator 的判定"""
+    from app.services.fullhand_engine import HandEvaluator
+
+    draw_types = {None: 0, "gutshot": 1, "open": 2}
+    straight = np.zeros(1 << 13, dtype=bool)
+    straight_draw = np.zeros(1 << 13, dtype=np.uint8)
+    for mask in range(1 << 13):
+        ranks = [r + 2 for r in range(13) if mask >> r & 1]
+        straight[mask] = HandEvaluator._has_straight(ranks)
+        straight_draw[mask] = draw_types[HandEvaluator._has_straight_draw(ranks)]
+    return straight, straight_draw
+
+
+def _bucket_batch(cards: np.ndarray, straight: np.ndarray, straight_draw: np.ndarray) -> np.ndarray:
+    """
+    HandEvaluator.evaluate_bucket_ids 的向量化版本
+    cards: (N, 5)，前两张为手牌
+    """
+    n = len(cards)
+    rows = np.arange(n)[:, None]
+    bits = 1 << np.arange(13)
+    ranks = cards // 4
+
+    counts = np.bincount((rows * 13 + ranks).ravel(), minlength=n * 13).reshape(n, 13)
+    suit_counts = np.bincount((rows * 4 + cards % 4).ravel(), minlength=n * 4).reshape(n, 4)
+    pairs = (counts == 2).sum(axis=1)
+    trips = (counts == 3).sum(axis=1)
+    quads = (counts == 4).sum(axis=1)
+    m1 = (counts >= 1) @ bits
+    m2 = (counts >= 2) @ bits
+
+    # 成牌等级 (1 高牌 ... 8 四条)，与 _get_made_hand_rank 的判定顺序一致
+    made = np.select(
+        [quads > 0, (trips > 0) & (pairs > 0), (suit_counts >= 5).any(axis=1), straight[m1],
+         trips > 0, pairs >= 2, pairs == 1],
+        [8, 7, 6, 5, 4, 3, 2], 1,
+    )
+    pair_rank = HIGH_RANK[m2] + 2
+    hole_high = np.maximum(ranks[:, 0], ranks[:, 1]) + 2
+    flush_draw = (suit_counts == 4).any(axis=1)
+    draw = straight_draw[m1]
+
+    bucket = np.select(
+        [made >= 3,
+         (made == 2) & (pair_rank >= 12),
+         flush_draw | (draw == 2),
+         draw == 1,
+         made == 2,
+         (made == 1) & (hole_high >= 13)],
+        [HAND_BUCKETS.index(b) for b in
+         ("made_strong", "made_medium", "draw_strong", "draw_weak", "made_weak", "made_weak")],
+        HAND_BUCKETS.index("air"),
+    )
+    return bucket.astype(np.uint8)
+
+
+def build_hand_bucket_table(chunk: int = 128) -> np.ndarray:
+    """构建 (1755, 1326) 的 uint8 手牌桶表"""
+    straight, straight_draw = _rank_mask_tables()
+    combos = COMBO_CARDS.astype(np.int64)
+    table = np.full((NUM_FLOPS, NUM_COMBOS), NO_BUCKET, dtype=np.uint8)
+
+    for start in range(0, NUM_FLOPS, chunk):
+        flops = CANONICAL_FLOPS[start:start + chunk].astype(np.int64)
+        cards = np.concatenate([
+            np.broadcast_to(combos[None], (len(flops), NUM_COMBOS, 2)),
+            np.broadcast_to(flops[:, None], (len(flops), NUM_COMBOS, 3)),
+        ], axis=2)
+        dead = (combos[None, :, :, None] == flops[:, None, None, :]).any(axis=(2, 3))
+
+        buckets = _bucket_batch(cards.reshape(-1, 5), straight, straight_draw).reshape(len(flops), NUM_COMBOS)
+        buckets[dead] = NO_BUCKET
+        table[start:start + len(flops)] = buckets
+    return table
+
+
+def hand_bucket_meta() -> Dict:
+    return {"buckets": HAND_BUCKETS, "flops": NUM_FLOPS}
+
+
+# ==================== 查表 ====================
+
+# 手牌桶表及其扁平字节视图 (进程内共享)
+_bucket_table: Optional[np.ndarray] = None
+_bucket_view: Optional[memoryview] = None
+
+
+def get_hand_bucket_table() -> np.ndarray:
+    """获取手牌桶表：优先使用策略库中的 mmap 视图，缺失时在进程内构建"""
+    global _bucket_table
+    if _bucket_table is None:
+        store = get_strategy_store()
+        table = store.get(HAND_BUCKET_TABLE_NAME) if store else None
+        if (table is None or table.shape != (NUM_FLOPS, NUM_COMBOS)
+                or store.meta(HAND_BUCKET_TABLE_NAME) != hand_bucket_meta()):
+            table = build_hand_bucket_table()
+        _bucket_table = table
+    return _bucket_table
+
+
+def flop_bucket_index(hand: Sequence[int], board: Sequence[int]) -> int:
+    """两张手牌 + 三张翻牌 -> HAND_BUCKETS 下标"""
+    global _bucket_view
+    if _bucket_view is None:
+        _bucket_view = memoryview(np.ascontiguousarray(get_hand_bucket_table())).cast("B")
+
+    flop_key = (board[0] * NUM_CARDS + board[1]) * NUM_CARDS + board[2]
+    perm = _PERM_CARDS[_FLOP_PERM_FLAT[flop_key]]
+    combo = _COMBO_INDEX_FLAT[perm[hand[0]] * NUM_CARDS + perm[hand[1]]]
+    return _bucket_view[_FLOP_INDEX_FLAT[flop_key] * NUM_COMBOS + combo]
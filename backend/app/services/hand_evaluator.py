@@ -0,0 +1,171 @@
+"""
+向量化牌力评估
+把 5-7 张牌折叠成 13 位点数掩码后查表，批量返回可直接比较的整数牌力 (越大越强)
+
+牌力编码:
+    类别 * 13^5 + 类别内比较值 (按点数以 13 进制从高到低排列)
+    类别: 0 高牌, 1 一对, 2 两对, 3 三条, 4 顺子, 5 同花, 6 葫芦, 7 四条, 8 同花顺
+
+to_rank() 把牌力换算成 treys 的排名 (1 = 皇家同花顺 ... 7462 = 7-5-4-3-2 杂色，越小越强)，
+用于兼容已有的摊牌展示数据
+
+校验 / 基准:
+    python -m benchmarks.check_hand_evaluator    (全部 133,784,560 种 7 张牌组合)
+    python -m benchmarks.bench_hand_evaluator
+"""
+from itertools import combinations_with_replacement
+from typing import List, Sequence
+
+import numpy as np
+
+from app.services.cards import CARD_RANK_ARRAY, CARD_SUIT_ARRAY
+
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(9)
+CATEGORY_NAMES = ["高牌", "一对", "两对", "三条", "顺子", "同花", "葫芦", "四条", "同花顺"]
+# 与 treys Evaluator.class_to_string 相同的英文名称
+CATEGORY_LABELS = [
+    "High Card", "Pair", "Two Pair", "Three of a Kind", "Straight",
+    "Flush", "Full House", "Four of a Kind", "Straight Flush",
+]
+
+CATEGORY_BASE = 13 ** 5
+NUM_MASKS = 1 << 13
+
+# 牌 id -> 点数下标 (0 = '2', 12 = 'A') 与花色
+_RANK_IDX = (CARD_RANK_ARRAY - 2).astype(np.int32)
+_SUIT_IDX = CARD_SUIT_ARRAY.astype(np.int32)
+_RANK_BIT = (1 << _RANK_IDX).astype(np.int32)
+_BITS = (1 << np.arange(13)).astype(np.int32)
+
+
+def _build_tables():
+    masks = np.arange(NUM_MASKS)
+    popcount = np.zeros(NUM_MASKS, dtype=np.int32)
+    high = np.zeros(NUM_MASKS, dtype=np.int32)
+    top = np.zeros((6, NUM_MASKS), dtype=np.int32)  # top[k][mask] = 最高 k 个点数的 13 进制编码
+    straight = np.full(NUM_MASKS, -1, dtype=np.int32)
+
+    for mask in range(1, NUM_MASKS):
+        ranks = [r for r in range(12, -1, -1) if mask >> r & 1]
+        popcount[mask] = len(ranks)
+        high[mask] = ranks[0]
+        for k in range(1, 6):
+            value = 0
+            for i in range(k):
+                value = value * 13 + (ranks[i] if i < len(ranks) else 0)
+            top[k][mask] = value
+
+    # 顺子: 从 A-high 往下找五连，A2345 (wheel) 以 5 为顶
+    for mask in masks:
+        for high_rank in range(12, 3, -1):
+            window = 0b11111 << (high_rank - 4)
+            if mask & window == window:
+                straight[mask] = high_rank
+                break
+        else:
+            if mask & 0b1000000001111 == 0b1000000001111:
+                straight[mask] = 3
+    return popcount, high, top, straight
+
+
+POPCOUNT, HIGH_RANK, TOP_RANKS, STRAIGHT_HIGH = _build_tables()
+
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """
+    批量评估
+    cards: (N, k) 牌 id 数组，5 <= k <= 7
+    返回 (N,) int32 牌力，越大越强
+    """
+    cards = np.asarray(cards)
+    n = len(cards)
+    rows = np.arange(n)[:, None]
+
+    # 每个点数的张数 (N, 13)
+    counts = np.bincount((rows * 13 + _RANK_IDX[cards]).ravel(), minlength=n * 13).reshape(n, 13)
+    m1 = (counts >= 1).astype(np.int32) @ _BITS
+    m2 = (counts >= 2).astype(np.int32) @ _BITS
+    m3 = (counts >= 3).astype(np.int32) @ _BITS
+    m4 = (counts >= 4).astype(np.int32) @ _BITS
+
+    # 每门花色的点数掩码 (同花色内点数不重复，按位或等于求和)；7 张牌最多一门花色凑成同花
+    suit_masks = np.bincount(
+        (rows * 4 + _SUIT_IDX[cards]).ravel(), weights=_RANK_BIT[cards].ravel(), minlength=n * 4,
+    ).astype(np.int32).reshape(n, 4)
+    flush_suits = POPCOUNT[suit_masks] >= 5
+    flush_mask = (suit_masks * flush_suits).sum(axis=1)
+
+    quad = HIGH_RANK[m4]
+    trip = HIGH_RANK[m3]
+    pair = HIGH_RANK[m2]
+    fh_pair = HIGH_RANK[m2 & ~(1 << trip)]
+    second_pair = HIGH_RANK[m2 & ~(1 << pair)]
+    straight = STRAIGHT_HIGH[m1]
+    straight_flush = STRAIGHT_HIGH[flush_mask]
+
+    conditions = [
+        straight_flush >= 0,
+        m4 != 0,
+        (m3 != 0) & ((m2 & ~(1 << trip)) != 0),
+        flush_mask != 0,
+        straight >= 0,
+        m3 != 0,
+        POPCOUNT[m2] >= 2,
+        m2 != 0,
+    ]
+    values = [
+        STRAIGHT_FLUSH * CATEGORY_BASE + straight_flush,
+        QUADS * CATEGORY_BASE + quad * 13 + HIGH_RANK[m1 & ~(1 << quad)],
+        FULL_HOUSE * CATEGORY_BASE + trip * 13 + fh_pair,
+        FLUSH * CATEGORY_BASE + TOP_RANKS[5][flush_mask],
+        STRAIGHT * CATEGORY_BASE + straight,
+        TRIPS * CATEGORY_BASE + trip * 169 + TOP_RANKS[2][m1 & ~(1 << trip)],
+        TWO_PAIR * CATEGORY_BASE + pair * 169 + second_pair * 13
+        + HIGH_RANK[m1 & ~((1 << pair) | (1 << second_pair))],
+        PAIR * CATEGORY_BASE + pair * 2197 + TOP_RANKS[3][m1 & ~(1 << pair)],
+    ]
+    return np.select(conditions, values, HIGH_CARD * CATEGORY_BASE + TOP_RANKS[5][m1]).astype(np.int32)
+
+
+def evaluate(cards: Sequence[int]) -> int:
+    """单手评估 (5-7 张牌 id)"""
+    return int(evaluate_batch(np.asarray([cards]))[0])
+
+
+def evaluate_showdown(board: Sequence[int], holes: Sequence[Sequence[int]]) -> np.ndarray:
+    """同一公共牌下多名玩家的牌力，一次批量评估"""
+    hands = np.empty((len(holes), 2 + len(board)), dtype=np.int64)
+    hands[:, :2] = holes
+    hands[:, 2:] = board
+    return evaluate_batch(hands)
+
+
+def hand_category(score: int) -> int:
+    return score // CATEGORY_BASE
+
+
+def _build_distinct_scores() -> np.ndarray:
+    """
+    全部 7462 种 5 张牌等价类的牌力 (升序)
+    6175 种点数组合各取一手非同花，1287 种不重复点数组合再各取一手同花
+    """
+    hands: List[List[int]] = []
+    flushes: List[List[int]] = []
+    for ranks in combinations_with_replacement(range(13), 5):
+        if ranks[0] == ranks[4]:
+            continue
+        # 相同点数相邻排列，按位置轮换花色：同点数的牌花色不同，且 5 张牌不会同花
+        hands.append([r * 4 + i % 4 for i, r in enumerate(ranks)])
+        if len(set(ranks)) == 5:
+            flushes.append([r * 4 for r in ranks])
+    scores = evaluate_batch(np.asarray(hands + flushes))
+    return np.unique(scores)
+
+
+DISTINCT_SCORES = _build_distinct_scores()
+NUM_RANKS = len(DISTINCT_SCORES)  # 7462
+
+
+def to_rank(scores):
+    """牌力 -> treys 排名 (1 最强, 7462 最弱)，支持标量与数组"""
+    return NUM_RANKS - np.searchsorted(DISTINCT_SCORES, scores)
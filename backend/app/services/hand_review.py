@@ -0,0 +1,36 @@
+"""
+物化复盘
+牌局结束时从终局引擎生成一次复盘 (摊牌分析、输赢解释、关键点评级)，压缩后存入 FullHandSession.review，
+查看复盘时直接读取，不再按 seed 重放、评估牌力
+
+存储的是与订阅状态无关的完整复盘，返回前再按订阅状态裁剪策略频率
+复盘逻辑 (牌力评估、解释文字、关键点字段) 改变时递增 REVIEW_VERSION: 版本落后的复盘在查看时重新计算，
+应用启动后的后台任务 (review_jobs) 也会分批重算
+"""
+import json
+import zlib
+from typing import Any, Dict
+
+REVIEW_VERSION = 1
+
+# 关键点中仅订阅用户可见的字段
+PRO_SPOT_FIELDS = ("strategy", "user_action_prob")
+
+
+def pack_review(review: Dict[str, Any]) -> bytes:
+    """紧凑 JSON + zlib"""
+    return zlib.compress(json.dumps(review, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_review(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+
+def present_review(review: Dict[str, Any], is_subscribed: bool) -> Dict[str, Any]:
+    """按订阅状态裁剪关键点 (返回新字典，不修改 review)"""
+    presented = dict(review)
+    for key in ("preflop_spot", "flop_spot"):
+        spot = review.get(key)
+        if spot is not None and not is_subscribed:
+            presented[key] = {**spot, **{field: None for field in PRO_SPOT_FIELDS}}
+    return presented
@@ -0,0 +1,155 @@
+"""
+进行中牌局的共享状态存储 (多 worker 部署)
+同一手的连续请求可能落在不同 worker 上；引擎快照和版本号放在所有 worker 共享的存储中，
+更新时按版本号比较后写入 (CAS)，同一手的两个并发请求只有一个能写入，另一个收到 VersionConflict
+
+版本号与 FullHandSession.state_version 一致 (写入的是本次更新后的行版本)，
+恢复引擎时只使用与数据库行版本相同的快照，存储丢失或落后时回退到数据库中的快照
+
+实现:
+    InMemoryHandStateStore  单进程 (开发环境 / 单 worker)
+    RedisHandStateStore     REDIS_URL 指向的 Redis；客户端可注入，测试可用 fakeredis.FakeRedis()
+
+由 FULLHAND_STATE_STORE 选择 ("memory" / "redis")
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from redis import Redis
+from redis.exceptions import RedisError, WatchError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflict(ValueError):
+    """同一手已被其他请求更新"""
+
+
+class HandState(NamedTuple):
+    version: int
+    snapshot: bytes  # FullHandEngine.to_snapshot()
+
+
+class HandStateStore:
+    """状态存储接口"""
+
+    def get(self, hand_id: int) -> Optional[HandState]:
+        raise NotImplementedError
+
+    def compare_and_set(self, hand_id: int, expected_version: int, state: HandState) -> None:
+        """
+        已存版本 (不存在记为 0) 不比 expected_version 新时写入 state，否则抛出 VersionConflict
+        允许已存版本落后: 存储条目过期或被淘汰后，数据库仍可能已经前进
+        """
+        raise NotImplementedError
+
+    def delete(self, hand_id: int) -> None:
+        raise NotImplementedError
+
+
+class InMemoryHandStateStore(HandStateStore):
+    """进程内实现 (线程安全)，条目 ttl 秒后过期"""
+
+    PURGE_MIN = 1024
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._items: Dict[int, Tuple[float, HandState]] = {}
+        self._purge_at = self.PURGE_MIN
+        self._lock = threading.Lock()
+
+    def get(self, hand_id: int) -> Optional[HandState]:
+        with self._lock:
+            item = self._items.get(hand_id)
+            if item is None:
+                return None
+            if item[0] <= self._clock():
+                del self._items[hand_id]
+                return None
+            return item[1]
+
+    def compare_and_set(self, hand_id: int, expected_version: int, state: HandState) -> None:
+        with self._lock:
+            item = self._items.get(hand_id)
+            if item is not None and item[0] > self._clock() and item[1].version > expected_version:
+                raise VersionConflict(f"Hand {hand_id} is at version {item[1].version}, expected {expected_version}")
+            self._items[hand_id] = (self._clock() + self.ttl, state)
+            # 条目数翻倍时清理一次过期条目，弃局的牌局不会常驻内存
+            if len(self._items) > self._purge_at:
+                now = self._clock()
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+                self._purge_at = max(self.PURGE_MIN, 2 * len(self._items))
+
+    def delete(self, hand_id: int) -> None:
+        with self._lock:
+            self._items.pop(hand_id, None)
+
+
+class RedisHandStateStore(HandStateStore):
+    """
+    Redis 实现: 每手一个 hash {version, snapshot}，写入时刷新过期时间
+    CAS 用 WATCH/MULTI 实现，不依赖 Lua 脚本
+    Redis 不可用时读返回 None、写只记录日志 (数据库行的乐观锁仍会拦截并发更新)
+    """
+
+    KEY_PREFIX = "fullhand:state:"
+
+    def __init__(self, client: Redis, ttl: int):
+        self.client = client
+        self.ttl = ttl
+
+    def _key(self, hand_id: int) -> str:
+        return f"{self.KEY_PREFIX}{hand_id}"
+
+    def get(self, hand_id: int) -> Optional[HandState]:
+        try:
+            version, snapshot = self.client.hmget(self._key(hand_id), "version", "snapshot")
+        except RedisError as e:
+            logger.warning(f"Hand state store unavailable: {e}")
+            return None
+        if version is None or snapshot is None:
+            return None
+        return HandState(int(version), bytes(snapshot))
+
+    def compare_and_set(self, hand_id: int, expected_version: int, state: HandState) -> None:
+        key = self._key(hand_id)
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(key)
+                current = pipe.hget(key, "version")
+                if current is not None and int(current) > expected_version:
+                    raise VersionConflict(f"Hand {hand_id} is at version {int(current)}, expected {expected_version}")
+                pipe.multi()
+                pipe.hset(key, mapping={"version": state.version, "snapshot": state.snapshot})
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+        except WatchError as e:
+            raise VersionConflict(f"Hand {hand_id} was updated concurrently") from e
+        except RedisError as e:
+            logger.warning(f"Hand state store unavailable: {e}")
+
+    def delete(self, hand_id: int) -> None:
+        try:
+            self.client.delete(self._key(hand_id))
+        except RedisError as e:
+            logger.warning(f"Hand state store unavailable: {e}")
+
+
+# 进程内单例
+_store: Optional[HandStateStore] = None
+
+
+def get_hand_state_store() -> HandStateStore:
+    """按 FULLHAND_STATE_STORE 创建存储 (每个进程一次)"""
+    global _store
+    if _store is None:
+        if settings.FULLHAND_STATE_STORE == "redis":
+            _store = RedisHandStateStore(Redis.from_url(settings.REDIS_URL), settings.FULLHAND_STATE_TTL)
+        else:
+            _store = InMemoryHandStateStore(settings.FULLHAND_STATE_TTL)
+    return _store
@@ -0,0 +1,259 @@
+"""
+无界面高吞吐牌局模拟
+与 FullHandEngine 共用下注、发牌与结算规则，用于 AI 调参和统计:
+    - 行动记录为 (街, 座位, 动作编码, 金额) 元组，不创建 Action 对象、不生成时间戳
+    - 牌组从批量生成的随机排列中取，不逐手初始化 random.Random
+    - 手牌只保留整数 id (hole_cards 为 None，需要字符串时用 format_cards(hole_ids))
+    - 摊牌比牌延后到一批牌局结束后统一查表评估
+
+吞吐: 每个行动仍走 FullHandEngine 的规则代码 (约 7 us)，单核约 0.3M 手/分钟 (被动策略，25 个行动/手)
+到 0.6M 手/分钟 (随机策略，10 个行动/手)，适合任意 Python 策略的调参和统计；不以每核每分钟百万手为目标
+
+用法:
+    result = simulate(100_000, policy=passive_policy, seed=1)
+    result.to_dict()
+"""
+import math
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.fullhand_engine import (
+    ACT_BET, ACT_CALL, ACT_CHECK, ACT_FOLD, ACT_RAISE, FullHandEngine, GameStatus, Player, PokerDeck, Street,
+)
+from app.services.hand_evaluator import evaluate_batch
+
+STREET_CODES = {street: i for i, street in enumerate(Street)}
+# 从庄家起各座位的位置名称
+POSITIONS_FROM_BUTTON = ("BTN", "SB", "BB", "UTG", "MP", "CO")
+# 公共牌张数 -> 街编码 (记录行动时不对 Street 枚举求哈希)
+BOARD_STREET_CODES = (0, None, None, 1, 2, 3)
+DECK_BATCH = 4096
+
+# 策略: (引擎, 合法动作编码) -> (动作编码, 金额)
+Policy = Callable[[FullHandEngine, List[int]], Tuple[int, Optional[float]]]
+
+
+class HeadlessHandEngine(FullHandEngine):
+    """可连续模拟多手的无界面引擎"""
+
+    def __init__(self, stack_bb: int = 100, seed: Optional[int] = None):
+        super().__init__(stack_bb=stack_bb, seed=str(seed) if seed is not None else None)
+        self.rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed)
+        self._decks: List[List[int]] = []
+        self._seeded_hand = False
+
+    def _reset_hand_state(self) -> None:
+        super()._reset_hand_state()
+        self.actions: List[Tuple[int, int, int, Optional[float]]] = []
+        # 待批量评估的摊牌: (公共牌, 各摊牌玩家手牌, Hero 在其中的下标)
+        self.showdown: Optional[Tuple[List[int], List[List[int]], int]] = None
+
+    def new_hand(self, seed: Optional[str] = None) -> None:
+        """
+        开始新的一手
+        给定 seed 时按 FullHandEngine(seed=seed) 的方式确定座位和发牌，用于与交互引擎做一致性校验
+        """
+        self._reset_hand_state()
+        if seed is None:
+            self.initialize_game()
+            return
+
+        shared_rng, self.rng = self.rng, random.Random(seed)
+        self.seed, self._seeded_hand = seed, True
+        try:
+            self.initialize_game()
+        finally:
+            self.rng, self._seeded_hand = shared_rng, False
+
+    def initialize_game(self) -> None:
+        """
+        与 FullHandEngine.initialize_game 的随机数消耗、座位和发牌顺序完全相同 (一致性校验依赖这一点)，
+        12 张手牌一次取出，不生成手牌字符串
+        """
+        self.hero_seat = self.rng.randint(0, 5)
+        btn_offset = self.rng.choices([0, 1, 2], weights=[0.5, 0.3, 0.2])[0]
+        button = self.button_seat = (self.hero_seat - btn_offset) % 6
+        self.sb_seat = (button + 1) % 6
+        self.bb_seat = (button + 2) % 6
+
+        self._deck = self._new_deck()
+        dealt = self._deck.deal_ids(12)
+        deal_start = (self.sb_seat + 1) % 6
+        stack = float(self.stack_bb)
+        self.players = [
+            Player(seat, POSITIONS_FROM_BUTTON[(seat - button) % 6], stack,
+                   is_hero=seat == self.hero_seat,
+                   hole_ids=[dealt[(seat - deal_start) % 6], dealt[6 + (seat - deal_start) % 6]])
+            for seat in range(6)
+        ]
+
+        self._post_blinds()
+        self.status = GameStatus.PREFLOP
+        self.street = Street.PREFLOP
+        self._to_act_seat = (self.bb_seat + 1) % 6
+        self._update_active_players()
+
+    def act(self, code: int, amount: Optional[float] = None) -> None:
+        """按整数编码执行行动"""
+        if code not in self.legal_action_codes():
+            raise ValueError(f"Illegal action code: {code}")
+        self._act(code, amount)
+
+    def _new_deck(self) -> PokerDeck:
+        if self._seeded_hand:
+            return super()._new_deck()
+        if not self._decks:
+            orders = np.argsort(self._np_rng.random((DECK_BATCH, 52)), axis=1)
+            self._decks = orders.tolist()
+        return PokerDeck.from_state(self._decks.pop(), 0)
+
+    def _record_action(self, player: Player, code: int, amount: Optional[float]) -> None:
+        self.actions.append((BOARD_STREET_CODES[len(self.board)], player.seat, code, amount))
+
+    def _end_game(self, ended_by: str) -> None:
+        hero = self.players[self.hero_seat]
+        contenders = [p for p in self.players if p.in_hand and p.hole_ids]
+        if ended_by == "fold" or not hero.in_hand or len(contenders) < 2:
+            super()._end_game(ended_by)
+            return
+
+        # 需要比牌: 结果留到 resolve_showdowns 批量计算
+        self.ended_by = ended_by
+        self.status = GameStatus.ENDED
+        self.showdown = (list(self.board), [p.hole_ids for p in contenders], contenders.index(hero))
+
+
+@dataclass
+class SimulationResult:
+    """模拟结果 (均为 Hero 视角)"""
+    result_bb: np.ndarray  # 每手盈亏 (未结束的牌局为 NaN)
+    showdown: np.ndarray  # 每手 Hero 是否进入比牌
+    actions: int  # 总行动数 (含盲注)
+
+    @property
+    def hands(self) -> int:
+        return len(self.result_bb)
+
+    @property
+    def finished(self) -> np.ndarray:
+        return ~np.isnan(self.result_bb)
+
+    @property
+    def unfinished(self) -> int:
+        return int(self.hands - self.finished.sum())
+
+    def to_dict(self) -> Dict:
+        """统计只计已结束的牌局"""
+        finished = self.finished
+        done = int(finished.sum())
+        return {
+            "hands": self.hands,
+            "unfinished": self.unfinished,
+            "bb_per_100": round(float(self.result_bb[finished].mean()) * 100, 2) if done else 0.0,
+            "showdown_rate": round(float(self.showdown[finished].mean()), 4) if done else 0.0,
+            "actions_per_hand": round(self.actions / self.hands, 2) if self.hands else 0.0,
+        }
+
+
+def resolve_showdowns(showdowns: List[Tuple[List[int], List[List[int]], int]]) -> np.ndarray:
+    """
+    批量评估摊牌，返回 Hero 分得的底池比例
+    规则与 FullHandEngine._end_game 一致: 牌力等于最大值的玩家平分底池
+    """
+    if not showdowns:
+        return np.zeros(0)
+    sizes = np.array([len(holes) for _, holes, _ in showdowns])
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rows = np.array([hole + board for board, holes, _ in showdowns for hole in holes], dtype=np.int64)
+
+    scores = evaluate_batch(rows)
+    best = np.maximum.reduceat(scores, starts)
+    winners = np.add.reduceat((scores == np.repeat(best, sizes)).astype(np.int64), starts)
+    hero = scores[starts + np.array([h for _, _, h in showdowns])]
+    return np.where(hero == best, 1.0 / winners, 0.0)
+
+
+def ai_amount(engine: FullHandEngine, code: int) -> Optional[float]:
+    """
+    固定尺度: 翻前加注到 2.5 / 下注 1，翻后下注 75% 底池、加注到当前注额 + 75% 底池
+    加注额不低于最小加注 (与 AIPolicy._raise_to 一致)，超过筹码的部分由引擎按全部筹码投入
+    牌局服务的 AI 按 ai_level 编译的策略行动，模拟时用 ai_policy.get_ai_policy(...).as_headless(rng)
+    """
+    if code not in (ACT_BET, ACT_RAISE):
+        return None
+    if engine.street == Street.PREFLOP:
+        amount = 2.5 if code == ACT_RAISE else 1.0
+    else:
+        size = max(0.5, math.floor(engine.pot * 0.75 * 2) / 2)
+        amount = engine.current_bet + size if code == ACT_RAISE else size
+    if code == ACT_RAISE:
+        amount = max(amount, engine.current_bet + engine._last_raise_size)
+    return amount
+
+
+def passive_policy(engine: FullHandEngine, legal: List[int]) -> Tuple[int, Optional[float]]:
+    """AI 的默认兜底策略: 能过牌则过牌，否则跟注，否则弃牌"""
+    for code in (ACT_CHECK, ACT_CALL, ACT_FOLD):
+        if code in legal:
+            return code, None
+    return legal[0], ai_amount(engine, legal[0])
+
+
+def random_policy(rng: random.Random) -> Policy:
+    """在合法动作中均匀随机选择 (下注/加注使用 AI 的固定尺度)"""
+    def policy(engine: FullHandEngine, legal: List[int]) -> Tuple[int, Optional[float]]:
+        code = rng.choice(legal)
+        return code, ai_amount(engine, code)
+    return policy
+
+
+def play_hand(engine: HeadlessHandEngine, policy: Policy, max_actions: int = 200) -> None:
+    """用同一策略为所有座位行动，直到牌局结束 (超过 max_actions 的牌局保持未结束)"""
+    for _ in range(max_actions):
+        if engine.status == GameStatus.ENDED:
+            return
+        legal = engine.legal_action_codes()
+        if not legal:
+            # 无人能行动但牌局未结束 (剩余玩家 all-in 或只剩一人有筹码): 发完公共牌摊牌
+            engine._fast_forward_to_showdown()
+            return
+        code, amount = policy(engine, legal)
+        engine._act(code, amount)
+
+
+def simulate(hands: int, policy: Policy = passive_policy, stack_bb: int = 100,
+             seed: Optional[int] = None) -> SimulationResult:
+    """连续模拟若干手，摊牌在最后一次性批量结算"""
+    engine = HeadlessHandEngine(stack_bb=stack_bb, seed=seed)
+    result_bb = np.zeros(hands)
+    showdown_index: List[int] = []
+    showdowns = []
+    pots = np.zeros(hands)
+    hero_committed = np.zeros(hands)
+    actions = 0
+
+    for i in range(hands):
+        engine.new_hand()
+        play_hand(engine, policy)
+        actions += len(engine.actions)
+        if engine.showdown is not None:
+            showdown_index.append(i)
+            showdowns.append(engine.showdown)
+            pots[i] = engine.pot
+            hero_committed[i] = engine.players[engine.hero_seat].total_committed
+        elif engine.result_bb is not None:
+            result_bb[i] = engine.result_bb
+        else:
+            result_bb[i] = np.nan
+
+    idx = np.array(showdown_index, dtype=np.int64)
+    share = resolve_showdowns(showdowns)
+    result_bb[idx] = pots[idx] * share - hero_committed[idx]
+
+    showdown = np.zeros(hands, dtype=bool)
+    showdown[idx] = True
+    return SimulationResult(result_bb=result_bb, showdown=showdown, actions=actions)
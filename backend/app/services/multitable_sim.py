@@ -0,0 +1,327 @@
+"""
+多桌同步 (lockstep) 向量化模拟
+N 张相互独立的 6 人桌同时推进: 筹码、本街投入、是否在局等状态为 (N, 6) 的 NumPy 数组，
+合法动作掩码与状态转移对所有桌一次计算。用于自博弈数据生成
+
+规则逐条对应 FullHandEngine 的 legal_action_codes / _act / _check_street_end / _advance_street / _end_game；
+benchmarks/check_multitable.py 对相同 seed 与标量引擎逐桌比对结果。
+
+用法:
+    sim = MultiTableSimulator.random(10_000, stack_bb=100, seed=1)
+    sim.run(policy)
+    sim.result_bb
+"""
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.fullhand_engine import (
+    ACT_ALLIN, ACT_BET, ACT_CALL, ACT_CHECK, ACT_FOLD, ACT_RAISE, FullHandEngine, Street,
+)
+from app.services.hand_evaluator import evaluate_batch
+
+NUM_SEATS = 6
+NUM_ACTIONS = 6  # fold, check, call, bet, raise, allin (与 ACT_* 编码一致)
+PREFLOP, FLOP, TURN, RIVER, SHOWDOWN = range(5)
+ENDED_NONE, ENDED_FOLD, ENDED_SHOWDOWN = range(3)
+ENDED_BY = (None, "fold", "showdown")
+STREETS = list(Street)
+
+# 策略: (模拟器, 合法动作掩码 (N, 6)) -> (动作编码 (N,), 金额 (N,))
+VectorPolicy = Callable[["MultiTableSimulator", np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class MultiTableSimulator:
+    """N 张桌同步推进的向量化牌局"""
+
+    def __init__(self, n: int, stack_bb: int = 100):
+        self.n = n
+        self.stack_bb = stack_bb
+        self.rows = np.arange(n)
+
+        self.stack = np.full((n, NUM_SEATS), float(stack_bb))
+        self.committed = np.zeros((n, NUM_SEATS))
+        self.total = np.zeros((n, NUM_SEATS))
+        self.in_hand = np.ones((n, NUM_SEATS), dtype=bool)
+        self.active = np.ones((n, NUM_SEATS), dtype=bool)
+
+        self.pot = np.zeros(n)
+        self.current_bet = np.zeros(n)
+        self.last_raise = np.ones(n)
+        self.street = np.zeros(n, dtype=np.int8)
+        self.to_act = np.zeros(n, dtype=np.int64)
+        self.street_actions = np.zeros(n, dtype=np.int64)
+        self.actions = np.zeros(n, dtype=np.int64)  # 已执行的行动数 (不含盲注)
+        self.ended_by = np.zeros(n, dtype=np.int8)
+        self.result_bb = np.full(n, np.nan)
+
+        self.hero = np.zeros(n, dtype=np.int64)
+        self.button = np.zeros(n, dtype=np.int64)
+        self.sb = np.ones(n, dtype=np.int64)
+        self.bb = np.full(n, 2, dtype=np.int64)
+        self.deck = np.zeros((n, 52), dtype=np.int64)
+        self.holes = np.zeros((n, NUM_SEATS, 2), dtype=np.int64)
+
+    # ==================== 建桌 ====================
+
+    @classmethod
+    def random(cls, n: int, stack_bb: int = 100, seed: Optional[int] = None) -> "MultiTableSimulator":
+        """随机建桌: 座位分布与 FullHandEngine.initialize_game 相同 (庄家在 Hero 后 0-2 位)"""
+        rng = np.random.default_rng(seed)
+        sim = cls(n, stack_bb)
+        sim.hero = rng.integers(0, NUM_SEATS, n)
+        sim.button = (sim.hero - rng.choice(3, n, p=[0.5, 0.3, 0.2])) % NUM_SEATS
+        sim.sb = (sim.button + 1) % NUM_SEATS
+        sim.bb = (sim.button + 2) % NUM_SEATS
+        sim.deck = np.argsort(rng.random((n, 52)), axis=1)
+
+        # 从 SB 的下一位开始每人一张发两轮
+        offset = (np.arange(NUM_SEATS)[None, :] - sim.sb[:, None] - 1) % NUM_SEATS
+        sim.holes = np.stack([
+            np.take_along_axis(sim.deck, offset, axis=1),
+            np.take_along_axis(sim.deck, offset + NUM_SEATS, axis=1),
+        ], axis=2)
+        sim._post_blinds()
+        return sim
+
+    @classmethod
+    def from_engines(cls, engines: Sequence[FullHandEngine]) -> "MultiTableSimulator":
+        """从已 initialize_game 的标量引擎载入状态 (用于一致性校验，或在标量引擎上续跑)"""
+        sim = cls(len(engines), engines[0].stack_bb if engines else 100)
+        for i, e in enumerate(engines):
+            for p in e.players:
+                sim.stack[i, p.seat] = p.stack
+                sim.committed[i, p.seat] = p.committed_this_street
+                sim.total[i, p.seat] = p.total_committed
+                sim.in_hand[i, p.seat] = p.in_hand
+                sim.active[i, p.seat] = p.is_active
+                sim.holes[i, p.seat] = p.hole_ids
+            sim.pot[i], sim.current_bet[i], sim.last_raise[i] = e.pot, e.current_bet, e._last_raise_size
+            sim.street[i] = STREETS.index(e.street)
+            sim.to_act[i] = e._to_act_seat
+            sim.street_actions[i] = e._street_actions
+            sim.hero[i], sim.button[i], sim.sb[i], sim.bb[i] = e.hero_seat, e.button_seat, e.sb_seat, e.bb_seat
+            sim.deck[i] = e._deck.cards
+        return sim
+
+    def _post_blinds(self) -> None:
+        rows = self.rows
+        for seat, blind in ((self.sb, 0.5), (self.bb, 1.0)):
+            amount = np.minimum(blind, self.stack[rows, seat])
+            self.stack[rows, seat] -= amount
+            self.committed[rows, seat] = amount
+            self.total[rows, seat] = amount
+            self.pot += amount
+        self.current_bet[:] = 1.0
+        self.last_raise[:] = 0.5
+        self.to_act = (self.bb + 1) % NUM_SEATS
+        self.active = self.in_hand & (self.stack > 0)
+
+    # ==================== 查询 ====================
+
+    @property
+    def ended(self) -> np.ndarray:
+        return self.ended_by != ENDED_NONE
+
+    @property
+    def positions(self) -> np.ndarray:
+        """(N, 6) 位置下标，顺序同 FullHandEngine.POSITIONS_6MAX"""
+        return (np.arange(NUM_SEATS)[None, :] - self.bb[:, None] - 1) % NUM_SEATS
+
+    def board(self, i: int) -> List[int]:
+        """第 i 桌当前已发出的公共牌"""
+        return self.deck[i, 12:12 + (0, 3, 4, 5, 5)[self.street[i]]].tolist()
+
+    def legal_mask(self) -> np.ndarray:
+        """(N, 6) 合法动作掩码；已结束的桌全为 False"""
+        rows, seat = self.rows, self.to_act
+        stack = self.stack[rows, seat]
+        committed = self.committed[rows, seat]
+        to_call = self.current_bet - committed
+        can_act = self.in_hand[rows, seat] & self.active[rows, seat] & ~self.ended
+
+        mask = np.zeros((self.n, NUM_ACTIONS), dtype=bool)
+        mask[:, ACT_FOLD] = to_call > 0
+        mask[:, ACT_CHECK] = to_call == 0
+        mask[:, ACT_CALL] = (to_call > 0) & (stack >= to_call)
+        mask[:, ACT_BET] = (to_call == 0) & (self.street != PREFLOP)
+        mask[:, ACT_RAISE] = (to_call > 0) & (stack + committed >= self.current_bet + self.last_raise)
+        mask[:, ACT_ALLIN] = stack > 0
+        return mask & can_act[:, None]
+
+    # ==================== 状态转移 ====================
+
+    def step(self, codes: np.ndarray, amounts: np.ndarray) -> None:
+        """
+        所有未结束的桌各执行一个行动
+        codes 为 -1 的桌跳过；下注/加注的金额取自 amounts
+        """
+        acting = (codes >= 0) & ~self.ended
+        if not acting.any():
+            return
+        rows, seat = self.rows[acting], self.to_act[acting]
+        codes, amounts = codes[acting], amounts[acting]
+
+        stack = self.stack[rows, seat]
+        committed = self.committed[rows, seat]
+        total = self.total[rows, seat]
+        pot = self.pot[rows]
+        current_bet = self.current_bet[rows]
+        last_raise = self.last_raise[rows]
+        to_call = current_bet - committed
+
+        # 投入筹码: call / bet / allin 为增量，raise 为加注到的总额
+        put = np.select(
+            [codes == ACT_CALL, codes == ACT_BET, codes == ACT_RAISE, codes == ACT_ALLIN],
+            [np.minimum(to_call, stack), np.minimum(amounts, stack),
+             np.minimum(amounts, stack + committed) - committed, stack],
+            0.0,
+        )
+        raised = codes == ACT_RAISE
+        new_committed = np.where(raised, np.minimum(amounts, stack + committed), committed + put)
+        stack = np.where(codes == ACT_ALLIN, 0.0, stack - put)
+        total = total + put
+        pot = pot + put
+
+        bet = codes == ACT_BET
+        allin_raise = (codes == ACT_ALLIN) & (new_committed > current_bet)
+        last_raise = np.select(
+            [bet, raised, allin_raise], [put, new_committed - current_bet, new_committed - current_bet], last_raise,
+        )
+        current_bet = np.where(bet | raised | allin_raise, new_committed, current_bet)
+
+        self.stack[rows, seat] = stack
+        self.committed[rows, seat] = new_committed
+        self.total[rows, seat] = total
+        self.pot[rows] = pot
+        self.current_bet[rows] = current_bet
+        self.last_raise[rows] = last_raise
+        folded = codes == ACT_FOLD
+        self.in_hand[rows[folded], seat[folded]] = False
+        # 弃牌、全下，以及跟注 / 下注 / 加注投入全部筹码的玩家不能再行动
+        out = folded | (stack == 0)
+        self.active[rows[out], seat[out]] = False
+
+        self.street_actions[rows] += 1
+        self.actions[rows] += 1
+        self._check_street_end(rows)
+
+    def _check_street_end(self, rows: np.ndarray) -> None:
+        in_hand = self.in_hand[rows]
+        live = in_hand & self.active[rows]
+        n_in = in_hand.sum(axis=1)
+        n_live = live.sum(axis=1)
+
+        # 只剩一人: 弃牌结束；无人可行动: 发完公共牌摊牌
+        fold_end = n_in == 1
+        allin_end = ~fold_end & (n_in > 0) & (n_live == 0)
+        self._end(rows[fold_end], ENDED_FOLD)
+        self.street[rows[allin_end]] = SHOWDOWN
+        self._end(rows[allin_end], ENDED_SHOWDOWN)
+
+        going = ~fold_end & ~allin_end
+        rows, in_hand, live = rows[going], in_hand[going], live[going]
+        current_bet = self.current_bet[rows][:, None]
+        committed = self.committed[rows]
+
+        # 所有可行动玩家已匹配最高投注、且本街行动数足够时进入下一街
+        all_matched = np.all(~live | (committed == current_bet), axis=1)
+        acted = self.street_actions[rows] + np.where(self.street[rows] == PREFLOP, 2, 0)
+        need = (in_hand & (live | (committed == current_bet))).sum(axis=1)
+        advance = all_matched & (acted >= need)
+
+        # 下注已匹配且至多一人还有筹码: 无人能再下注，发完公共牌摊牌
+        runout = advance & (live.sum(axis=1) <= 1)
+        self.street[rows[runout]] = SHOWDOWN
+        self._end(rows[runout], ENDED_SHOWDOWN)
+
+        # 其余桌轮到下一个可行动玩家
+        order = (self.to_act[rows][:, None] + np.arange(1, NUM_SEATS + 1)) % NUM_SEATS
+        candidates = np.take_along_axis(live, order, axis=1)
+        has_next = candidates.any(axis=1)
+        nxt = order[np.arange(len(rows)), candidates.argmax(axis=1)]
+        move = ~advance & has_next
+        self.to_act[rows[move]] = nxt[move]
+        self._advance_street(rows[(advance & ~runout) | ~has_next])
+
+    def _advance_street(self, rows: np.ndarray) -> None:
+        if not len(rows):
+            return
+        self.committed[rows] = 0.0
+        self.current_bet[rows] = 0.0
+        self.street_actions[rows] = 0
+        self.street[rows] += 1
+
+        # 河牌之后摊牌；其余街从 SB 起第一个未弃牌且未全下的玩家先行动
+        self.active[rows] = self.in_hand[rows] & (self.stack[rows] > 0)
+        showdown = self.street[rows] == SHOWDOWN
+        self._end(rows[showdown], ENDED_SHOWDOWN)
+        dealt = rows[~showdown]
+        order = (self.sb[dealt][:, None] + np.arange(NUM_SEATS)) % NUM_SEATS
+        candidates = np.take_along_axis(self.active[dealt], order, axis=1)
+        first = order[np.arange(len(dealt)), candidates.argmax(axis=1)]
+        self.to_act[dealt] = np.where(candidates.any(axis=1), first, self.sb[dealt])
+
+    def _end(self, rows: np.ndarray, ended_by: int) -> None:
+        """结算 (Hero 视角)，规则同 FullHandEngine._end_game"""
+        if not len(rows):
+            return
+        self.ended_by[rows] = ended_by
+        hero_total = self.total[rows, self.hero[rows]]
+
+        if ended_by == ENDED_FOLD:
+            winner = self.in_hand[rows].argmax(axis=1)
+            self.result_bb[rows] = np.where(winner == self.hero[rows], self.pot[rows], 0.0) - hero_total
+            return
+
+        in_hand = self.in_hand[rows]
+        hero_in = in_hand[np.arange(len(rows)), self.hero[rows]]
+
+        # 比牌: 所有在局玩家的 7 张牌一次批量评估，未在局的座位记为最小值
+        cards = np.concatenate([self.holes[rows], np.repeat(self.deck[rows, None, 12:17], NUM_SEATS, axis=1)], axis=2)
+        scores = evaluate_batch(cards.reshape(-1, 7)).reshape(len(rows), NUM_SEATS)
+        scores = np.where(in_hand, scores, -1)
+        best = scores.max(axis=1)
+        hero_won = hero_in & (scores[np.arange(len(rows)), self.hero[rows]] == best)
+        # 牌力相同的赢家平分底池
+        share = np.where(hero_won, 1.0 / (scores == best[:, None]).sum(axis=1), 0.0)
+        self.result_bb[rows] = self.pot[rows] * share - hero_total
+
+    # ==================== 驱动 ====================
+
+    def run(self, policy: VectorPolicy, max_steps: int = 200) -> None:
+        """同步推进直到所有桌结束"""
+        for _ in range(max_steps):
+            mask = self.legal_mask()
+            if not mask.any():
+                return
+            codes, amounts = policy(self, mask)
+            self.step(np.where(mask.any(axis=1), codes, -1), amounts)
+
+
+def ai_amounts(sim: MultiTableSimulator, codes: np.ndarray) -> np.ndarray:
+    """
+    headless_engine.ai_amount 的向量化版本: 翻前加注到 2.5 / 下注 1，翻后下注 75% 底池、加注到当前注额 + 75% 底池，
+    加注额不低于各桌的最小加注
+    """
+    size = np.maximum(0.5, np.floor(sim.pot * 0.75 * 2) / 2)
+    postflop = np.where(codes == ACT_RAISE, sim.current_bet + size, size)
+    preflop = np.where(codes == ACT_RAISE, 2.5, 1.0)
+    amount = np.where(sim.street == PREFLOP, preflop, postflop)
+    amount = np.where(codes == ACT_RAISE, np.maximum(amount, sim.current_bet + sim.last_raise), amount)
+    return np.where((codes == ACT_BET) | (codes == ACT_RAISE), amount, np.nan)
+
+
+def pick_legal(mask: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """按均匀随机数 u ∈ [0, 1) 在每行的合法动作中选一个 (第 floor(u * 合法数) 个)"""
+    counts = mask.sum(axis=1)
+    k = np.minimum((u * counts).astype(np.int64), np.maximum(counts - 1, 0))
+    return np.argmax(np.cumsum(mask, axis=1) > k[:, None], axis=1)
+
+
+def random_policy(rng: np.random.Generator) -> VectorPolicy:
+    """在合法动作中均匀随机选择 (下注/加注使用 AI 的固定尺度)"""
+    def policy(sim: MultiTableSimulator, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        codes = pick_legal(mask, rng.random(sim.n))
+        return codes, ai_amounts(sim, codes)
+    return policy
@@ -8,6 +8,8 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from app.services.cards import HAND_CLASSES
+
 class ActionType(Enum):
     FOLD = "fold"
     CHECK = "check"
@@ -45,21 +47,7 @@ class PokerSimulator:
     
     def __init__(self, stack_size: int = 100):
         self.stack_size = stack_size
-        self.all_hands = self._generate_all_hands()
-    
-    def _generate_all_hands(self) -> List[str]:
-        """生成所有起手牌"""
-        ranks = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
-        hands = []
-        for i, r1 in enumerate(ranks):
-            for j, r2 in enumerate(ranks):
-                if i == j:
-                    hands.append(f"{r1}{r2}")  # 对子
-                elif i < j:
-                    hands.append(f"{r1}{r2}s")  # 同花
-                else:
-                    hands.append(f"{r2}{r1}o")  # 不同花
-        return hands
+        self.all_hands = HAND_CLASSES
     
     def get_hand_strength(self, hand: str) -> int:
         """评估手牌强度 (1-169)"""
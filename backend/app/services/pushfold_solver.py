@@ -0,0 +1,420 @@
+"""
+翻前推/弃 (push/fold) 求解器
+计算 6max 短筹码 (5-25bb) 的推/弃纳什均衡，结果写入预编译策略库
+
+模型:
+    - 所有玩家有效筹码相同，盲注 0.5/1，无前注
+    - 弃牌到某位置时只能全下或弃牌；面对全下时后面的玩家依次跟注或弃牌，
+      第一个跟注者出现后其余玩家弃牌 (单跟注者近似)
+    - 摊牌胜率来自 169x169 手牌类胜率矩阵 (蒙特卡洛，已考虑两手牌之间的去牌)
+
+求解使用虚拟对弈 (fictitious play)：每轮对全部决策点同时求最优反应并并入平均策略，
+所有决策点在 169 维上向量化；可剥削度 (各位置偏离平均策略能多赢的 bb 之和) 作为收敛指标
+
+运行:
+    python -m app.services.pushfold_solver solve [--stacks 5-25] [--workers 4]
+    python -m app.services.pushfold_solver report
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.cards import CLASS_COMBOS, COMBO_CARDS, COMBO_CLASS, NUM_HAND_CLASSES
+from app.services.gto_engine import GTOStrategy
+from app.services.hand_evaluator import evaluate_batch
+from app.services.strategy_store import (
+    get_store_path, load_or_build_tables, preflop_table_name, read_tables,
+    reset_strategy_store, write_store,
+)
+
+POSITIONS = GTOStrategy.POSITIONS
+PUSHERS = POSITIONS[:-1]  # BB 不会面对 "弃牌到你" 的全下决策
+BLINDS = np.array([0.0, 0.0, 0.0, 0.0, 0.5, 1.0])
+TOTAL_BLINDS = float(BLINDS.sum())
+
+DEFAULT_STACKS = tuple(range(5, 26))
+DEFAULT_ITERATIONS = 2000
+DEFAULT_EQUITY_ROUNDS = 1000
+EQUITY_CHUNK_ROUNDS = 50
+
+EQUITY_TABLE_NAME = "equity/preflop169"
+
+# 写入翻前策略表时，把虚拟对弈平均策略里残留的极小频率归零 (纯策略手牌不显示 0.1% 的噪声)
+PURIFY_THRESHOLD = 0.01
+
+
+def pushfold_table_name(stack_size: int) -> str:
+    return f"pushfold/{stack_size}"
+
+
+# 每类手牌的组合数，作为对手范围的先验权重
+CLASS_WEIGHTS = np.bincount(COMBO_CLASS, minlength=NUM_HAND_CLASSES).astype(np.float64)
+
+# CLASS_COMBO_TABLE[类, k] = 该类的第 k 个组合 (不足 12 个的类后面不会被抽到)
+CLASS_COMBO_TABLE = np.zeros((NUM_HAND_CLASSES, 12), dtype=np.int64)
+for _cls, _combos in enumerate(CLASS_COMBOS):
+    CLASS_COMBO_TABLE[_cls, :len(_combos)] = _combos
+
+
+# ==================== 169x169 胜率矩阵 ====================
+
+def _class_pairs() -> Tuple[np.ndarray, np.ndarray]:
+    i, j = np.triu_indices(NUM_HAND_CLASSES, k=1)
+    return i, j
+
+
+def _sample_combos(classes: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """每个手牌类随机取一个具体组合，返回 (M, 2) 牌 id"""
+    counts = CLASS_WEIGHTS[classes].astype(np.int64)
+    picks = (rng.random(len(classes)) * counts).astype(np.int64)
+    return COMBO_CARDS[CLASS_COMBO_TABLE[classes, picks]].astype(np.int64)
+
+
+def _equity_chunk(seed: np.random.SeedSequence, rounds: int) -> np.ndarray:
+    """对全部手牌类对各模拟 rounds 次，返回 (对数,) 的累计得分 (胜 1, 平 0.5)"""
+    rng = np.random.default_rng(seed)
+    first, second = _class_pairs()
+    scores = np.zeros(len(first))
+
+    for _ in range(rounds):
+        hand_a = _sample_combos(first, rng)
+        hand_b = _sample_combos(second, rng)
+
+        # 两手牌共用了同一张牌时重抽第二手
+        clash = (hand_a[:, :, None] == hand_b[:, None, :]).any(axis=(1, 2))
+        while clash.any():
+            hand_b[clash] = _sample_combos(second[clash], rng)
+            clash = (hand_a[:, :, None] == hand_b[:, None, :]).any(axis=(1, 2))
+
+        keys = rng.random((len(first), 52))
+        rows = np.arange(len(first))[:, None]
+        keys[rows, hand_a] = 2.0
+        keys[rows, hand_b] = 2.0
+        board = np.argpartition(keys, 5, axis=1)[:, :5]
+
+        score_a = evaluate_batch(np.concatenate([hand_a, board], axis=1))
+        score_b = evaluate_batch(np.concatenate([hand_b, board], axis=1))
+        scores += (score_a > score_b) + 0.5 * (score_a == score_b)
+    return scores
+
+
+def compute_equity_matrix(rounds: int = DEFAULT_EQUITY_ROUNDS, workers: int = 1,
+                          seed: int = 0) -> np.ndarray:
+    """
+    计算 169x169 全下胜率矩阵 E[i, j] = 手牌类 i 对 j 的胜率
+    按固定大小的块拆分随机种子，结果与 workers 数量无关
+    """
+    chunks = [EQUITY_CHUNK_ROUNDS] * (rounds // EQUITY_CHUNK_ROUNDS)
+    if rounds % EQUITY_CHUNK_ROUNDS:
+        chunks.append(rounds % EQUITY_CHUNK_ROUNDS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            totals = sum(pool.map(_equity_chunk, seeds, chunks))
+    else:
+        totals = sum(_equity_chunk(s, r) for s, r in zip(seeds, chunks))
+
+    first, second = _class_pairs()
+    equity = np.full((NUM_HAND_CLASSES, NUM_HAND_CLASSES), 0.5)
+    equity[first, second] = totals / rounds
+    equity[second, first] = 1.0 - equity[first, second]
+    return equity
+
+
+# ==================== 推/弃博弈 ====================
+
+@dataclass
+class PushFoldSolution:
+    stack_size: int
+    push: np.ndarray  # (6, 169) 弃牌到该位置时的全下频率 (BB 行为 0)
+    call: np.ndarray  # (6, 6, 169) [全下者, 跟注者] 的跟注频率
+    exploitability: float  # bb/手，各位置最优反应收益之和
+    history: List[Tuple[int, float]] = field(default_factory=list)
+
+
+def _range_weights(strategy: np.ndarray) -> np.ndarray:
+    """策略频率 * 组合数 -> 未归一化的范围权重"""
+    return strategy * CLASS_WEIGHTS
+
+
+def _range_rates(strategy: np.ndarray) -> np.ndarray:
+    """策略在全部 1326 个组合上的执行概率"""
+    return _range_weights(strategy).sum(axis=-1) / CLASS_WEIGHTS.sum()
+
+
+def _reach_probabilities(push: np.ndarray, call: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    到达各决策点的概率
+    返回 (push_reach (6,): 弃牌到该位置, call_reach (6, 6): [全下者, 跟注者] 面对全下且前面无人跟注)
+    """
+    n = len(POSITIONS)
+    push_rates = _range_rates(push)
+    call_rates = _range_rates(call)
+    push_reach = np.zeros(n)
+    call_reach = np.zeros((n, n))
+
+    folded_to = 1.0
+    for p in range(len(PUSHERS)):
+        push_reach[p] = folded_to
+        folded_to *= 1.0 - push_rates[p]
+
+        reach = push_reach[p] * push_rates[p]
+        for k in range(p + 1, n):
+            call_reach[p, k] = reach
+            reach *= 1.0 - call_rates[p, k]
+    return push_reach, call_reach
+
+
+def _action_values(push: np.ndarray, call: np.ndarray, equity: np.ndarray,
+                   stack: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    在给定 (平均) 策略下计算每个决策点的全下 / 跟注 EV (相对弃牌，bb)
+    返回 (push_ev (6, 169), call_ev (6, 6, 169))
+    """
+    n = len(POSITIONS)
+    push_ev = np.zeros((n, NUM_HAND_CLASSES))
+    call_ev = np.zeros((n, n, NUM_HAND_CLASSES))
+    call_rates = _range_rates(call)
+
+    for p in range(len(PUSHERS)):
+        push_range = _range_weights(push[p])
+        push_total = push_range.sum()
+        eq_vs_push = equity @ push_range / push_total if push_total > 0 else None
+
+        ev = np.zeros(NUM_HAND_CLASSES)
+        no_caller = 1.0
+        for k in range(p + 1, n):
+            pot = 2 * stack + TOTAL_BLINDS - BLINDS[p] - BLINDS[k]
+
+            # 跟注者: 对全下范围的胜率
+            if eq_vs_push is not None:
+                call_ev[p, k] = eq_vs_push * pot - (stack - BLINDS[k])
+
+            # 全下者: 被 k 跟注 (且前面无人跟注) 时对其跟注范围的胜率
+            call_range = _range_weights(call[p, k])
+            call_total = call_range.sum()
+            if call_total > 0:
+                eq_vs_call = equity @ call_range / call_total
+                ev += no_caller * call_rates[p, k] * (eq_vs_call * pot - (stack - BLINDS[p]))
+            no_caller *= 1.0 - call_rates[p, k]
+
+        push_ev[p] = ev + no_caller * TOTAL_BLINDS
+    return push_ev, call_ev
+
+
+def _exploitability(push: np.ndarray, call: np.ndarray, equity: np.ndarray, stack: float) -> float:
+    """每个位置改用最优反应能多赢的 bb (按到达概率与手牌组合加权) 之和"""
+    push_ev, call_ev = _action_values(push, call, equity, stack)
+    push_reach, call_reach = _reach_probabilities(push, call)
+    prior = CLASS_WEIGHTS / CLASS_WEIGHTS.sum()
+    gain = 0.0
+    for p in range(len(PUSHERS)):
+        gain += push_reach[p] * prior @ (np.maximum(push_ev[p], 0) - push[p] * push_ev[p])
+        for k in range(p + 1, len(POSITIONS)):
+            gain += call_reach[p, k] * prior @ (np.maximum(call_ev[p, k], 0) - call[p, k] * call_ev[p, k])
+    return float(gain)
+
+
+def solve_stack(stack_size: int, equity: np.ndarray, iterations: int = DEFAULT_ITERATIONS,
+                tolerance: float = 1e-4, report_every: int = 100) -> PushFoldSolution:
+    """求解单个筹码深度的推/弃均衡"""
+    n = len(POSITIONS)
+    push = np.zeros((n, NUM_HAND_CLASSES))
+    push[:len(PUSHERS)] = 0.5
+    call = np.zeros((n, n, NUM_HAND_CLASSES))
+    for p in range(len(PUSHERS)):
+        call[p, p + 1:] = 0.5
+
+    history = []
+    exploitability = float("inf")
+    for t in range(1, iterations + 1):
+        push_ev, call_ev = _action_values(push, call, equity, float(stack_size))
+
+        # 最优反应是纯策略，以 1/(t+1) 的步长并入平均策略
+        step = 1.0 / (t + 1)
+        best_push = (push_ev > 0).astype(np.float64)
+        best_call = (call_ev > 0).astype(np.float64)
+        best_push[len(PUSHERS):] = 0.0
+        for p in range(n):
+            best_call[p, :p + 1] = 0.0
+        push += step * (best_push - push)
+        call += step * (best_call - call)
+
+        if t % report_every == 0 or t == iterations:
+            exploitability = _exploitability(push, call, equity, float(stack_size))
+            history.append((t, exploitability))
+            if exploitability < tolerance:
+                break
+
+    return PushFoldSolution(stack_size, push, call, exploitability, history)
+
+
+# ==================== 写入策略库 ====================
+
+def _vs_all_in_calls(solution: PushFoldSolution) -> np.ndarray:
+    """
+    面对全下时各位置的跟注频率 (按各全下位置的到达概率 * 全下率加权平均)
+    返回 (6, 169)，UTG 行为 0
+    """
+    _, call_reach = _reach_probabilities(solution.push, solution.call)
+    calls = np.zeros((len(POSITIONS), NUM_HAND_CLASSES))
+    for k in range(1, len(POSITIONS)):
+        weights = call_reach[:k, k]
+        if weights.sum() > 0:
+            calls[k] = weights @ solution.call[:k, k] / weights.sum()
+    return calls
+
+
+def _purify(freqs: np.ndarray) -> np.ndarray:
+    return np.where(freqs < PURIFY_THRESHOLD, 0.0, np.where(freqs > 1 - PURIFY_THRESHOLD, 1.0, freqs))
+
+
+def apply_to_preflop_table(table: np.ndarray, solution: PushFoldSolution) -> np.ndarray:
+    """把推/弃解写入翻前策略张量的 open (全下/弃牌) 与 vs_all_in (跟注/弃牌) 场景"""
+    table = table.copy()
+    actions = GTOStrategy.action_labels(solution.stack_size)
+    contexts = list(GTOStrategy.ACTIONS_TO_YOU)
+    shove, call, fold = actions.index('raise_all_in'), actions.index('call'), actions.index('fold')
+    open_idx, vs_all_in_idx = contexts.index('open'), contexts.index('vs_all_in')
+
+    for p in range(len(PUSHERS)):
+        push = _purify(solution.push[p])
+        table[p, open_idx] = 0.0
+        table[p, open_idx, :, shove] = push
+        table[p, open_idx, :, fold] = 1.0 - push
+
+    calls = _purify(_vs_all_in_calls(solution))
+    for k in range(1, len(POSITIONS)):
+        table[k, vs_all_in_idx] = 0.0
+        table[k, vs_all_in_idx, :, call] = calls[k]
+        table[k, vs_all_in_idx, :, fold] = 1.0 - calls[k]
+    return table.astype(np.float32)
+
+
+def _solve_worker(args) -> PushFoldSolution:
+    stack_size, equity, iterations = args
+    return solve_stack(stack_size, equity, iterations)
+
+
+def solve_grid(stacks: Iterable[int], equity: np.ndarray, iterations: int = DEFAULT_ITERATIONS,
+               workers: int = 1) -> List[PushFoldSolution]:
+    """并行求解多个筹码深度"""
+    jobs = [(s, equity, iterations) for s in stacks]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_solve_worker, jobs))
+    return [_solve_worker(job) for job in jobs]
+
+
+def write_solutions(solutions: List[PushFoldSolution], equity: np.ndarray,
+                    tables: Dict[str, Tuple[np.ndarray, Dict]], equity_meta: Dict) -> None:
+    """把推/弃解、胜率矩阵和更新后的翻前策略表写入 tables (原地修改)"""
+    tables[EQUITY_TABLE_NAME] = (equity.astype(np.float32), equity_meta)
+
+    for solution in solutions:
+        stack_size = solution.stack_size
+        meta = {
+            "stack_size": stack_size,
+            "positions": POSITIONS,
+            "exploitability": solution.exploitability,
+            "iterations": solution.history[-1][0] if solution.history else 0,
+        }
+        tables[pushfold_table_name(stack_size) + "/push"] = (solution.push.astype(np.float32), meta)
+        tables[pushfold_table_name(stack_size) + "/call"] = (solution.call.astype(np.float32), meta)
+
+        name = preflop_table_name(stack_size)
+        strategy = GTOStrategy(stack_size)
+        existing = tables.get(name)
+        base = existing[0] if existing is not None and existing[0].shape == strategy.table_shape \
+            else strategy.table
+        tables[name] = (apply_to_preflop_table(base, solution), {
+            "stack_size": stack_size,
+            "positions": GTOStrategy.POSITIONS,
+            "contexts": list(GTOStrategy.ACTIONS_TO_YOU),
+            "actions": GTOStrategy.action_labels(stack_size),
+            "source": "pushfold",
+        })
+
+
+def load_equity_matrix(tables: Dict[str, Tuple[np.ndarray, Dict]],
+                       rounds: int) -> Optional[Tuple[np.ndarray, Dict]]:
+    """复用策略库中模拟次数不少于 rounds 的胜率矩阵"""
+    entry = tables.get(EQUITY_TABLE_NAME)
+    if entry is None or entry[1].get("rounds", 0) < rounds:
+        return None
+    return entry[0].astype(np.float64), entry[1]
+
+
+def format_report(solutions: List[PushFoldSolution]) -> str:
+    lines = [f"{'stack':>6}{'iters':>8}{'exploit (bb)':>14}  push % (UTG MP CO BTN SB)"]
+    for s in solutions:
+        rates = _range_rates(s.push[:len(PUSHERS)])
+        iters = s.history[-1][0] if s.history else 0
+        lines.append(
+            f"{s.stack_size:>6}{iters:>8}{s.exploitability:>14.5f}  "
+            + " ".join(f"{r:5.1%}" for r in rates)
+        )
+    return "\n".join(lines)
+
+
+def _parse_stacks(value: str) -> List[int]:
+    stacks = []
+    for part in value.split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            stacks.extend(range(int(low), int(high) + 1))
+        else:
+            stacks.append(int(part))
+    return stacks
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="6-max push/fold solver")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    solve = sub.add_parser("solve", help="solve a stack grid and write it to the strategy store")
+    solve.add_argument("--stacks", default="5-25", help="e.g. 5-25 or 10,15,20")
+    solve.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    solve.add_argument("--equity-rounds", type=int, default=DEFAULT_EQUITY_ROUNDS)
+    solve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    solve.add_argument("--seed", type=int, default=0)
+    solve.add_argument("--store", default=None, help="strategy store path")
+
+    report = sub.add_parser("report", help="print convergence report of solved stacks")
+    report.add_argument("--store", default=None)
+
+    args = parser.parse_args(argv)
+    store_path = args.store or get_store_path()
+
+    if args.command == "report":
+        tables = read_tables(store_path)
+        solved = [meta for name, (_, meta) in tables.items()
+                  if name.startswith("pushfold/") and name.endswith("/push")]
+        for meta in sorted(solved, key=lambda m: m["stack_size"]):
+            print(f"{meta['stack_size']:>4}bb  iterations {meta['iterations']:>6}  "
+                  f"exploitability {meta['exploitability']:.5f} bb")
+        return
+
+    tables = load_or_build_tables(store_path)
+    cached = load_equity_matrix(tables, args.equity_rounds)
+    if cached is not None:
+        equity, equity_meta = cached
+    else:
+        equity = compute_equity_matrix(args.equity_rounds, args.workers, args.seed)
+        equity_meta = {"rounds": args.equity_rounds, "seed": args.seed}
+
+    solutions = solve_grid(_parse_stacks(args.stacks), equity, args.iterations, args.workers)
+    write_solutions(solutions, equity, tables, equity_meta)
+    write_store(store_path, tables)
+    reset_strategy_store()
+    print(format_report(solutions))
+    print(f"Strategy store written to {store_path}")
+
+
+if __name__ == "__main__":
+    main()
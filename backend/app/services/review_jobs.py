@@ -0,0 +1,55 @@
+"""
+物化复盘的后台重算
+REVIEW_VERSION 递增后 (或迁移后的旧牌局没有复盘)，按 id 分批重算已结束牌局的复盘
+应用启动时在后台线程运行一次 (FULLHAND_REVIEW_RECOMPUTE)；多个 worker 同时运行时，
+写入冲突的一批回滚后重查，已被其他 worker 更新的牌局不会再被选中
+
+也可手动运行:
+    cd backend && python -m app.services.review_jobs
+"""
+import logging
+import threading
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.fullhand_service import FullHandService
+
+logger = logging.getLogger(__name__)
+
+
+def recompute_stale_reviews(batch_size: int = 200) -> int:
+    """重算全部版本落后的复盘，返回写入条数"""
+    total = 0
+    after_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            updated, last_id = FullHandService(db).recompute_reviews(after_id, batch_size)
+        finally:
+            db.close()
+        if last_id is None:
+            break
+        total += updated
+        after_id = last_id
+    if total:
+        logger.info(f"Recomputed {total} hand reviews")
+    return total
+
+
+def start_review_recompute() -> threading.Thread:
+    """在守护线程中运行 recompute_stale_reviews，不阻塞启动"""
+
+    def run() -> None:
+        try:
+            recompute_stale_reviews(settings.FULLHAND_REVIEW_BATCH)
+        except Exception:
+            logger.exception("Review recompute failed")
+
+    thread = threading.Thread(target=run, name="review-recompute", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Recomputed {recompute_stale_reviews(settings.FULLHAND_REVIEW_BATCH)} hand reviews")
@@ -0,0 +1,76 @@
+"""
+混合策略采样
+对策略表的每一格预建 Walker/Vose 别名表，单次采样 O(1)，
+并支持用 NumPy Generator 对成批的格子向量化采样
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def build_alias_tables(probs: np.ndarray, default_action: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    为最后一维是行动频率的策略表构建别名表
+    返回 (accept, alias)，形状与 probs 相同:
+        抽到第 k 列时，以 accept[..., k] 的概率选 k，否则选 alias[..., k]
+    负频率按 0 处理 (规则生成的策略表在多项下调叠加的格子里可能为负)
+    全零的格子整行视为 default_action (默认最后一列) 频率为 1
+    """
+    n = probs.shape[-1]
+    flat = np.clip(probs.reshape(-1, n).astype(np.float64), 0.0, None)
+    cells = np.arange(flat.shape[0])
+
+    totals = flat.sum(axis=1)
+    empty = totals <= 0
+    flat[empty] = 0.0
+    flat[empty, default_action] = 1.0
+    totals[empty] = 1.0
+
+    scaled = flat / totals[:, None] * n
+    accept = np.ones_like(scaled)
+    alias = np.tile(np.arange(n), (flat.shape[0], 1))
+    done = np.zeros(scaled.shape, dtype=bool)
+
+    # 每一轮在所有格子上同时配对一个 "小" 列和一个 "大" 列，最多 n - 1 轮
+    for _ in range(n - 1):
+        small_mask = ~done & (scaled < 1.0)
+        large_mask = ~done & (scaled >= 1.0)
+        active = small_mask.any(axis=1) & large_mask.any(axis=1)
+        if not active.any():
+            break
+
+        rows = cells[active]
+        small = np.where(small_mask[rows], scaled[rows], np.inf).argmin(axis=1)
+        large = np.where(large_mask[rows], scaled[rows], -np.inf).argmax(axis=1)
+
+        accept[rows, small] = scaled[rows, small]
+        alias[rows, small] = large
+        done[rows, small] = True
+        scaled[rows, large] -= 1.0 - scaled[rows, small]
+
+    # 剩余未配对的列 (浮点误差范围内等于 1) 直接接受
+    return (
+        accept.astype(np.float32).reshape(probs.shape),
+        alias.astype(np.uint8).reshape(probs.shape),
+    )
+
+
+def alias_draw(accept: np.ndarray, alias: np.ndarray, u: float) -> int:
+    """用一个 [0, 1) 均匀随机数从单格别名表采样，返回行动下标"""
+    n = accept.shape[-1]
+    scaled = u * n
+    k = min(int(scaled), n - 1)
+    return k if scaled - k < accept[k] else int(alias[k])
+
+
+def alias_sample(accept: np.ndarray, alias: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    向量化采样
+    accept / alias: 已按待采样格子取出的 (batch, 行动) 别名表
+    返回 (batch,) 的行动下标
+    """
+    batch, n = accept.shape
+    k = rng.integers(0, n, size=batch)
+    rows = np.arange(batch)
+    keep = rng.random(batch) < accept[rows, k]
+    return np.where(keep, k, alias[rows, k])
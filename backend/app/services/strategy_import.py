@@ -0,0 +1,303 @@
+"""
+外部求解器范围导入
+把 PioSolver / GTO+ 导出的翻前范围流式写入预编译策略库
+
+目录约定 (每个 spot 一个目录或一个 CSV):
+    <root>/<深度>/<位置>/<场景>/<行动>.txt    范围文本: "AA:1,AKs:0.5,AhKh:0.25,..."
+    <root>/<深度>/<位置>/<场景>.csv          按行动分列: hand,raise_2.5bb,call,fold
+
+    e.g. ranges/100/BTN/open/raise_2.5bb.txt
+         ranges/25bb/SB/vs_all_in.csv
+
+弃牌可以省略: 每手牌各行动频率之和不足 1 的部分记为弃牌
+
+逐个 spot 解析并直接写入该深度的策略张量，不在内存里保留整份范围；
+未覆盖的 spot 保留策略库中原有的表 (或规则策略)
+
+导入的表 meta 标记 source: import，`strategy_store build` 重新编译规则表时保留
+(--from-scratch 才会丢弃并输出警告)；生产镜像构建时导入 backend/data/ranges/
+
+导入:
+    python -m app.services.strategy_import ranges/ [--store PATH] [--dry-run]
+"""
+import argparse
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.cards import COMBO_CLASS, NUM_COMBOS, NUM_HAND_CLASSES, parse_hand_combos
+from app.services.gto_engine import GTOStrategy
+from app.services.strategy_store import (
+    get_store_path, load_or_build_tables, preflop_table_name, reset_strategy_store, write_store,
+)
+
+RANGE_SUFFIX = ".txt"
+CSV_SUFFIX = ".csv"
+
+# 每类手牌的具体组合数 (对子 6, 同花 4, 不同花 12)
+CLASS_COMBO_COUNTS = np.bincount(COMBO_CLASS, minlength=NUM_HAND_CLASSES).astype(np.float64)
+
+# 频率和超过 1 的部分大于该值时按比例归一化，不足 1 的部分大于该值时补到弃牌
+NORMALIZE_TOLERANCE = 1e-3
+
+
+class StrategyImportError(Exception):
+    """范围文件无法解析"""
+
+
+@dataclass
+class SpotReport:
+    stack_size: int
+    position: str
+    context: str
+    source: str
+    covered_hands: int = 0
+    normalized_hands: int = 0
+    implicit_fold_hands: int = 0
+    invalid_entries: int = 0
+
+    @property
+    def coverage(self) -> float:
+        return self.covered_hands / NUM_HAND_CLASSES
+
+
+@dataclass
+class ImportReport:
+    spots: List[SpotReport] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = []
+        for spot in self.spots:
+            lines.append(
+                f"{spot.stack_size}bb {spot.position} {spot.context}: "
+                f"{spot.covered_hands}/{NUM_HAND_CLASSES} hands ({spot.coverage:.0%}), "
+                f"normalized {spot.normalized_hands}, implicit fold {spot.implicit_fold_hands}, "
+                f"invalid {spot.invalid_entries}"
+            )
+
+        stacks = sorted({s.stack_size for s in self.spots})
+        cells = len(GTOStrategy.POSITIONS) * len(GTOStrategy.ACTIONS_TO_YOU)
+        for stack_size in stacks:
+            imported = sum(1 for s in self.spots if s.stack_size == stack_size)
+            lines.append(f"{stack_size}bb: {imported}/{cells} spots imported")
+
+        for error in self.errors:
+            lines.append(f"error: {error}")
+        return "\n".join(lines)
+
+
+# ==================== 解析 ====================
+
+def _parse_freq(value: str) -> Optional[float]:
+    try:
+        freq = float(value)
+    except ValueError:
+        return None
+    if not 0.0 <= freq <= 1.0:
+        return None
+    return freq
+
+
+def _iter_range_entries(path: str) -> Iterator[Tuple[str, str]]:
+    """逐行读取范围文本，产出 (手牌, 频率字符串)，省略频率时为 1"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            for token in line.replace(",", " ").split():
+                hand, _, freq = token.partition(":")
+                yield hand, freq or "1"
+
+
+def _read_range_spot(spot_dir: str, actions: List[str], report: SpotReport) -> np.ndarray:
+    """读取一个 spot 目录 (每个行动一个范围文件)，返回组合级频率 (1326, 行动)"""
+    action_index = {a: i for i, a in enumerate(actions)}
+    combos = np.zeros((NUM_COMBOS, len(actions)), dtype=np.float64)
+
+    for entry in sorted(os.scandir(spot_dir), key=lambda e: e.name):
+        action, suffix = os.path.splitext(entry.name)
+        if not entry.is_file() or suffix != RANGE_SUFFIX:
+            continue
+        col = action_index.get(action)
+        if col is None:
+            raise StrategyImportError(f"{entry.path}: unknown action '{action}'")
+
+        for hand, value in _iter_range_entries(entry.path):
+            combo_ids, freq = parse_hand_combos(hand), _parse_freq(value)
+            if combo_ids is None or freq is None:
+                report.invalid_entries += 1
+                continue
+            combos[combo_ids, col] = freq
+    return combos
+
+
+def _read_csv_spot(path: str, actions: List[str], report: SpotReport) -> np.ndarray:
+    """读取一个 spot 的 CSV (第一列手牌，其余每列一个行动)，返回组合级频率"""
+    action_index = {a: i for i, a in enumerate(actions)}
+    combos = np.zeros((NUM_COMBOS, len(actions)), dtype=np.float64)
+
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise StrategyImportError(f"{path}: empty file")
+
+        columns = []
+        for name in header[1:]:
+            col = action_index.get(name.strip())
+            if col is None:
+                raise StrategyImportError(f"{path}: unknown action '{name.strip()}'")
+            columns.append(col)
+
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            combo_ids = parse_hand_combos(row[0].strip())
+            if combo_ids is None or len(row) - 1 != len(columns):
+                report.invalid_entries += 1
+                continue
+            for col, value in zip(columns, row[1:]):
+                freq = _parse_freq(value.strip() or "0")
+                if freq is None:
+                    report.invalid_entries += 1
+                    continue
+                combos[combo_ids, col] = freq
+    return combos
+
+
+def _combos_to_classes(combos: np.ndarray, actions: List[str], report: SpotReport) -> np.ndarray:
+    """
+    组合级频率按手牌类取平均
+    求解器导出通常省略弃牌: 频率和不足 1 的部分 (含未列出的组合、完全没有出现的手牌) 记为弃牌，
+    频率和超过 1 的手牌按比例归一化
+    """
+    block = np.stack([
+        np.bincount(COMBO_CLASS, weights=combos[:, a], minlength=NUM_HAND_CLASSES)
+        for a in range(len(actions))
+    ], axis=1) / CLASS_COMBO_COUNTS[:, None]
+
+    totals = block.sum(axis=1)
+    covered = totals > 0
+    over = totals > 1.0 + NORMALIZE_TOLERANCE
+    under = totals < 1.0 - NORMALIZE_TOLERANCE
+    report.covered_hands = int(covered.sum())
+    report.normalized_hands = int(over.sum())
+    report.implicit_fold_hands = int((covered & under).sum())
+
+    block[over] /= totals[over, None]
+    block[under, actions.index('fold')] += 1.0 - totals[under]
+    return block.astype(np.float32)
+
+
+# ==================== 目录遍历 ====================
+
+def _parse_stack(name: str) -> Optional[int]:
+    name = name.lower()
+    if name.endswith("bb"):
+        name = name[:-2]
+    return int(name) if name.isdigit() else None
+
+
+def iter_spots(root: str) -> Iterator[Tuple[int, str, str, str]]:
+    """遍历导入目录，产出 (深度, 位置, 场景, 路径)"""
+    for stack_entry in sorted(os.scandir(root), key=lambda e: e.name):
+        stack_size = _parse_stack(stack_entry.name)
+        if not stack_entry.is_dir() or stack_size is None:
+            continue
+        for pos_entry in sorted(os.scandir(stack_entry.path), key=lambda e: e.name):
+            if not pos_entry.is_dir():
+                continue
+            for spot_entry in sorted(os.scandir(pos_entry.path), key=lambda e: e.name):
+                if spot_entry.is_dir():
+                    yield stack_size, pos_entry.name, spot_entry.name, spot_entry.path
+                elif spot_entry.name.endswith(CSV_SUFFIX):
+                    context = spot_entry.name[:-len(CSV_SUFFIX)]
+                    yield stack_size, pos_entry.name, context, spot_entry.path
+
+
+# ==================== 导入 ====================
+
+def _base_table(tables: Dict[str, Tuple[np.ndarray, Dict]], stack_size: int) -> np.ndarray:
+    """导入前的策略张量：策略库中已有则沿用，否则按规则构建"""
+    strategy = GTOStrategy(stack_size)
+    existing = tables.get(preflop_table_name(stack_size))
+    if existing is not None and existing[0].shape == strategy.table_shape:
+        return existing[0].copy()
+    return strategy.table.copy()
+
+
+def import_ranges(root: str, tables: Dict[str, Tuple[np.ndarray, Dict]]) -> ImportReport:
+    """把导入目录中的全部 spot 写入 tables (原地修改)"""
+    report = ImportReport()
+    positions = {p: i for i, p in enumerate(GTOStrategy.POSITIONS)}
+    contexts = {c: i for i, c in enumerate(GTOStrategy.ACTIONS_TO_YOU)}
+    imported: Dict[int, np.ndarray] = {}
+
+    for stack_size, position, context, path in iter_spots(root):
+        if position not in positions or context not in contexts:
+            report.errors.append(f"{path}: unknown position or context")
+            continue
+
+        if stack_size not in imported:
+            imported[stack_size] = _base_table(tables, stack_size)
+        actions = GTOStrategy.action_labels(stack_size)
+
+        spot = SpotReport(stack_size, position, context, path)
+        try:
+            if os.path.isdir(path):
+                combos = _read_range_spot(path, actions, spot)
+            else:
+                combos = _read_csv_spot(path, actions, spot)
+        except (StrategyImportError, OSError, UnicodeDecodeError) as e:
+            report.errors.append(str(e))
+            continue
+
+        imported[stack_size][positions[position], contexts[context]] = \
+            _combos_to_classes(combos, actions, spot)
+        report.spots.append(spot)
+
+    for stack_size, table in imported.items():
+        tables[preflop_table_name(stack_size)] = (table, {
+            "stack_size": stack_size,
+            "positions": GTOStrategy.POSITIONS,
+            "contexts": list(GTOStrategy.ACTIONS_TO_YOU),
+            "actions": GTOStrategy.action_labels(stack_size),
+            "source": "import",
+        })
+    return report
+
+
+def import_into_store(root: str, store_path: Optional[str] = None,
+                      dry_run: bool = False) -> ImportReport:
+    """
+    导入范围并重写策略库 (其余表保持不变)
+    有任何错误时不写入，避免策略库只更新了一部分 spot
+    """
+    store_path = store_path or get_store_path()
+    tables = load_or_build_tables(store_path)
+
+    report = import_ranges(root, tables)
+    if not dry_run and report.spots and not report.errors:
+        write_store(store_path, tables)
+        reset_strategy_store()
+    return report
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import solver ranges into the strategy store")
+    parser.add_argument("root", help="range directory (<stack>/<position>/<context>/...)")
+    parser.add_argument("--store", default=None, help="strategy store path")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, do not write")
+    args = parser.parse_args(argv)
+
+    report = import_into_store(args.root, args.store, args.dry_run)
+    print(report.summary())
+    if report.errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
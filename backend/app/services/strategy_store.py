@@ -0,0 +1,334 @@
+"""
+预编译策略库
+将翻前/翻牌策略表序列化为单个带版本的二进制文件，
+gunicorn 各 worker 通过 mmap 只读加载，共享同一份物理内存页
+
+文件格式:
+    [固定头] magic(8) | 格式版本 u16 | 保留 u16 | manifest 长度 u32 | 数据长度 u64 | CRC32 u32
+    [manifest] UTF-8 JSON，记录每张表的 dtype / shape / offset / meta
+    [数据区] 各表按 64 字节对齐依次排列
+
+构建:
+    python -m app.services.strategy_store build [--out PATH] [--from-scratch]
+
+重新构建只替换规则表；推/弃求解 (source: pushfold)、外部导入 (source: import) 的翻前表
+以及求解器的派生表 (pushfold/*、equity/*) 从已有策略库原样保留，--from-scratch 时全部丢弃
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GTOSTORE"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQI")
+ALIGNMENT = 64
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "strategy_store.bin",
+)
+
+
+def get_store_path() -> str:
+    """策略库路径 (可通过 GTO_STRATEGY_STORE 环境变量覆盖)"""
+    return os.getenv("GTO_STRATEGY_STORE", DEFAULT_STORE_PATH)
+
+
+def preflop_table_name(stack_size: int) -> str:
+    return f"preflop/{stack_size}"
+
+
+FLOP_TABLE_NAME = "flop/rules"
+HAND_BUCKET_TABLE_NAME = "flop/hand_buckets"
+
+
+class StrategyStoreError(Exception):
+    """策略库文件损坏或版本不匹配"""
+
+
+class StrategyStore:
+    """只读策略库，所有数组都是 mmap 上的零拷贝视图"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.manifest = self._read_manifest()
+        except Exception:
+            self._mm.close()
+            raise
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def _read_manifest(self) -> Dict:
+        if len(self._mm) < HEADER.size:
+            raise StrategyStoreError("File too small")
+
+        magic, version, _, manifest_len, payload_len, checksum = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise StrategyStoreError("Bad magic")
+        if version != FORMAT_VERSION:
+            raise StrategyStoreError(f"Unsupported format version: {version}")
+
+        body_start = HEADER.size
+        self._payload_start = _align(body_start + manifest_len)
+        if len(self._mm) < self._payload_start + payload_len:
+            raise StrategyStoreError("Truncated file")
+
+        view = memoryview(self._mm)
+        manifest = bytes(view[body_start:body_start + manifest_len])
+        crc = zlib.crc32(manifest)
+        crc = zlib.crc32(view[self._payload_start:self._payload_start + payload_len], crc)
+        view.release()
+        if crc != checksum:
+            raise StrategyStoreError("Checksum mismatch")
+
+        return json.loads(manifest.decode("utf-8"))
+
+    def has(self, name: str) -> bool:
+        return name in self.manifest["tables"]
+
+    def meta(self, name: str) -> Dict:
+        return self.manifest["tables"][name].get("meta", {})
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """获取表的只读视图，不存在时返回 None"""
+        if name in self._arrays:
+            return self._arrays[name]
+
+        entry = self.manifest["tables"].get(name)
+        if entry is None:
+            return None
+
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        array = np.frombuffer(
+            self._mm, dtype=dtype, count=count,
+            offset=self._payload_start + entry["offset"],
+        ).reshape(entry["shape"])
+        self._arrays[name] = array
+        return array
+
+    def tables(self) -> Iterable[str]:
+        return self.manifest["tables"].keys()
+
+    def close(self) -> None:
+        """释放 mmap (之后不能再访问已返回的数组视图)"""
+        self._arrays.clear()
+        self._mm.close()
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_store(path: str, tables: Dict[str, Tuple[np.ndarray, Dict]]) -> None:
+    """
+    写入策略库文件 (先写临时文件再原子替换)
+    tables: {name: (array, meta)}
+    """
+    entries = {}
+    offset = 0
+    for name, (array, meta) in tables.items():
+        offset = _align(offset)
+        entries[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+            "meta": meta,
+        }
+        offset += array.nbytes
+    payload_len = offset
+
+    manifest = json.dumps({"tables": entries}, ensure_ascii=False).encode("utf-8")
+    payload_start = _align(HEADER.size + len(manifest))
+
+    buf = bytearray(payload_start + payload_len)
+    buf[HEADER.size:HEADER.size + len(manifest)] = manifest
+    for name, (array, _) in tables.items():
+        start = payload_start + entries[name]["offset"]
+        buf[start:start + array.nbytes] = np.ascontiguousarray(array).tobytes()
+
+    crc = zlib.crc32(manifest)
+    crc = zlib.crc32(memoryview(buf)[payload_start:], crc)
+    HEADER.pack_into(buf, 0, MAGIC, FORMAT_VERSION, 0, len(manifest), payload_len, crc)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(buf)
+    os.replace(tmp_path, path)
+
+
+def read_tables(path: str) -> Dict[str, Tuple[np.ndarray, Dict]]:
+    """
+    读取策略库中的全部表 (拷贝出 mmap，之后可以原地重写该文件)
+    文件不存在或无效时返回空字典
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        store = StrategyStore(path)
+    except (StrategyStoreError, ValueError, OSError) as e:
+        logger.warning("Ignoring existing strategy store %s: %s", path, e)
+        return {}
+    
+    try:
+        return {name: (np.array(store.get(name)), store.meta(name)) for name in store.tables()}
+    finally:
+        store.close()
+
+
+def build_tables(stacks: Iterable[int]) -> Dict[str, Tuple[np.ndarray, Dict]]:
+    """用规则引擎构建全部策略表"""
+    from app.services.gto_engine import GTOStrategy
+    from app.services.flop_strategy import FlopStrategyEngine
+    from app.services.hand_buckets import build_hand_bucket_table, hand_bucket_meta
+
+    tables = {}
+    for stack_size in stacks:
+        strategy = GTOStrategy(stack_size)
+        tables[preflop_table_name(stack_size)] = (strategy.table, {
+            "stack_size": stack_size,
+            "positions": strategy.POSITIONS,
+            "contexts": strategy.contexts,
+            "actions": strategy.actions,
+        })
+
+    flop_engine = FlopStrategyEngine(use_table=False)
+    tables[FLOP_TABLE_NAME] = (flop_engine.compile_table(), flop_engine.table_meta())
+    tables[HAND_BUCKET_TABLE_NAME] = (build_hand_bucket_table(), hand_bucket_meta())
+    return tables
+
+
+# 重新构建时保留的表来源 (meta["source"])
+PRESERVED_SOURCES = ("pushfold", "import")
+RULE_TABLE_PREFIXES = ("preflop/", "flop/")
+
+
+def _is_preserved(name: str, meta: Dict) -> bool:
+    """求解 / 导入的表，以及不是由规则引擎生成的表"""
+    return meta.get("source") in PRESERVED_SOURCES or not name.startswith(RULE_TABLE_PREFIXES)
+
+
+def merge_preserved(tables: Dict[str, Tuple[np.ndarray, Dict]],
+                    existing: Dict[str, Tuple[np.ndarray, Dict]]) -> List[str]:
+    """
+    把已有策略库中需要保留的表并入新构建的规则表 (原地修改 tables)
+    形状与新规则表不一致的 (行动标签已变化) 无法沿用，返回这些被丢弃的表名
+    """
+    dropped = []
+    for name, (array, meta) in existing.items():
+        if not _is_preserved(name, meta):
+            continue
+        rule = tables.get(name)
+        if rule is not None and rule[0].shape != array.shape:
+            dropped.append(name)
+            continue
+        tables[name] = (array, meta)
+    return dropped
+
+
+def build_store(path: Optional[str] = None, stacks: Optional[Iterable[int]] = None,
+                from_scratch: bool = False) -> str:
+    """
+    构建并写入策略库，返回文件路径
+    默认保留已有策略库中求解 / 导入的表；from_scratch 时只写规则表，丢弃的表记录警告
+    """
+    from app.services.gto_engine import PRECOMPUTED_STACKS
+
+    path = path or get_store_path()
+    tables = build_tables(stacks or PRECOMPUTED_STACKS)
+    existing = read_tables(path)
+    if from_scratch:
+        dropped = [name for name, (_, meta) in existing.items() if _is_preserved(name, meta)]
+    else:
+        dropped = merge_preserved(tables, existing)
+    if dropped:
+        logger.warning("Dropping solved / imported strategy tables: %s", ", ".join(sorted(dropped)))
+    write_store(path, tables)
+    return path
+
+
+def load_or_build_tables(path: str) -> Dict[str, Tuple[np.ndarray, Dict]]:
+    """读取已有策略库的全部表，没有可用的策略库时按规则构建默认表"""
+    tables = read_tables(path)
+    if not tables:
+        from app.services.gto_engine import PRECOMPUTED_STACKS
+        tables = build_tables(PRECOMPUTED_STACKS)
+    return tables
+
+
+# 进程内单例
+_store: Optional[StrategyStore] = None
+_store_loaded = False
+
+
+def get_strategy_store() -> Optional[StrategyStore]:
+    """
+    获取策略库 (每个进程只打开一次)
+    文件不存在或校验失败时返回 None，调用方回退到进程内构建
+    """
+    global _store, _store_loaded
+    if _store_loaded:
+        return _store
+
+    _store_loaded = True
+    path = get_store_path()
+    if not os.path.exists(path):
+        logger.info("Strategy store not found at %s, building strategies in process", path)
+        return None
+
+    try:
+        _store = StrategyStore(path)
+    except (StrategyStoreError, ValueError, OSError) as e:
+        logger.warning("Ignoring strategy store %s: %s", path, e)
+        _store = None
+    return _store
+
+
+def reset_strategy_store() -> None:
+    """丢弃已加载的策略库 (重新构建文件后调用)"""
+    global _store, _store_loaded
+    _store = None
+    _store_loaded = False
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="GTO strategy store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="compile all strategy tables")
+    build.add_argument("--out", default=None, help="output path")
+    build.add_argument("--stacks", default=None, help="comma separated stack depths")
+    build.add_argument("--from-scratch", action="store_true",
+                       help="discard solved / imported tables instead of keeping them")
+
+    info = sub.add_parser("info", help="print store manifest")
+    info.add_argument("--path", default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        stacks = [int(s) for s in args.stacks.split(",")] if args.stacks else None
+        path = build_store(args.out, stacks, args.from_scratch)
+        print(f"Strategy store written to {path} ({os.path.getsize(path)} bytes)")
+    elif args.command == "info":
+        store = StrategyStore(args.path or get_store_path())
+        for name in store.tables():
+            entry = store.manifest["tables"][name]
+            print(f"{name}: {entry['dtype']} {tuple(entry['shape'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from datetime import datetime
-from typing import List, Optional, Dict
+from functools import lru_cache
+from typing import List, Optional, Dict, Tuple
+import hashlib
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.training_session import TrainingSession
@@ -7,9 +9,9 @@ from app.models.training_record import TrainingRecord
 from app.models.user import User
 from app.schemas.training import (
     TrainingSessionCreate, TrainingAnswer, TrainingResult,
-    TrainingCompleteResponse, TrainingRecordItem, DailyStats, OverallStats
+    TrainingCompleteResponse, TrainingRecordItem, DailyStats, OverallStats, RangeGrid
 )
-from app.services.gto_engine import generate_training_scenarios, get_gto_strategy
+from app.services.gto_engine import ALL_HANDS, generate_training_scenarios, get_gto_strategy
 import random
 import json
 
@@ -348,3 +350,32 @@ def get_hand_advice(
     """获取手牌建议"""
     strategy = get_gto_strategy(stack_size)
     return strategy.get_advice(hand, position, action_to_you)
+
+
+def get_range_grid(stack_size: int, position: str, action_to_you: str) -> Optional[Tuple[str, bytes]]:
+    """
+    获取整张范围表 (已序列化的 JSON 与强 ETag)
+    位置或场景无法识别时返回 None
+    """
+    context = get_gto_strategy(stack_size).resolve_context(action_to_you)
+    if context is None:
+        return None
+    return _encode_range_grid(stack_size, position, context)
+
+
+@lru_cache(maxsize=512)
+def _encode_range_grid(stack_size: int, position: str, action_to_you: str) -> Optional[Tuple[str, bytes]]:
+    """策略表是确定的，序列化结果按 (深度, 位置, 场景) 缓存，重复请求不再编码"""
+    frequencies = get_gto_strategy(stack_size).get_range_grid(position, action_to_you)
+    if frequencies is None:
+        return None
+    
+    body = RangeGrid(
+        stack_size=stack_size,
+        position=position,
+        action_to_you=action_to_you,
+        hands=ALL_HANDS,
+        frequencies=frequencies,
+    ).model_dump_json().encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return etag, body
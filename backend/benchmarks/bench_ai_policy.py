@@ -0,0 +1,252 @@
+"""
+编译后的 AI 策略校验与基准
+1. 合法性: 各 ai_level、各筹码深度打若干手，每个决策都是合法行动，加注额不低于最小加注、下注额不超过筹码
+2. 采样: 对随机抽取的翻前 / 翻牌策略格大量采样，频率与编译后的 (归一化) 策略一致
+3. 确定性: 同一 seed 打两遍行动记录相同；中途快照恢复后继续行动，结果与不中断一致
+4. 风格: 无界面模拟下激进 > 标准 > 跟注站的下注加注占比，跟注站弃牌最少
+5. 耗时: 原实现 (每次决策查询策略字典、格式化手牌、取最高频行动) 与编译策略的单次决策，
+   以及 _run_ai_until_hero_turn 中每个 AI 行动的平均耗时
+
+运行:
+    cd backend && python -m benchmarks.bench_ai_policy
+"""
+import random
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.ai_policy import AI_PROFILES, AIPolicy, _draw, decision_uniform, get_ai_policy
+from app.services.fullhand_engine import (
+    ACT_ALLIN, ACT_BET, ACT_FOLD, ACT_RAISE, ACTION_NAMES,
+    FullHandEngine, GameStatus, HandEvaluator, Street,
+)
+from app.services.fullhand_service import FullHandService
+from app.services.gto_engine import GTOStrategy, get_gto_strategy
+from app.services.headless_engine import simulate
+
+STACKS = (20, 50, 100)
+LEGALITY_HANDS = 1500
+SAMPLE_CELLS = 40
+SAMPLES = 100_000
+SAMPLE_TOLERANCE = 0.01
+DETERMINISM_HANDS = 300
+STYLE_HANDS = 20_000
+TIMING_HANDS = 3000
+
+
+def _legacy_decision(engine: FullHandEngine, legal_actions: List[str]) -> str:
+    """原实现 (FullHandService._ai_decision): 翻前取最高频行动，其余按过牌 > 跟注 > 弃牌"""
+    player = engine.players[engine._to_act_seat]
+    if engine.street == Street.PREFLOP:
+        gto = get_gto_strategy(engine.stack_bb)
+        hand = HandEvaluator.format_hand_ids(player.hole_ids)
+        if engine.current_bet == 1.0:
+            action_to_you = "open"
+        else:
+            action_to_you = GTOStrategy.raise_context(engine.current_bet)
+        try:
+            strategy = gto.get_strategy(hand, player.position, action_to_you)
+            best = max(strategy.items(), key=lambda x: x[1])[0]
+            action_map = {
+                "fold": "fold", "call": "call", "raise_2bb": "raise", "raise_2.5bb": "raise",
+                "raise_3bb": "raise", "limp": "call", "check": "check", "all_in": "allin",
+            }
+            mapped = action_map.get(best, "call")
+            if mapped in legal_actions:
+                return mapped
+        except Exception:
+            pass
+    for action in ("check", "call", "fold"):
+        if action in legal_actions:
+            return action
+    return legal_actions[0]
+
+
+def _check_decision(engine: FullHandEngine, legal: List[int], code: int, amount: Optional[float]) -> Optional[str]:
+    player = engine.players[engine._to_act_seat]
+    if code not in legal:
+        return f"illegal {ACTION_NAMES[code]} (legal {[ACTION_NAMES[c] for c in legal]})"
+    if code == ACT_RAISE:
+        if amount < engine.current_bet + engine._last_raise_size - 1e-9:
+            return f"raise to {amount} below min raise"
+        if amount >= player.stack + player.committed_this_street:
+            return f"raise to {amount} should be all-in"
+    if code == ACT_BET and not 0 < amount < player.stack:
+        return f"bet {amount} with stack {player.stack}"
+    return None
+
+
+def check_legality() -> List[str]:
+    failures = []
+    decisions = 0
+    for level in AI_PROFILES:
+        for stack in STACKS:
+            policy = get_ai_policy(level, stack)
+            for i in range(LEGALITY_HANDS):
+                engine = FullHandEngine(stack_bb=stack, seed=f"{level}-{stack}-{i}")
+                engine.initialize_game()
+                for _ in range(200):
+                    legal = engine.legal_action_codes()
+                    if engine.status == GameStatus.ENDED or not legal:
+                        break
+                    code, amount = policy.decide(engine, legal, decision_uniform(engine))
+                    problem = _check_decision(engine, legal, code, amount)
+                    if problem:
+                        failures.append(f"{level}/{stack}bb {engine.seed} {engine.street.value}: {problem}")
+                        break
+                    engine._act(code, amount)
+                    decisions += 1
+    print(f"legality: {decisions} decisions, {len(failures)} illegal")
+    return failures
+
+
+def _sampled_error(accept: List[float], alias: List[int], probs: np.ndarray, rng: np.random.Generator) -> float:
+    counts = np.bincount([_draw(accept, alias, u) for u in rng.random(SAMPLES)], minlength=len(probs))
+    expected = probs / probs.sum() if probs.sum() > 0 else np.eye(len(probs))[-1]
+    return float(np.abs(counts / SAMPLES - expected).max())
+
+
+def check_sampling() -> List[str]:
+    failures = []
+    rng = np.random.default_rng(3)
+    policy = get_ai_policy("aggressive", 100)
+    preflop = policy.preflop_probs.reshape(-1, policy.preflop_probs.shape[-1])
+    flop = policy.flop.probs.reshape(-1, policy.flop.probs.shape[-1])
+    worst = 0.0
+    for name, probs, accept, alias in (
+        ("preflop", preflop, policy._preflop_accept, policy._preflop_alias),
+        ("flop", flop, policy.flop.accept, policy.flop.alias),
+    ):
+        # 只抽非纯策略的格子
+        mixed = np.flatnonzero((probs > 0).sum(axis=1) > 1)
+        for cell in rng.choice(mixed, size=min(SAMPLE_CELLS, len(mixed)), replace=False):
+            error = _sampled_error(accept[cell], alias[cell], probs[cell], rng)
+            worst = max(worst, error)
+            if error > SAMPLE_TOLERANCE:
+                failures.append(f"{name} cell {cell}: sampled frequency off by {error:.4f}")
+    print(f"sampling: worst frequency error {worst:.4f}")
+    return failures
+
+
+def _play(engine: FullHandEngine, policy: AIPolicy, max_actions: int = 200) -> None:
+    for _ in range(max_actions):
+        if engine.status == GameStatus.ENDED or not policy.act(engine):
+            return
+
+
+def check_determinism() -> List[str]:
+    failures = []
+    policy = get_ai_policy("standard", 100)
+    for i in range(DETERMINISM_HANDS):
+        seed = f"c1-{i:016x}"
+        runs = []
+        for interrupt in (None, 3, 6):
+            engine = FullHandEngine(stack_bb=100, seed=seed)
+            engine.initialize_game()
+            if interrupt is not None:
+                _play(engine, policy, interrupt)
+                engine = FullHandEngine.from_snapshot(engine.to_snapshot())
+            _play(engine, policy)
+            runs.append([(a.seat, a.action, a.amount, a.street) for a in engine.action_log])
+        if runs[1] != runs[0] or runs[2] != runs[0]:
+            failures.append(f"hand {seed}: actions differ after snapshot restore")
+    print(f"determinism: {DETERMINISM_HANDS} hands, {len(failures)} differ")
+    return failures
+
+
+def check_styles() -> List[str]:
+    stats = {}
+    for level in AI_PROFILES:
+        counts = Counter()
+        inner = get_ai_policy(level, 100).as_headless(random.Random(5))
+
+        def counting(engine: FullHandEngine, legal: List[int]) -> Tuple[int, Optional[float]]:
+            code, amount = inner(engine, legal)
+            counts[code] += 1
+            return code, amount
+
+        result = simulate(STYLE_HANDS, counting, stack_bb=100, seed=5)
+        total = sum(counts.values())
+        aggressive = (counts[ACT_BET] + counts[ACT_RAISE] + counts[ACT_ALLIN]) / total
+        folds = counts[ACT_FOLD] / total
+        stats[level] = (aggressive, folds)
+        print(f"style {level:<10}: aggression {aggressive:6.1%}  fold {folds:6.1%}  "
+              f"showdown {result.showdown.mean():6.1%}")
+    failures = []
+    if not stats["passive"][0] < stats["standard"][0] < stats["aggressive"][0]:
+        failures.append(f"aggression not ordered passive < standard < aggressive: {stats}")
+    if not stats["passive"][1] < min(stats["standard"][1], stats["aggressive"][1]):
+        failures.append(f"passive profile does not fold least: {stats}")
+    return failures
+
+
+def _decision_points() -> List[Tuple[FullHandEngine, List[int]]]:
+    """随机牌局中翻前 / 翻牌的 AI 决策点 (fork 保存)"""
+    points = []
+    policy = get_ai_policy("standard", 100)
+    for i in range(TIMING_HANDS):
+        engine = FullHandEngine(stack_bb=100, seed=f"t-{i}")
+        engine.initialize_game()
+        while engine.status != GameStatus.ENDED and engine.street in (Street.PREFLOP, Street.FLOP):
+            legal = engine.legal_action_codes()
+            if not legal:
+                break
+            points.append((engine.fork(), legal))
+            policy.act(engine)
+    return points
+
+
+def bench_timing() -> None:
+    points = _decision_points()
+    policy = get_ai_policy("standard", 100)
+
+    start = time.perf_counter()
+    for engine, legal in points:
+        _legacy_decision(engine, [ACTION_NAMES[c] for c in legal])
+    legacy = (time.perf_counter() - start) / len(points) * 1e6
+
+    start = time.perf_counter()
+    for engine, legal in points:
+        policy.decide(engine, legal, decision_uniform(engine))
+    compiled = (time.perf_counter() - start) / len(points) * 1e6
+
+    # _run_ai_until_hero_turn: 发牌后由 AI 行动到 Hero (不含发牌)
+    service = FullHandService(None)
+    engines = []
+    for i in range(TIMING_HANDS):
+        engine = FullHandEngine(stack_bb=100, seed=f"r-{i}")
+        engine.initialize_game()
+        engines.append(engine)
+    start = time.perf_counter()
+    for engine in engines:
+        service._run_ai_until_hero_turn(engine, policy)
+    elapsed = time.perf_counter() - start
+    actions = sum(len(e.action_log) - 2 for e in engines)  # 去掉两条盲注记录
+
+    print(f"{len(points)} decision points")
+    print(f"legacy decision   : {legacy:8.2f} us")
+    print(f"compiled decision : {compiled:8.2f} us")
+    print(f"run_ai per action : {elapsed / actions * 1e6:8.2f} us ({actions} AI actions incl. engine update)")
+
+
+def main() -> None:
+    start = time.perf_counter()
+    for level in AI_PROFILES:
+        for stack in STACKS:
+            get_ai_policy(level, stack)
+    print(f"compile {len(AI_PROFILES)} levels x {len(STACKS)} stacks: {time.perf_counter() - start:.2f} s")
+
+    failures = check_legality() + check_sampling() + check_determinism() + check_styles()
+    bench_timing()
+
+    for failure in failures[:10]:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else "FAILED")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
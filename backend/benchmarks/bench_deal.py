@@ -0,0 +1,112 @@
+"""
+发牌基准测试
+1. 对比字符串牌组 (每次发牌复制剩余牌组) 与整数牌 id + 游标发牌的耗时与内存分配
+2. 完整牌局 (发牌、按过牌/跟注打完、结算) 的内存分配
+
+内存分配按 tracemalloc 统计: 一手结束后仍存活的内存块数 / 字节数，以及过程中的峰值字节数
+
+运行:
+    cd backend && python -m benchmarks.bench_deal
+"""
+import random
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from app.services.fullhand_engine import FullHandEngine, GameStatus, PokerDeck
+
+HANDS = 20_000
+SAMPLES = 50
+WARMUP_HANDS = 5
+
+
+class LegacyDeck:
+    """改造前的字符串牌组"""
+
+    def __init__(self, seed):
+        self.cards = [r + s for s in PokerDeck.SUITS for r in PokerDeck.RANKS]
+        self.rng = random.Random(seed)
+        self.rng.shuffle(self.cards)
+
+    def deal(self, n=1):
+        dealt = self.cards[:n]
+        self.cards = self.cards[n:]
+        return dealt
+
+
+def _deal_hand(deck, deal):
+    holes = [deal(1) for _ in range(6)]
+    for hole in holes:
+        hole.extend(deal(1))
+    board = deal(3)
+    board.extend(deal(1))
+    board.extend(deal(1))
+    return holes, board
+
+
+def _traced(run: Callable[[int], object]) -> Tuple[float, float, float]:
+    """
+    逐个样本运行 run(i)，返回平均每个样本 (存活内存块数, 存活字节数, 峰值字节数)
+    run 的返回值在统计期间保持存活，计入存活内存
+    """
+    tracemalloc.start()
+    blocks = size = peak = 0
+    keep = []
+    for i in range(SAMPLES):
+        before = tracemalloc.take_snapshot()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        keep.append(run(i))
+        peak += tracemalloc.get_traced_memory()[1] - current
+        diff = tracemalloc.take_snapshot().compare_to(before, "filename")
+        # 快照本身的内存记在 tracemalloc 模块下，排除
+        diff = [d for d in diff if not d.traceback[0].filename.endswith("tracemalloc.py")]
+        blocks += sum(d.count_diff for d in diff)
+        size += sum(d.size_diff for d in diff)
+    tracemalloc.stop()
+    return blocks / SAMPLES, size / SAMPLES, peak / SAMPLES
+
+
+def _measure(make_deck, method):
+    # 洗牌 (random.Random 初始化 + shuffle) 两种实现相同，只计发牌部分
+    decks = [make_deck(i) for i in range(HANDS)]
+    start = time.perf_counter()
+    for deck in decks:
+        _deal_hand(deck, getattr(deck, method))
+    elapsed = time.perf_counter() - start
+
+    decks = [make_deck(i) for i in range(SAMPLES)]
+    return (elapsed,) + _traced(lambda i: _deal_hand(decks[i], getattr(decks[i], method)))
+
+
+def _play_hand(i: int) -> FullHandEngine:
+    """能过牌则过牌，否则跟注，否则弃牌，打完一手"""
+    engine = FullHandEngine(stack_bb=100, seed=f"alloc-{i}")
+    engine.initialize_game()
+    while engine.status != GameStatus.ENDED:
+        legal = engine.get_legal_actions()
+        if not legal:
+            break
+        engine.process_action(next((a for a in ("check", "call", "fold") if a in legal), legal[0]))
+    return engine
+
+
+def main() -> None:
+    cases = (
+        ("string deck", LegacyDeck, "deal"),
+        ("int deck (cursor)", PokerDeck, "deal_ids"),
+    )
+    for name, make_deck, method in cases:
+        elapsed, blocks, size, peak = _measure(make_deck, method)
+        print(f"{name:18s}: {HANDS / elapsed / 1e3:8.1f}k hands/s, "
+              f"{blocks:6.0f} blocks / {size:6.0f} B live, peak {peak:6.0f} B/hand while dealing")
+
+    # 首次调用会构建策略表、查表评估器等进程级缓存，预热后再统计
+    for i in range(WARMUP_HANDS):
+        _play_hand(-1 - i)
+    blocks, size, peak = _traced(_play_hand)
+    print(f"{'full hand':18s}: {blocks:6.0f} blocks / {size:6.0f} B live after the hand, peak {peak:6.0f} B/hand")
+
+
+if __name__ == "__main__":
+    main()
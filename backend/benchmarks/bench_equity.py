@@ -0,0 +1,69 @@
+"""
+胜率计算基准测试
+常见复盘场景的单次延迟 (未命中缓存 / 命中缓存)，以及大规模模拟的吞吐
+
+运行:
+    cd backend && python -m benchmarks.bench_equity [--workers N]
+"""
+import argparse
+import time
+
+from app.services.cards import parse_cards
+from app.services.equity import (
+    clear_equity_cache, hand_vs_hand, hand_vs_range, parse_range, range_vs_range,
+)
+
+REPEAT = 50
+BIG_SAMPLES = 1_000_000
+
+OPEN_RANGE = parse_range(
+    "AA,KK,QQ,JJ,TT,99,88,77,66,55,AKs,AQs,AJs,ATs,A5s,KQs,KJs,QJs,JTs,T9s,98s,AKo,AQo,AJo,KQo"
+)
+CALL_RANGE = parse_range("JJ,TT,99,88,77,AQs,AJs,KQs,KJs,QJs,JTs,T9s,98s,87s,AQo,KQo")
+
+
+def _latency(fn) -> tuple:
+    clear_equity_cache()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        clear_equity_cache()
+        fn()
+    cold = (time.perf_counter() - start) / REPEAT
+
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    warm = (time.perf_counter() - start) / REPEAT
+    return cold * 1e3, warm * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    hero, villain = parse_cards(["Ah", "Kh"]), parse_cards(["Ts", "9s"])
+    flop = parse_cards(["Qs", "Jh", "2d"])
+    turn = flop + parse_cards(["3c"])
+
+    cases = [
+        ("hand vs hand, preflop (MC)", lambda: hand_vs_hand(hero, villain)),
+        ("hand vs hand, flop (exact)", lambda: hand_vs_hand(hero, villain, flop)),
+        ("hand vs range, flop (MC)", lambda: hand_vs_range(hero, CALL_RANGE, flop)),
+        ("hand vs range, turn (exact)", lambda: hand_vs_range(hero, CALL_RANGE, turn)),
+        ("range vs range, flop (MC)", lambda: range_vs_range(OPEN_RANGE, CALL_RANGE, flop)),
+    ]
+    for name, fn in cases:
+        cold, warm = _latency(fn)
+        print(f"{name:30s}: {cold:7.2f} ms cold, {warm:6.3f} ms cached")
+
+    start = time.perf_counter()
+    result = range_vs_range(OPEN_RANGE, CALL_RANGE, samples=BIG_SAMPLES, workers=args.workers, use_cache=False)
+    elapsed = time.perf_counter() - start
+    print(f"range vs range, preflop, {BIG_SAMPLES:,} samples ({args.workers} workers): "
+          f"{elapsed:.2f}s, equity {result.equity:.4f} +/- {result.std_error:.4f}")
+
+
+if __name__ == "__main__":
+    main()
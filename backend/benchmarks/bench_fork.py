@@ -0,0 +1,109 @@
+"""
+牌局 fork 校验与基准
+1. 一致性: 随机牌局在每个行动前 fork 检查点；从检查点 fork 后重放原行动，结果与原牌局一致
+2. 隔离: 在分支上随机改打并打完，检查点的快照字节保持不变
+3. 耗时: fork / 快照恢复 / 按 seed 重放 三种方式得到决策点状态的开销
+
+运行:
+    cd backend && python -m benchmarks.bench_fork
+"""
+import random
+import time
+
+from app.services.fullhand_engine import FullHandEngine, GameStatus
+from app.services.headless_engine import ai_amount
+
+HANDS = 1000
+TIMING = 2000
+
+
+def _play(engine: FullHandEngine, rng: random.Random, max_actions: int = 200):
+    """随机打完一手，返回 (每个行动前的检查点, 行动列表)"""
+    checkpoints, actions = [], []
+    for _ in range(max_actions):
+        legal = engine.legal_action_codes()
+        if engine.status == GameStatus.ENDED or not legal:
+            break
+        code = rng.choice(legal)
+        amount = ai_amount(engine, code)
+        checkpoints.append(engine.fork())
+        actions.append((code, amount))
+        engine._act(code, amount)
+    return checkpoints, actions
+
+
+def check(rng: random.Random) -> int:
+    mismatches = leaks = 0
+    for i in range(HANDS):
+        engine = FullHandEngine(seed=f"{i:016x}" if i % 2 else f"c1-{i:016x}")
+        engine.initialize_game()
+        checkpoints, actions = _play(engine, rng)
+        original = engine.to_snapshot()
+
+        for k, checkpoint in enumerate(checkpoints):
+            before = checkpoint.to_snapshot()
+            replayed = checkpoint.fork()
+            for code, amount in actions[k:]:
+                replayed._act(code, amount)
+            # 重放生成的时间戳不同，比较对外状态和行动内容
+            mismatches += _strip(replayed) != _strip(engine)
+
+            branch = checkpoint.fork()
+            _play(branch, rng)
+            leaks += checkpoint.to_snapshot() != before
+        leaks += engine.to_snapshot() != original
+    print(f"parity: {HANDS} hands, {mismatches} mismatches, {leaks} states modified by branches")
+    return mismatches + leaks
+
+
+def _strip(engine: FullHandEngine):
+    return (engine.get_state(), engine.result_bb,
+            [(a.street, a.seat, a.action, a.amount, a.pot_after) for a in engine.action_log])
+
+
+def bench(rng: random.Random) -> None:
+    engines = []
+    for i in range(TIMING):
+        engine = FullHandEngine(seed=f"c1-{i:016x}")
+        engine.initialize_game()
+        for _ in range(rng.randint(0, 6)):
+            legal = engine.legal_action_codes()
+            if engine.status == GameStatus.ENDED or not legal:
+                break
+            code = rng.choice(legal)
+            engine._act(code, ai_amount(engine, code))
+        engines.append(engine)
+    snapshots = [e.to_snapshot() for e in engines]
+
+    def timed(fn, items):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        return (time.perf_counter() - start) / len(items) * 1e6
+
+    def replay(engine):
+        e = FullHandEngine(stack_bb=engine.stack_bb, seed=engine.seed)
+        e.initialize_game()
+        for a in engine.action_log[2:]:
+            e._to_act_seat = a.seat
+            e.process_action(a.action, a.amount)
+
+    fork = timed(lambda e: e.fork(), engines)
+    restore = timed(FullHandEngine.from_snapshot, snapshots)
+    seed = timed(replay, engines)
+    print(f"fork             : {fork:6.1f} us")
+    print(f"from_snapshot    : {restore:6.1f} us")
+    print(f"replay from seed : {seed:6.1f} us")
+
+
+def main() -> None:
+    rng = random.Random(3)
+    failed = check(rng)
+    bench(rng)
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
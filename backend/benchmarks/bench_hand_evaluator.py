@@ -0,0 +1,56 @@
+"""
+牌力评估基准测试
+对比 treys (每次摊牌新建 Evaluator 并逐张 Card.new) 与查表评估的单次摊牌和批量吞吐
+
+运行:
+    cd backend && python -m benchmarks.bench_hand_evaluator
+"""
+import time
+
+import numpy as np
+from treys import Card, Evaluator
+
+from app.services.cards import CARD_STRS
+from app.services.hand_evaluator import evaluate_batch, evaluate_showdown
+
+SHOWDOWNS = 5_000
+PLAYERS = 6
+BATCH = 1_000_000
+
+
+def _deal(rng: np.random.Generator, n: int) -> np.ndarray:
+    """n 局的 5 张公共牌 + 6 名玩家手牌"""
+    return np.argsort(rng.random((n, 52)), axis=1)[:, :5 + 2 * PLAYERS]
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    deals = _deal(rng, SHOWDOWNS).tolist()
+
+    start = time.perf_counter()
+    for deal in deals:
+        evaluator = Evaluator()
+        board = [Card.new(CARD_STRS[c]) for c in deal[:5]]
+        for i in range(PLAYERS):
+            hole = [Card.new(CARD_STRS[c]) for c in deal[5 + 2 * i:7 + 2 * i]]
+            evaluator.evaluate(board, hole)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for deal in deals:
+        evaluate_showdown(deal[:5], [deal[5 + 2 * i:7 + 2 * i] for i in range(PLAYERS)])
+    showdown = time.perf_counter() - start
+
+    hands = np.argsort(rng.random((BATCH, 52)), axis=1)[:, :7].astype(np.int8)
+    evaluate_batch(hands[:1000])  # 预热
+    start = time.perf_counter()
+    evaluate_batch(hands)
+    batch = time.perf_counter() - start
+
+    print(f"treys showdown      : {SHOWDOWNS / legacy:10.0f} showdowns/s ({SHOWDOWNS * PLAYERS / legacy / 1e3:.0f}k hands/s)")
+    print(f"lookup showdown     : {SHOWDOWNS / showdown:10.0f} showdowns/s ({SHOWDOWNS * PLAYERS / showdown / 1e3:.0f}k hands/s)")
+    print(f"lookup batch        : {BATCH / batch / 1e6:10.2f}M hands/s")
+
+
+if __name__ == "__main__":
+    main()
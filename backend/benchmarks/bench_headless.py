@@ -0,0 +1,127 @@
+"""
+无界面模拟一致性校验与吞吐基准
+1. 相同 seed、相同策略下，HeadlessHandEngine 与 FullHandEngine 的行动序列、公共牌、底池和 Hero 盈亏一致
+2. 下注/加注尺度合法: 加注到的金额高于当前注额且不低于最小加注 (筹码不足时全部投入)，下注额大于 0
+3. simulate 的单核吞吐 (手/分钟)
+
+运行:
+    cd backend && python -m benchmarks.bench_headless
+"""
+import random
+import time
+
+from app.services.fullhand_engine import (
+    ACT_BET, ACT_RAISE, ACTION_CODES, ACTION_NAMES, FullHandEngine, GameStatus, Street,
+)
+from app.services.headless_engine import (
+    STREET_CODES, HeadlessHandEngine, passive_policy, play_hand, random_policy, resolve_showdowns, simulate,
+)
+
+PARITY_HANDS = 2000
+SIZING_HANDS = 3000
+BENCH_HANDS = 50_000
+
+
+def _play_interactive(seed: str, policy) -> FullHandEngine:
+    engine = FullHandEngine(stack_bb=100, seed=seed)
+    engine.initialize_game()
+    while engine.status != GameStatus.ENDED:
+        legal = engine.legal_action_codes()
+        if not legal:
+            # 与 play_hand 相同: 无人能行动时发完公共牌摊牌
+            engine._fast_forward_to_showdown()
+            break
+        code, amount = policy(engine, legal)
+        engine.process_action(ACTION_NAMES[code], amount)
+    return engine
+
+
+def check_parity() -> int:
+    headless = HeadlessHandEngine(stack_bb=100)
+    mismatches = 0
+    for i in range(PARITY_HANDS):
+        seed = f"{i:016x}"
+        expected = _play_interactive(seed, random_policy(random.Random(i)))
+        headless.new_hand(seed)
+        play_hand(headless, random_policy(random.Random(i)))
+
+        result_bb = headless.result_bb
+        if headless.showdown is not None:
+            hero = headless.players[headless.hero_seat]
+            share = resolve_showdowns([headless.showdown])[0]
+            result_bb = headless.pot * share - hero.total_committed
+        actions = [(STREET_CODES[Street(a.street)], a.seat, ACTION_CODES[a.action], a.amount)
+                   for a in expected.action_log]
+        mismatches += (
+            actions != headless.actions
+            or expected.board != headless.board
+            or expected.pot != headless.pot
+            or expected.result_bb != result_bb
+        )
+    print(f"parity: {PARITY_HANDS} hands, {mismatches} mismatches")
+    return mismatches
+
+
+def check_sizing() -> int:
+    """随机策略与被动策略下，每次下注/加注的金额都合法"""
+    problems = []
+    decisions = 0
+
+    def checked(policy):
+        def wrapper(engine: FullHandEngine, legal):
+            nonlocal decisions
+            code, amount = policy(engine, legal)
+            player = engine.players[engine._to_act_seat]
+            if code == ACT_RAISE:
+                decisions += 1
+                raise_to = min(amount, player.stack + player.committed_this_street)
+                all_in = raise_to == player.stack + player.committed_this_street
+                if raise_to <= engine.current_bet or (
+                        raise_to < engine.current_bet + engine._last_raise_size and not all_in):
+                    problems.append(f"{engine.seed}: raise to {amount} facing {engine.current_bet}")
+            elif code == ACT_BET:
+                decisions += 1
+                if not amount or amount <= 0:
+                    problems.append(f"{engine.seed}: bet {amount}")
+            return code, amount
+        return wrapper
+
+    headless = HeadlessHandEngine(stack_bb=100, seed=1)
+    for policy in (random_policy(random.Random(1)), passive_policy):
+        policy = checked(policy)
+        for _ in range(SIZING_HANDS):
+            headless.new_hand()
+            play_hand(headless, policy)
+    for problem in problems[:5]:
+        print(f"FAILED: {problem}")
+    print(f"sizing: {decisions} bets/raises, {len(problems)} illegal")
+    return len(problems)
+
+
+def bench() -> int:
+    """返回未结束的牌局数"""
+    unfinished = 0
+    cases = (("passive", passive_policy), ("random", random_policy(random.Random(0))))
+    for name, policy in cases:
+        start = time.perf_counter()
+        result = simulate(BENCH_HANDS, policy, seed=0)
+        elapsed = time.perf_counter() - start
+        unfinished += result.unfinished
+        print(f"{name:8s}: {BENCH_HANDS / elapsed * 60 / 1e6:5.2f}M hands/min/core, "
+              f"{result.to_dict()}")
+    return unfinished
+
+
+def main() -> None:
+    failed = check_parity() + check_sizing()
+    unfinished = bench()
+    if unfinished:
+        print(f"FAILED: {unfinished} hands left unfinished")
+        failed += unfinished
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+混合策略采样基准测试
+对比 random.choices (每次重建行动/频率列表) 与别名表采样
+
+运行:
+    cd backend && python -m benchmarks.bench_sampling
+"""
+import random
+import time
+
+import numpy as np
+
+from app.services.gto_engine import ALL_HANDS, get_gto_strategy
+
+DRAWS = 200_000
+BATCH = 100_000
+
+
+def main() -> None:
+    strategy = get_gto_strategy(100)
+    rng = random.Random(0)
+    hands = [rng.choice(ALL_HANDS) for _ in range(DRAWS)]
+
+    start = time.perf_counter()
+    for hand in hands:
+        s = strategy.get_strategy(hand, "CO", "open")
+        random.choices(list(s.keys()), weights=list(s.values()), k=1)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for hand in hands:
+        strategy.sample_action(hand, "CO", "open")
+    scalar = time.perf_counter() - start
+
+    gen = np.random.default_rng(0)
+    hand_idx = gen.integers(0, len(ALL_HANDS), size=BATCH)
+    strategy.sample_actions(hand_idx, "CO", "open", gen)  # 预热
+    start = time.perf_counter()
+    strategy.sample_actions(hand_idx, "CO", "open", gen)
+    batch = time.perf_counter() - start
+
+    print(f"random.choices      : {DRAWS / legacy / 1e3:10.0f} draws/ms")
+    print(f"alias (scalar)      : {DRAWS / scalar / 1e3:10.0f} draws/ms")
+    print(f"alias (vectorised)  : {BATCH / batch / 1e3:10.0f} draws/ms")
+
+
+if __name__ == "__main__":
+    main()
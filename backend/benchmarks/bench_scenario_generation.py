@@ -0,0 +1,61 @@
+"""
+训练场景生成基准测试
+对比逐手计算决策清晰度 (旧路径) 与预计算手牌池 (新路径) 的会话创建延迟
+
+运行:
+    cd backend && python -m benchmarks.bench_scenario_generation
+"""
+import random
+import time
+from unittest import mock
+
+from app.services.gto_engine import GTOStrategy, generate_training_scenarios, get_gto_strategy
+
+CASES = [
+    (100, "CO", "open"),
+    (100, "BTN", "vs_raise_2.5bb"),
+    (50, "BB", "vs_3bet"),
+    (50, "SB", "vs_all_in"),
+]
+DIFFICULTIES = ["easy", "normal", "hard"]
+ROUNDS = 300
+
+
+def _time_per_call(fn, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+def _legacy_path():
+    """关闭预计算索引，回到逐手计算决策清晰度的路径"""
+    return mock.patch.multiple(
+        GTOStrategy,
+        get_hand_pool=lambda self, *args: None,
+        get_difficulty=lambda self, *args: None,
+    )
+
+
+def main() -> None:
+    for stack, _, _ in CASES:
+        get_gto_strategy(stack)  # 预热缓存，只测量会话创建
+
+    print(f"{'case':<32}{'difficulty':<10}{'before (ms)':>12}{'after (ms)':>12}{'speedup':>10}")
+    for stack, position, context in CASES:
+        for difficulty in DIFFICULTIES:
+            def run():
+                generate_training_scenarios(stack, position, context, count=10, difficulty=difficulty)
+
+            random.seed(0)
+            with _legacy_path():
+                before = _time_per_call(run)
+            random.seed(0)
+            after = _time_per_call(run)
+
+            case = f"{stack}bb {position} {context}"
+            print(f"{case:<32}{difficulty:<10}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
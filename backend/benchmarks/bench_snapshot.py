@@ -0,0 +1,72 @@
+"""
+引擎快照基准测试
+对比按 seed 重放行动记录与从二进制快照恢复 FullHandEngine 的耗时，并统计快照大小
+
+运行:
+    cd backend && python -m benchmarks.bench_snapshot
+"""
+import random
+import time
+from types import SimpleNamespace
+
+from app.services.fullhand_engine import FullHandEngine, GameStatus
+from app.services.fullhand_service import FullHandService
+
+HANDS = 500
+
+
+def _play(seed: int, max_actions: int) -> FullHandEngine:
+    """随机行动若干步，得到一个进行中的牌局"""
+    rng = random.Random(seed)
+    engine = FullHandEngine(stack_bb=100, seed=f"{seed:016x}")
+    engine.initialize_game()
+    for _ in range(max_actions):
+        legal = engine.get_legal_actions()
+        if engine.status == GameStatus.ENDED or not legal:
+            break
+        action = rng.choice([a for a in legal if a != "fold"] or legal)
+        amount = {"bet": engine.pot * 0.5, "raise": engine.current_bet * 3}.get(action)
+        engine.process_action(action, amount)
+    return engine
+
+
+def _session(engine: FullHandEngine) -> SimpleNamespace:
+    """只含重放所需字段的会话"""
+    return SimpleNamespace(
+        id=None, stack_bb=engine.stack_bb, hand_seed=engine.seed,
+        action_log=[a.to_dict() for a in engine.action_log],
+        preflop_key_spot=None, flop_key_spot=None,
+    )
+
+
+def main() -> None:
+    service = FullHandService(db=None)
+    engines = [_play(i, 12) for i in range(HANDS)]
+    sessions = [_session(e) for e in engines]
+    snapshots = [e.to_snapshot() for e in engines]
+
+    start = time.perf_counter()
+    for s in sessions:
+        service._replay_engine(s)
+    replay = (time.perf_counter() - start) / HANDS
+
+    start = time.perf_counter()
+    for e in engines:
+        e.to_snapshot()
+    dump = (time.perf_counter() - start) / HANDS
+
+    start = time.perf_counter()
+    for data in snapshots:
+        FullHandEngine.from_snapshot(data)
+    load = (time.perf_counter() - start) / HANDS
+
+    actions = sum(len(e.action_log) for e in engines) / HANDS
+    size = sum(len(data) for data in snapshots) / HANDS
+    print(f"{HANDS} hands, {actions:.1f} actions/hand, snapshot {size:.0f} B/hand")
+    print(f"replay from seed : {replay * 1e6:8.1f} us/restore")
+    print(f"to_snapshot      : {dump * 1e6:8.1f} us/hand")
+    print(f"from_snapshot    : {load * 1e6:8.1f} us/restore ({replay / load:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+街结束判断的增量化基准
+1. 一致性: 随机策略下逐个行动对比增量引擎和原扫描实现 (位置、街、底池、结果)，并检查快照恢复后的位图与进攻方信息
+2. 长加注链: 翻前反复最小加注 N 次后全员跟注，翻牌后三条街全员过牌；
+   行动记录长度随 N 增长，翻牌后每次过牌的耗时应与 N 无关 (原实现每次过牌都扫描整条记录，随 N 线性增长)
+
+运行:
+    cd backend && python -m benchmarks.bench_street_end
+"""
+import random
+import time
+from typing import Any, Dict, Tuple
+
+from app.services.fullhand_engine import (
+    ACT_CALL, ACT_CHECK, ACT_RAISE, FullHandEngine, GameStatus, Street,
+)
+from app.services.headless_engine import ai_amount
+
+PARITY_HANDS = 3000
+RAISE_CHAINS = (10, 100, 1000, 5000)
+CHAIN_STACK_BB = 60000
+
+
+class ScanningEngine(FullHandEngine):
+    """原实现: 每次行动都重建玩家列表并过滤整条行动记录"""
+
+    def _check_street_end(self) -> Dict[str, Any]:
+        in_hand_players = [p for p in self.players if p.in_hand]
+        active_players = [p for p in in_hand_players if p.is_active]
+        if len(in_hand_players) == 1:
+            self._end_game("fold")
+            return {"ended": True}
+        if len(in_hand_players) > 0 and len(active_players) == 0:
+            self._fast_forward_to_showdown()
+            return {"ended": True}
+        if active_players:
+            if all(p.committed_this_street == self.current_bet for p in active_players):
+                street = self.street.value
+                acted_players = len([a for a in self.action_log if a.street == street])
+                if acted_players >= len([p for p in in_hand_players
+                                         if p.is_active or p.committed_this_street == self.current_bet]):
+                    self._advance_street()
+                    return {"advanced": True}
+            next_seat = (self._to_act_seat + 1) % 6
+            for _ in range(6):
+                next_player = self.players[next_seat]
+                if next_player.in_hand and next_player.is_active:
+                    self._to_act_seat = next_seat
+                    break
+                next_seat = (next_seat + 1) % 6
+            else:
+                self._advance_street()
+                return {"advanced": True}
+        else:
+            self._advance_street()
+            return {"advanced": True}
+        return {"advanced": False}
+
+
+def _state(engine: FullHandEngine):
+    return (engine._to_act_seat, engine.street, engine.status, engine.pot, engine.result_bb,
+            [(p.stack, p.in_hand, p.is_active) for p in engine.players])
+
+
+def _bookkeeping(engine: FullHandEngine):
+    return (engine._in_hand_mask, engine._active_mask, engine._matched_mask,
+            engine._last_aggressor, engine._street_raises, engine._preflop_aggressor)
+
+
+def check_parity() -> int:
+    rng = random.Random(7)
+    mismatches = 0
+    for i in range(PARITY_HANDS):
+        seed = f"{i:016x}"
+        engines = [FullHandEngine(seed=seed), ScanningEngine(seed=seed)]
+        for e in engines:
+            e.initialize_game()
+        new, old = engines
+        for _ in range(200):
+            legal = new.legal_action_codes()
+            if new.status == GameStatus.ENDED or not legal:
+                break
+            code = rng.choice(legal)
+            amount = ai_amount(new, code)
+            new._act(code, amount)
+            old._act(code, amount)
+            if _state(new) != _state(old):
+                mismatches += 1
+                break
+            # 牌局结束后 (含快进摊牌) 进攻方信息不再有意义，只比较进行中的状态
+            restored = FullHandEngine.from_snapshot(new.to_snapshot())
+            if new.status != GameStatus.ENDED and _bookkeeping(restored) != _bookkeeping(new):
+                mismatches += 1
+                break
+    print(f"parity: {PARITY_HANDS} hands, {mismatches} mismatches")
+    return mismatches
+
+
+def _raise_chain(cls, raises: int) -> Tuple[float, float]:
+    """
+    翻前连续最小加注 raises 次后全员跟注，翻牌后全员过牌到摊牌
+    返回 (翻前单次行动平均耗时, 翻牌后单次过牌平均耗时)，单位微秒
+    """
+    engine = cls(stack_bb=CHAIN_STACK_BB, seed="0" * 16)
+    engine.initialize_game()
+    start = time.perf_counter()
+    for _ in range(raises):
+        engine._act(ACT_RAISE, engine.current_bet + engine._last_raise_size)
+    preflop = raises
+    while engine.street == Street.PREFLOP:
+        engine._act(ACT_CALL)
+        preflop += 1
+    middle = time.perf_counter()
+    checks = 0
+    while engine.status != GameStatus.ENDED:
+        engine._act(ACT_CHECK)
+        checks += 1
+    end = time.perf_counter()
+    return (middle - start) / preflop * 1e6, (end - middle) / checks * 1e6
+
+
+def bench() -> None:
+    print(f"{'raises':>8} {'log':>6} | {'preflop / action':^23} | {'postflop / check':^23}")
+    print(f"{'':>8} {'':>6} | {'incremental':>11} {'scanning':>11} | {'incremental':>11} {'scanning':>11}")
+    for raises in RAISE_CHAINS:
+        new = _raise_chain(FullHandEngine, raises)
+        old = _raise_chain(ScanningEngine, raises)
+        print(f"{raises:>8} {raises + 7:>6} | {new[0]:>8.1f} us {old[0]:>8.1f} us "
+              f"| {new[1]:>8.1f} us {old[1]:>8.1f} us")
+
+
+def main() -> None:
+    failed = check_parity()
+    bench()
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
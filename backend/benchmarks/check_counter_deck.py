@@ -0,0 +1,72 @@
+"""
+计数器牌组离线校验与基准
+1. 已知答案: 固定 seed 的牌序写死在下面，算法改动会直接报错 (改算法必须换 COUNTER_SEED_PREFIX)
+2. 大量 seed 的批量结果均为 52 张牌的置换，且与逐张计算逐位一致
+3. 位置 x 牌的分布卡方检验
+4. 随机取单张牌 / 取公共牌 与 random.Random 洗整副牌的耗时对比
+
+运行:
+    cd backend && python -m benchmarks.check_counter_deck
+"""
+import time
+
+import numpy as np
+
+from app.services.counter_deck import COUNTER_SEED_PREFIX, CounterDeck, DECK_SIZE, deck_cards_batch
+from app.services.fullhand_engine import PokerDeck
+
+KNOWN_ANSWERS = {
+    "c1-0000000000000000": [29, 19, 44, 28, 22, 34, 4, 23, 47, 9, 51, 25, 46, 5, 3, 13, 15],
+    "c1-ffffffffffffffff": [48, 6, 39, 2, 36, 9, 46, 31, 3, 27, 43, 26, 11, 14, 20, 1, 10],
+}
+SEEDS = 100_000
+TIMING = 20_000
+
+
+def check_known_answers() -> int:
+    failed = sum(CounterDeck(seed).deal_ids(17) != cards for seed, cards in KNOWN_ANSWERS.items())
+    print(f"known answers: {len(KNOWN_ANSWERS)} seeds, {failed} mismatches")
+    return failed
+
+
+def check_batch(seeds) -> int:
+    cards = deck_cards_batch(seeds, np.tile(np.arange(DECK_SIZE), (len(seeds), 1)))
+    not_perm = int((np.sort(cards, axis=1) != np.arange(DECK_SIZE)).any(axis=1).sum())
+    scalar = sum(CounterDeck(seeds[i]).cards != cards[i].tolist() for i in range(0, len(seeds), 97))
+
+    counts = np.zeros((DECK_SIZE, DECK_SIZE))
+    np.add.at(counts, (np.tile(np.arange(DECK_SIZE), len(seeds)), cards.ravel()), 1)
+    expected = len(seeds) / DECK_SIZE
+    chi2 = ((counts - expected) ** 2 / expected).sum()
+    dof = (DECK_SIZE - 1) ** 2
+    print(f"batch: {len(seeds)} seeds, {not_perm} non-permutations, {scalar} scalar mismatches, "
+          f"position chi2 {chi2:.0f} (dof {dof}, z {(chi2 - dof) / np.sqrt(2 * dof):+.1f})")
+    return not_perm + scalar
+
+
+def bench(seeds) -> None:
+    def timed(fn):
+        start = time.perf_counter()
+        for seed in seeds:
+            fn(seed)
+        return (time.perf_counter() - start) / len(seeds) * 1e6
+
+    shuffle = timed(lambda s: PokerDeck(s).cards[12:17])
+    board = timed(lambda s: [CounterDeck(s).card(k) for k in range(12, 17)])
+    one = timed(lambda s: CounterDeck(s).card(14))
+    print(f"board via full shuffle : {shuffle:6.1f} us")
+    print(f"board via counter deck : {board:6.1f} us")
+    print(f"single card (counter)  : {one:6.1f} us")
+
+
+def main() -> None:
+    seeds = [f"{COUNTER_SEED_PREFIX}{i:016x}" for i in range(SEEDS)]
+    failed = check_known_answers() + check_batch(seeds)
+    bench(seeds[:TIMING])
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+进行中牌局引擎缓存校验与基准
+1. 失效规则: 版本不一致、TTL 过期、超过容量时按 LRU 淘汰 (手动时钟)
+2. 隔离: 修改 get 返回的引擎不影响缓存中的状态
+3. 耗时: 缓存命中 / 读快照 / 按 seed 重放 三种恢复方式
+
+运行:
+    cd backend && python -m benchmarks.check_engine_cache
+"""
+import random
+import time
+
+from app.services.engine_cache import LiveEngineCache
+from app.services.fullhand_engine import FullHandEngine, GameStatus
+from app.services.headless_engine import ai_amount
+
+TIMING = 2000
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _engine(seed: str, rng: random.Random, actions: int) -> FullHandEngine:
+    engine = FullHandEngine(seed=seed)
+    engine.initialize_game()
+    for _ in range(actions):
+        legal = engine.legal_action_codes()
+        if engine.status == GameStatus.ENDED or not legal:
+            break
+        code = rng.choice(legal)
+        engine._act(code, ai_amount(engine, code))
+    return engine
+
+
+def check(rng: random.Random) -> int:
+    failures = []
+    clock = ManualClock()
+    cache = LiveEngineCache(max_size=2, ttl=10, clock=clock)
+    engines = [_engine(f"c1-{i:016x}", rng, 3) for i in range(3)]
+
+    cache.put(1, 5, engines[0])
+    if cache.get(1, 6) is not None or len(cache):
+        failures.append("stale version was served or kept")
+
+    cache.put(1, 5, engines[0])
+    clock.now = 10
+    if cache.get(1, 5) is not None:
+        failures.append("expired entry was served")
+
+    clock.now = 0
+    cache.put(1, 1, engines[0])
+    cache.put(2, 1, engines[1])
+    cache.get(1, 1)
+    cache.put(3, 1, engines[2])
+    if cache.get(2, 1) is not None or cache.get(1, 1) is None or cache.get(3, 1) is None:
+        failures.append("LRU eviction order")
+
+    before = engines[0].to_snapshot()
+    copy = cache.get(1, 1)
+    while copy.status != GameStatus.ENDED and copy.legal_action_codes():
+        code = copy.legal_action_codes()[0]
+        copy._act(code, ai_amount(copy, code))
+    if engines[0].to_snapshot() != before or cache.get(1, 1).to_snapshot() != before:
+        failures.append("cached engine modified through get()")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print(f"cache rules: {len(failures)} failures")
+    return len(failures)
+
+
+def bench(rng: random.Random) -> None:
+    cache = LiveEngineCache(max_size=TIMING, ttl=60)
+    engines = [_engine(f"c1-{i:016x}", rng, rng.randint(0, 6)) for i in range(TIMING)]
+    for i, engine in enumerate(engines):
+        cache.put(i, 1, engine)
+    snapshots = [e.to_snapshot() for e in engines]
+
+    def replay(engine):
+        e = FullHandEngine(stack_bb=engine.stack_bb, seed=engine.seed)
+        e.initialize_game()
+        for a in engine.action_log[2:]:
+            e._to_act_seat = a.seat
+            e.process_action(a.action, a.amount)
+
+    def timed(fn, items):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        return (time.perf_counter() - start) / len(items) * 1e6
+
+    print(f"cache hit        : {timed(lambda i: cache.get(i, 1), range(TIMING)):6.1f} us")
+    print(f"from_snapshot    : {timed(FullHandEngine.from_snapshot, snapshots):6.1f} us")
+    print(f"replay from seed : {timed(replay, engines):6.1f} us")
+
+
+def main() -> None:
+    rng = random.Random(5)
+    failed = check(rng)
+    bench(rng)
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
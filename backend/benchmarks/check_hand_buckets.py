@@ -0,0 +1,71 @@
+"""
+手牌桶表离线校验与基准
+1. 全部 (规范翻牌, 组合) 与 HandEvaluator 的逐项规则判定一致 (约 230 万项)
+2. 随机具体翻牌经同构换算后的查表结果一致
+3. 对比规则判定与查表的单次耗时
+
+运行:
+    cd backend && python -m benchmarks.check_hand_buckets
+"""
+import random
+import time
+
+from app.services.cards import COMBO_CARDS
+from app.services.fullhand_engine import HandEvaluator
+from app.services.hand_buckets import (
+    CANONICAL_FLOPS, HAND_BUCKETS, NO_BUCKET, NUM_FLOPS, flop_bucket_index, get_hand_bucket_table,
+)
+
+SAMPLES = 200_000
+
+
+def check_table() -> int:
+    table = get_hand_bucket_table()
+    mismatches = 0
+    for flop_id, flop in enumerate(CANONICAL_FLOPS.tolist()):
+        for combo, hand in enumerate(COMBO_CARDS.tolist()):
+            if hand[0] in flop or hand[1] in flop:
+                mismatches += table[flop_id, combo] != NO_BUCKET
+                continue
+            expected = HandEvaluator._evaluate_bucket_rules(hand, flop)
+            mismatches += HAND_BUCKETS[table[flop_id, combo]] != expected
+    print(f"table: {NUM_FLOPS} flops x {len(COMBO_CARDS)} combos, {mismatches} mismatches")
+    return mismatches
+
+
+def check_lookups(deals) -> int:
+    mismatches = sum(
+        HAND_BUCKETS[flop_bucket_index(d[:2], d[2:])] != HandEvaluator._evaluate_bucket_rules(d[:2], d[2:])
+        for d in deals
+    )
+    print(f"lookups: {len(deals)} random flops, {mismatches} mismatches")
+    return mismatches
+
+
+def bench(deals) -> None:
+    start = time.perf_counter()
+    for d in deals:
+        HandEvaluator._evaluate_bucket_rules(d[:2], d[2:])
+    rules = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for d in deals:
+        HandEvaluator.evaluate_bucket_ids(d[:2], d[2:])
+    lookup = time.perf_counter() - start
+
+    print(f"rules  : {rules / len(deals) * 1e6:6.2f} us/hand")
+    print(f"lookup : {lookup / len(deals) * 1e6:6.2f} us/hand")
+
+
+def main() -> None:
+    rng = random.Random(0)
+    deals = [rng.sample(range(52), 5) for _ in range(SAMPLES)]
+    failed = check_table() + check_lookups(deals)
+    bench(deals)
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+牌力评估离线校验
+1. 全部 2,598,960 手 5 张牌与 treys 的排名逐一比对
+2. 全部 133,784,560 手 7 张牌: 各牌型数量与理论值一致，且恰好出现 4824 种等价类
+   (--treys 时再与 treys 逐手比对排名，耗时数小时)
+
+运行:
+    cd backend && python -m benchmarks.check_hand_evaluator [--treys]
+"""
+import argparse
+import time
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from app.services.cards import CARD_STRS
+from app.services.hand_evaluator import CATEGORY_NAMES, NUM_RANKS, evaluate_batch, hand_category, to_rank
+
+# 7 张牌中最佳 5 张的牌型分布 (高牌 ... 同花顺)
+SEVEN_CARD_COUNTS = [
+    23_294_460, 58_627_800, 31_433_400, 6_461_620, 6_180_020,
+    4_047_644, 3_473_184, 224_848, 41_584,
+]
+SEVEN_CARD_CLASSES = 4824
+
+
+def _colex_combinations(n: int, k: int) -> np.ndarray:
+    """range(n) 的全部 k 组合，按最大元素升序排列：range(m) 的组合恰为前 comb(m, k) 行"""
+    combos = np.fromiter(
+        (c for combo in combinations(range(n), k) for c in combo), dtype=np.int8,
+    ).reshape(-1, k)
+    return combos[np.argsort(combos[:, -1], kind="stable")]
+
+
+def _treys_ranks(hands: np.ndarray) -> np.ndarray:
+    from treys import Card, Evaluator
+
+    evaluator = Evaluator()
+    treys_cards = [Card.new(c) for c in CARD_STRS]
+    return np.array([
+        evaluator.evaluate([treys_cards[c] for c in hand[:2]], [treys_cards[c] for c in hand[2:]])
+        for hand in hands.tolist()
+    ])
+
+
+def check_five_cards() -> bool:
+    hands = _colex_combinations(52, 5)
+    ours = to_rank(evaluate_batch(hands))
+    theirs = _treys_ranks(hands)
+    mismatches = int((ours != theirs).sum())
+    print(f"5-card: {len(hands):,} hands, {len(np.unique(ours))} classes, {mismatches} mismatches vs treys")
+    return mismatches == 0 and len(np.unique(ours)) == NUM_RANKS
+
+
+def check_seven_cards(with_treys: bool) -> bool:
+    rest = _colex_combinations(50, 5)
+    counts = np.zeros(len(CATEGORY_NAMES), dtype=np.int64)
+    seen = np.zeros(NUM_RANKS + 1, dtype=bool)
+    mismatches = 0
+    total = 0
+    start = time.perf_counter()
+
+    # 前两张 a < b 固定，其余 5 张取自 b 之后的牌
+    for a in range(46):
+        for b in range(a + 1, 47):
+            m = 51 - b
+            hands = np.empty((comb(m, 5), 7), dtype=np.int8)
+            hands[:, 0] = a
+            hands[:, 1] = b
+            hands[:, 2:] = b + 1 + rest[:len(hands)]
+
+            scores = evaluate_batch(hands)
+            counts += np.bincount(hand_category(scores), minlength=len(counts))
+            ranks = to_rank(scores)
+            seen[ranks] = True
+            if with_treys:
+                mismatches += int((ranks != _treys_ranks(hands)).sum())
+            total += len(hands)
+        print(f"  first card {CARD_STRS[a]}: {total:,} hands, {time.perf_counter() - start:.0f}s", flush=True)
+
+    ok = total == comb(52, 7)
+    for name, count, expected in zip(CATEGORY_NAMES, counts, SEVEN_CARD_COUNTS):
+        ok &= int(count) == expected
+        print(f"  {name}: {count:,} (expected {expected:,})")
+    classes = int(seen.sum())
+    ok &= classes == SEVEN_CARD_CLASSES and mismatches == 0
+    print(f"7-card: {total:,} hands, {classes} classes, "
+          f"{mismatches if with_treys else 'n/a'} mismatches vs treys")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exhaustive hand evaluator check")
+    parser.add_argument("--treys", action="store_true", help="compare every 7-card hand with treys (slow)")
+    args = parser.parse_args()
+
+    ok = check_five_cards() & check_seven_cards(args.treys)
+    print("OK" if ok else "FAILED")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
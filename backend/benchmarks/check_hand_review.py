@@ -0,0 +1,126 @@
+"""
+物化复盘校验与基准 (临时 SQLite 数据库)
+1. 一致性: 随机打完若干手，牌局结束时存入的复盘与从终局快照重新生成的复盘一致
+2. 后台重算: 清空复盘 (一部分同时清空快照，走按 seed 重放的回退路径) 后运行 recompute_stale_reviews，
+   无论有无快照都与原复盘一致，全部牌局版本号更新
+3. 裁剪: 免费用户看不到策略频率
+4. 耗时: 读取物化复盘 / 从快照重新生成
+
+运行:
+    cd backend && python -m benchmarks.check_hand_review
+"""
+import os
+import random
+import tempfile
+import time
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir.name}/check_hand_review.db"
+
+from app.db.base import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.fullhand_session import FullHandSession  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.fullhand_engine import FullHandEngine  # noqa: E402
+from app.services.fullhand_service import FullHandService  # noqa: E402
+from app.services.hand_review import REVIEW_VERSION, unpack_review  # noqa: E402
+from app.services.review_jobs import recompute_stale_reviews  # noqa: E402
+
+HANDS = 300
+TIMING = 2000
+
+
+def _play(service: FullHandService, user: User, rng: random.Random, seed: str) -> None:
+    session = service.create_session(user, stack_bb=rng.choice([20, 50, 100]), replay_seed=seed)
+    for _ in range(30):
+        if session.status == "ENDED":
+            break
+        legal = service.get_legal_actions(session)
+        if not legal:
+            break
+        action = rng.choice(legal)
+        amount = {"raise": 6.0, "bet": 3.0}.get(action)
+        service.process_hero_action(session.id, user, action, amount)
+        service.db.refresh(session)
+
+
+def _rebuilt(service: FullHandService, session: FullHandSession):
+    return service._build_review(FullHandEngine.from_snapshot(session.engine_snapshot))
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    pro = User(email="pro@example.com", username="pro", hashed_password="x", is_subscribed=True)
+    free = User(email="free@example.com", username="free", hashed_password="x", is_subscribed=False)
+    db.add_all([pro, free])
+    db.commit()
+
+    rng = random.Random(11)
+    service = FullHandService(db)
+    for i in range(HANDS):
+        _play(service, pro, rng, f"c1-{i:016x}")
+
+    failures = []
+    sessions = db.query(FullHandSession).filter(FullHandSession.status == "ENDED").order_by(FullHandSession.id).all()
+    stored = {}
+    for session in sessions:
+        review = unpack_review(session.review)
+        stored[session.id] = review
+        if session.review_version != REVIEW_VERSION or review != _rebuilt(service, session):
+            failures.append(f"hand {session.id}: stored review differs from rebuilt")
+    print(f"materialized: {len(sessions)} ended hands, "
+          f"{sum(len(s.review) for s in sessions) / len(sessions):.0f} bytes per review")
+
+    # 后台重算: 偶数 id 清空复盘，其中每 4 个再清空快照
+    no_snapshot = set()
+    for session in sessions:
+        if session.id % 2 == 0:
+            session.review, session.review_version = None, None
+            if session.id % 4 == 0:
+                session.engine_snapshot = None
+                no_snapshot.add(session.id)
+    db.commit()
+    recomputed = recompute_stale_reviews(batch_size=32)
+    db.expire_all()
+    replay_diffs = 0
+    for session in sessions:
+        if session.review_version != REVIEW_VERSION:
+            failures.append(f"hand {session.id}: review not recomputed")
+        elif unpack_review(session.review) != stored[session.id]:
+            source = "seed replay" if session.id in no_snapshot else "snapshot"
+            replay_diffs += session.id in no_snapshot
+            failures.append(f"hand {session.id}: review recomputed from {source} differs")
+    print(f"recompute: {recomputed} reviews rebuilt, {replay_diffs}/{len(no_snapshot)} "
+          f"rebuilt without snapshot differ (seed replay fallback)")
+
+    # 免费用户视角
+    session = next(s for s in sessions if s.preflop_key_spot)
+    session.user_id = free.id
+    db.commit()
+    spot = FullHandService(db).get_review(session.id, free)["preflop_spot"]
+    if spot["strategy"] is not None or spot["user_action_prob"] is not None:
+        failures.append("strategy visible to free user")
+
+    targets = [s for s in sessions if s.engine_snapshot is not None][:TIMING]
+    snapshots = [(s.review, s.engine_snapshot) for s in targets]
+
+    def timed(fn):
+        start = time.perf_counter()
+        for item in snapshots:
+            fn(item)
+        return (time.perf_counter() - start) / len(snapshots) * 1e6
+
+    print(f"unpack stored    : {timed(lambda item: unpack_review(item[0])):8.1f} us")
+    print(f"rebuild          : {timed(lambda item: service._build_review(FullHandEngine.from_snapshot(item[1]))):8.1f} us")
+    db.close()
+
+    for failure in failures[:10]:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else "FAILED")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
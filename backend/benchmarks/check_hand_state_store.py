@@ -0,0 +1,106 @@
+"""
+共享牌局状态存储校验
+对进程内实现和 Redis 实现 (fakeredis 替身，未安装时跳过) 执行同一组检查:
+1. CAS 规则: 新建、基于旧版本的写入被拒绝、存储落后时允许写入、删除
+2. 并发: 多线程对同一手反复 读取 -> 写入下一版本，成功次数与最终版本号一致 (没有丢失更新)
+3. Redis 不可用时读返回 None、写不抛异常
+
+运行:
+    cd backend && python -m benchmarks.check_hand_state_store
+"""
+import threading
+from typing import List
+
+from redis import Redis
+
+from app.services.hand_state_store import (
+    HandState, HandStateStore, InMemoryHandStateStore, RedisHandStateStore, VersionConflict,
+)
+
+THREADS = 8
+ROUNDS = 200
+
+
+def _conflicts(store: HandStateStore, hand_id: int, expected: int, version: int) -> bool:
+    try:
+        store.compare_and_set(hand_id, expected, HandState(version, b"x"))
+    except VersionConflict:
+        return True
+    return False
+
+
+def check_rules(store: HandStateStore) -> List[str]:
+    failures = []
+    store.delete(1)
+    if _conflicts(store, 1, 0, 1) or store.get(1) != HandState(1, b"x"):
+        failures.append("create")
+    if not _conflicts(store, 1, 0, 2):
+        failures.append("write based on an older version was accepted")
+    if _conflicts(store, 1, 5, 6) or store.get(1).version != 6:
+        failures.append("write over a lagging entry was rejected")
+    store.delete(1)
+    if store.get(1) is not None:
+        failures.append("delete")
+    return failures
+
+
+def check_concurrency(store: HandStateStore) -> List[str]:
+    store.delete(2)
+    store.compare_and_set(2, 0, HandState(1, b"0"))
+    successes = [0] * THREADS
+
+    def worker(i: int) -> None:
+        for _ in range(ROUNDS):
+            state = store.get(2)
+            try:
+                store.compare_and_set(2, state.version, HandState(state.version + 1, b"%d" % i))
+            except VersionConflict:
+                continue
+            successes[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    final = store.get(2).version
+    print(f"  concurrency: {THREADS} threads x {ROUNDS} rounds, {sum(successes)} writes, final version {final}")
+    return [] if final == 1 + sum(successes) else ["lost update"]
+
+
+def check_unavailable() -> List[str]:
+    store = RedisHandStateStore(Redis(port=1, socket_connect_timeout=0.1), ttl=60)
+    try:
+        ok = store.get(1) is None
+        store.compare_and_set(1, 0, HandState(1, b"x"))
+        store.delete(1)
+    except Exception as e:  # noqa: BLE001
+        return [f"unavailable redis raised {e!r}"]
+    return [] if ok else ["unavailable redis returned state"]
+
+
+def main() -> None:
+    stores = {"memory": InMemoryHandStateStore(ttl=60)}
+    try:
+        import fakeredis
+    except ImportError:
+        print("fakeredis not installed, skipping redis store")
+    else:
+        stores["redis"] = RedisHandStateStore(fakeredis.FakeRedis(), ttl=60)
+
+    failures = []
+    for name, store in stores.items():
+        print(name)
+        failures += [f"{name}: {f}" for f in check_rules(store) + check_concurrency(store)]
+    failures += check_unavailable()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else "FAILED")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
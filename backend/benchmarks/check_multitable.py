@@ -0,0 +1,127 @@
+"""
+多桌同步模拟一致性校验与吞吐基准
+1. 同一批 seed 分别用标量 FullHandEngine 和 MultiTableSimulator 打完，随机数逐步共享，
+   逐桌比对行动序列、公共牌、筹码、底池、结束方式和 Hero 盈亏
+2. 所有桌都打到结束 (没有停在无人可行动状态的牌局)
+3. 下注/加注尺度合法: 加注到的金额高于当前注额且不低于最小加注 (筹码不足时全部投入)，下注额大于 0
+4. 对比标量引擎与向量化模拟的吞吐
+
+运行:
+    cd backend && python -m benchmarks.check_multitable
+"""
+import time
+
+import numpy as np
+
+from app.services.fullhand_engine import ACT_BET, ACT_RAISE, ACTION_CODES, ACTION_NAMES, FullHandEngine, GameStatus
+from app.services.headless_engine import ai_amount
+from app.services.multitable_sim import (
+    ENDED_BY, ENDED_NONE, ENDED_SHOWDOWN, MultiTableSimulator, ai_amounts, pick_legal, random_policy,
+)
+
+TABLES = 3000
+MAX_STEPS = 200
+BENCH_TABLES = 50_000
+
+
+def _scalar_hand(seed: str, u: np.ndarray) -> FullHandEngine:
+    """第 k 个行动按 u[k] 在合法动作中选择，与 pick_legal 相同"""
+    engine = FullHandEngine(stack_bb=100, seed=seed)
+    engine.initialize_game()
+    step = 0
+    while engine.status != GameStatus.ENDED:
+        legal = engine.legal_action_codes()
+        if not legal:
+            break
+        code = legal[min(int(u[step] * len(legal)), len(legal) - 1)]
+        engine.process_action(ACTION_NAMES[code], ai_amount(engine, code))
+        step += 1
+    return engine
+
+
+def _result(value):
+    """未结束的牌局: 标量引擎为 None，向量化模拟为 NaN"""
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def _illegal_sizes(sim: MultiTableSimulator, codes: np.ndarray, amounts: np.ndarray) -> int:
+    """本步下注/加注金额不合法的桌数"""
+    rows, seat = sim.rows, sim.to_act
+    reach = sim.stack[rows, seat] + sim.committed[rows, seat]
+    raise_to = np.minimum(amounts, reach)
+    bad_raise = (codes == ACT_RAISE) & ~sim.ended & (
+        (raise_to <= sim.current_bet) | ((raise_to < sim.current_bet + sim.last_raise) & (raise_to < reach))
+    )
+    bad_bet = (codes == ACT_BET) & ~sim.ended & ~(amounts > 0)
+    return int(bad_raise.sum() + bad_bet.sum())
+
+
+def check_parity() -> int:
+    seeds = [f"{i:016x}" for i in range(TABLES)]
+    u = np.random.default_rng(0).random((TABLES, MAX_STEPS))
+
+    engines = []
+    for seed in seeds:
+        engine = FullHandEngine(stack_bb=100, seed=seed)
+        engine.initialize_game()
+        engines.append(engine)
+    sim = MultiTableSimulator.from_engines(engines)
+
+    history = []
+    illegal = 0
+    for _ in range(MAX_STEPS):
+        mask = sim.legal_mask()
+        if not mask.any():
+            break
+        codes = pick_legal(mask, u[sim.rows, np.minimum(sim.actions, MAX_STEPS - 1)])
+        codes = np.where(mask.any(axis=1), codes, -1)
+        history.append(codes)
+        amounts = ai_amounts(sim, codes)
+        illegal += _illegal_sizes(sim, codes, amounts)
+        sim.step(codes, amounts)
+    history = np.array(history).T
+    unfinished = int(np.sum(sim.ended_by == ENDED_NONE))
+
+    mismatches = 0
+    for i, seed in enumerate(seeds):
+        expected = _scalar_hand(seed, u[i])
+        actions = [ACTION_CODES[a.action] for a in expected.action_log[2:]]
+        mismatches += (
+            actions != [c for c in history[i].tolist() if c >= 0]
+            or expected.board != sim.board(i)
+            or [p.stack for p in expected.players] != sim.stack[i].tolist()
+            or expected.pot != sim.pot[i]
+            or expected.ended_by != ENDED_BY[sim.ended_by[i]]
+            or _result(expected.result_bb) != _result(sim.result_bb[i])
+        )
+    print(f"parity: {TABLES} tables, {mismatches} mismatches, {unfinished} unfinished, {illegal} illegal sizes")
+    return mismatches + unfinished + illegal
+
+
+def bench() -> int:
+    u = np.random.default_rng(1).random((BENCH_TABLES // 10, MAX_STEPS))
+    start = time.perf_counter()
+    for i in range(len(u)):
+        _scalar_hand(f"{i:016x}", u[i])
+    scalar = len(u) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    sim = MultiTableSimulator.random(BENCH_TABLES, seed=1)
+    sim.run(random_policy(np.random.default_rng(1)))
+    vector = BENCH_TABLES / (time.perf_counter() - start)
+    print(f"scalar engine : {scalar * 60 / 1e6:6.2f}M hands/min")
+    print(f"multi-table   : {vector * 60 / 1e6:6.2f}M hands/min ({vector / scalar:.0f}x), "
+          f"{sim.actions.mean():.1f} actions/hand, showdown {np.mean(sim.ended_by == ENDED_SHOWDOWN):.1%}, "
+          f"unfinished {np.mean(sim.ended_by == ENDED_NONE):.1%}")
+    return int(np.sum(sim.ended_by == ENDED_NONE))
+
+
+def main() -> None:
+    failed = check_parity() + bench()
+    print("OK" if not failed else "FAILED")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+每日统计汇总校验与基准 (临时 SQLite 数据库)
+1. 一致性: 通过服务随机打完若干手，get_stats 与直接扫描会话表的结果一致，汇总行 (user_id, date) 唯一
+2. 并发插入: 模拟当天第一手的插入与其他请求冲突，改为累加后不丢计数
+3. 耗时: 大量历史牌局 (跨多天) 下扫描会话表与读取汇总的 get_stats 耗时
+
+运行:
+    cd backend && python -m benchmarks.check_stats_rollup
+"""
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir.name}/check_stats_rollup.db"
+
+from sqlalchemy import func  # noqa: E402
+
+from app.db.base import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.fullhand_session import FullHandSession, FullHandStats  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.fullhand_service import FullHandService  # noqa: E402
+
+HANDS = 150
+HISTORY = 10000
+DAYS = 120
+TIMING = 10
+
+
+class RacingService(FullHandService):
+    """第一次累加时假装当日行不存在，并在插入前由 "另一个请求" 插入当日行 (计数为 0，只制造唯一约束冲突)"""
+
+    raced = False
+
+    def _increment_daily_stats(self, user_id, day, increments):
+        if self.raced:
+            return super()._increment_daily_stats(user_id, day, increments)
+        self.raced = True
+        other = SessionLocal()
+        other.add(FullHandStats(user_id=user_id, date=day, **{key: 0 for key in increments}))
+        other.commit()
+        other.close()
+        return False
+
+
+def _scan_stats(db, user: User):
+    """原实现: 扫描用户全部已结束的牌局"""
+    sessions = db.query(FullHandSession).filter(
+        FullHandSession.user_id == user.id,
+        FullHandSession.status == "ENDED"
+    ).all()
+    grades = {"preflop": [0, 0], "flop": [0, 0]}
+    for s in sessions:
+        for street, spot in (("preflop", s.preflop_key_spot), ("flop", s.flop_key_spot)):
+            if spot and spot.get("grade"):
+                grades[street][0] += spot["grade"] in FullHandService.CORRECT_GRADES
+                grades[street][1] += 1
+    return {
+        "total_hands": len(sessions),
+        "total_result_bb": round(sum(s.result_bb or 0 for s in sessions), 2),
+        "preflop_accuracy": round(grades["preflop"][0] / grades["preflop"][1] * 100, 1) if grades["preflop"][1] else None,
+        "flop_accuracy": round(grades["flop"][0] / grades["flop"][1] * 100, 1) if grades["flop"][1] else None,
+    }
+
+
+def _play(service: FullHandService, user: User, rng: random.Random, seed: str) -> None:
+    session = service.create_session(user, stack_bb=rng.choice([20, 50, 100]), replay_seed=seed)
+    for _ in range(30):
+        if session.status == "ENDED":
+            break
+        legal = service._restore_engine(session).get_legal_actions()
+        if not legal:
+            break
+        action = rng.choice(legal)
+        service.process_hero_action(session.id, user, action, {"raise": 6.0, "bet": 3.0}.get(action))
+        service.db.refresh(session)
+
+
+def _seed_history(db, user: User, rng: random.Random) -> None:
+    """直接写入跨 DAYS 天的历史牌局，并按牌局结束逐手累加汇总"""
+    service = FullHandService(db)
+    start = datetime.utcnow() - timedelta(days=DAYS)
+    for i in range(HISTORY):
+        created = start + timedelta(seconds=rng.randrange(DAYS * 86400))
+        grade = rng.choice(["PERFECT", "ACCEPTABLE", "WRONG"])
+        session = FullHandSession(
+            user_id=user.id, hand_seed=f"{i:016x}", status="ENDED",
+            result_bb=rng.choice([-100.0, -6.0, -1.0, 1.5, 8.0, 40.0]),
+            preflop_key_spot={"grade": grade} if i % 3 == 0 else None,
+            flop_key_spot={"grade": grade} if i % 4 == 0 else None,
+            created_at=created, completed_at=created + timedelta(seconds=rng.randint(5, 300)),
+        )
+        db.add(session)
+        service._record_daily_stats(session)
+        if i % 1000 == 999:
+            db.commit()
+    db.commit()
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    users = [User(email=f"u{i}@example.com", username=f"u{i}", hashed_password="x", is_subscribed=True)
+             for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    failures = []
+    rng = random.Random(17)
+
+    service = FullHandService(db)
+    for i in range(HANDS):
+        _play(service, users[i % 2], rng, f"c1-{i:016x}")
+
+    # 并发插入: 用户 2 当天第一手
+    racing = RacingService(db)
+    _play(racing, users[2], rng, "c1-00000000000000ff")
+    _play(service, users[2], rng, "c1-00000000000000fe")
+    if not racing.raced:
+        failures.append("racing hand did not end, concurrent insert not exercised")
+
+    for user in users:
+        stats, scanned = service.get_stats(user), _scan_stats(db, user)
+        if any(stats[key] != value for key, value in scanned.items()):
+            failures.append(f"user {user.id}: rollup {stats} != scan {scanned}")
+    print(f"parity: {HANDS + 2} hands, {len(users)} users, {len(failures)} mismatches")
+
+    duplicates = db.query(FullHandStats.user_id, FullHandStats.date).group_by(
+        FullHandStats.user_id, FullHandStats.date
+    ).having(func.count() > 1).count()
+    if duplicates:
+        failures.append(f"{duplicates} duplicate (user_id, date) rollups")
+
+    _seed_history(db, users[0], rng)
+    stats, scanned = service.get_stats(users[0]), _scan_stats(db, users[0])
+    if any(stats[key] != value for key, value in scanned.items()):
+        failures.append(f"history: rollup {stats} != scan {scanned}")
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(TIMING):
+            fn(users[0])
+            db.expire_all()
+        return (time.perf_counter() - start) / TIMING * 1e3
+
+    print(f"{stats['total_hands']} hands over {DAYS} days")
+    print(f"scan sessions    : {timed(lambda u: _scan_stats(db, u)):8.2f} ms")
+    print(f"read rollups     : {timed(service.get_stats):8.2f} ms")
+    db.close()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else "FAILED")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -329,6 +329,8 @@ const FullHand: React.FC = () => {
               className="w-full bg-gray-700 border border-gray-600 rounded-lg px-3 md:px-4 py-2 md:py-3 text-white text-sm md:text-base focus:outline-none focus:ring-2 focus:ring-blue-500"
             >
               <option value="standard">标准 (GTO 策略)</option>
+              <option value="passive">跟注站 (少弃牌、少加注)</option>
+              <option value="aggressive">激进 (多下注、多加注)</option>
             </select>
           </div>
 
@@ -442,6 +444,11 @@ const FullHand: React.FC = () => {
                         }`}>
                           {player.hand_name}
                         </div>
+                        {player.flop_equity != null && (
+                          <div className="text-xs text-gray-400">
+                            翻牌胜率 {(player.flop_equity * 100).toFixed(1)}%
+                          </div>
+                        )}
                       </div>
                     )}
                   </div>
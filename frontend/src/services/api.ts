@@ -105,6 +105,12 @@ export const trainingApi = {
     action_to_you: string;
     stack_size?: number;
   }) => api.get('/training/advice', { params }),
+  
+  getRange: (params: {
+    position: string;
+    context: string;
+    stack?: number;
+  }) => api.get('/training/range', { params }),
 };
 
 // Payment API
@@ -130,6 +130,7 @@ export interface PlayerShowdownResult {
   total_committed: number;
   score: number;
   hand_name: string;
+  flop_equity?: number | null;
   is_winner: boolean;
 }
 
@@ -107,6 +107,14 @@ export interface HandAdvice {
   explanation: string;
 }
 
+export interface RangeGrid {
+  stack_size: number;
+  position: string;
+  action_to_you: string;
+  hands: string[];
+  frequencies: Record<string, number[]>;
+}
+
 // Subscription Types
 export interface SubscriptionStatus {
   is_subscribed: boolean;